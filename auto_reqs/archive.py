@@ -0,0 +1,204 @@
+import os
+import posixpath
+import tarfile
+import zipfile
+import zlib
+from collections import deque
+from auto_reqs import profiling
+from auto_reqs.extractor import extract_imports_streaming
+from auto_reqs.scanner import (
+    PARALLEL_CHUNK_SIZE,
+    PARALLEL_MIN_FILES,
+    FileImports,
+    ScanResult,
+    collect_local_modules,
+    extract_imports_from_source,
+)
+from auto_reqs.walker import PathMatcher
+
+ZIP_SUFFIXES = (".whl", ".zip", ".pyz")
+TAR_SUFFIXES = (".tar.gz", ".tgz")
+ARCHIVE_SUFFIXES = ZIP_SUFFIXES + TAR_SUFFIXES
+
+# Errors that spoil one member but not the rest of the archive.
+MEMBER_ERRORS = (OSError, ValueError, EOFError, zipfile.BadZipFile, tarfile.TarError, zlib.error)
+
+
+def is_archive(path):
+    """True if path is a file with one of the supported archive suffixes."""
+    return os.path.isfile(path) and path.lower().endswith(ARCHIVE_SUFFIXES)
+
+
+def archive_root(archive_path):
+    """
+    Name of the directory an sdist or source zip is expected to wrap its
+    files in (the archive name without suffix, e.g. pkg-1.0 for pkg-1.0.tar.gz).
+    """
+    name = os.path.basename(archive_path)
+    for suffix in ARCHIVE_SUFFIXES:
+        if name.lower().endswith(suffix):
+            return name[:-len(suffix)]
+    return name
+
+
+class MemberFilter:
+    """
+    Decide which archive members are scanned, as ProjectFiles would for a
+    directory: hidden directories are skipped and exclude patterns apply to
+    paths relative to the archive's project root (below the wrapping
+    directory of an sdist, if there is one).
+    """
+
+    def __init__(self, archive_path, exclude=()):
+        self.root = archive_root(archive_path) + "/"
+        self.exclude = PathMatcher(exclude)
+
+    def relative(self, name):
+        """Member name relative to the project root."""
+        name = posixpath.normpath(name).lstrip("/")
+        return name[len(self.root):] if name.startswith(self.root) else name
+
+    def wanted(self, name):
+        if not name.endswith(".py"):
+            return False
+        parts = self.relative(name).split("/")
+        if any(part.startswith(".") for part in parts[:-1]):
+            return False
+        for i in range(1, len(parts) + 1):
+            if self.exclude.match("/".join(parts[:i]), i < len(parts)):
+                return False
+        return True
+
+
+def _extract_member(f, size, max_file_size, filename):
+    """Extract the imports of one open member, streaming it when large."""
+    if max_file_size and size > max_file_size:
+        return extract_imports_streaming(f.readline)
+    return extract_imports_from_source(f.read(), filename)
+
+
+def _extract_zip_batch(archive_path, names, max_file_size=None):
+    """Process-pool task: FileImports for a batch of zip members."""
+    records = []
+    with zipfile.ZipFile(archive_path) as zf:
+        for name in names:
+            path = os.path.join(archive_path, name)
+            try:
+                info = zf.getinfo(name)
+                with zf.open(info) as f:
+                    records.append(FileImports(path, _extract_member(f, info.file_size, max_file_size, path), None))
+            except MEMBER_ERRORS as e:
+                records.append(FileImports(path, set(), f"{type(e).__name__}: {e}"))
+    return records
+
+
+def _extract_source_batch(sources):
+    """Process-pool task: FileImports for a batch of (path, bytes) pairs."""
+    return [FileImports(path, extract_imports_from_source(data, path), None) for path, data in sources]
+
+
+def _pool(workers, executor):
+    if executor is not None:
+        return executor, False
+    from concurrent.futures import ProcessPoolExecutor
+
+    return ProcessPoolExecutor(max_workers=workers), True
+
+
+def _iter_zip(archive_path, member_filter, workers, max_file_size, executor):
+    with zipfile.ZipFile(archive_path) as zf:
+        names = [info.filename for info in zf.infolist() if not info.is_dir() and member_filter.wanted(info.filename)]
+    if executor is None and (workers <= 1 or len(names) < PARALLEL_MIN_FILES):
+        yield from _extract_zip_batch(archive_path, names, max_file_size)
+        return
+    # Every task opens the archive itself, so members are decompressed in
+    # the workers and never pickled across.
+    size = max(1, min(PARALLEL_CHUNK_SIZE, len(names) // (workers * 4)))
+    pool, owned = _pool(workers, executor)
+    try:
+        batches = [names[i:i + size] for i in range(0, len(names), size)]
+        for results in pool.map(_extract_zip_batch, [archive_path] * len(batches), batches,
+                                [max_file_size] * len(batches)):
+            yield from results
+    finally:
+        if owned:
+            pool.shutdown()
+
+
+def _iter_tar(archive_path, member_filter, workers, max_file_size, executor):
+    # A compressed tar can only be read front to back, so members are
+    # decompressed here and their bytes handed to workers in batches, with
+    # a bounded number of batches in flight.
+    parallel = executor is not None or workers > 1
+    pool = owned = None
+    pending = deque()
+    batch = []
+
+    def submit():
+        nonlocal pool, owned
+        if pool is None:
+            pool, owned = _pool(workers, executor)
+        pending.append(pool.submit(_extract_source_batch, list(batch)))
+        batch.clear()
+
+    try:
+        with tarfile.open(archive_path, mode="r|*") as tf:
+            for member in tf:
+                if not member.isfile() or not member_filter.wanted(member.name):
+                    continue
+                path = os.path.join(archive_path, posixpath.normpath(member.name).lstrip("/"))
+                try:
+                    f = tf.extractfile(member)
+                    if parallel and not (max_file_size and member.size > max_file_size):
+                        batch.append((path, f.read()))
+                        if len(batch) >= PARALLEL_CHUNK_SIZE:
+                            submit()
+                            while len(pending) > 2 * max(1, workers):
+                                yield from pending.popleft().result()
+                        continue
+                    record = FileImports(path, _extract_member(f, member.size, max_file_size, path), None)
+                except MEMBER_ERRORS as e:
+                    record = FileImports(path, set(), f"{type(e).__name__}: {e}")
+                yield record
+        if batch:
+            submit()
+        while pending:
+            yield from pending.popleft().result()
+    finally:
+        if owned:
+            pool.shutdown()
+
+
+def iter_archive_imports(archive_path, exclude=(), workers=1, max_file_size=None, executor=None):
+    """
+    Yield a FileImports record for every wanted .py member of an archive.
+
+    Wheels, zips and zipapps (.pyz) are read with zipfile, .tar.gz sdists
+    as a stream; nothing is unpacked to disk. Record paths are the member
+    names joined to archive_path.
+    """
+    if workers == 0:
+        workers = os.cpu_count() or 1
+    workers = workers or 1
+    member_filter = MemberFilter(archive_path, exclude)
+    if archive_path.lower().endswith(ZIP_SUFFIXES):
+        records = _iter_zip(archive_path, member_filter, workers, max_file_size, executor)
+    else:
+        records = _iter_tar(archive_path, member_filter, workers, max_file_size, executor)
+    with profiling.phase("archive scan"):
+        for record in records:
+            profiling.count("files parsed")
+            yield record
+
+
+def scan_archive(archive_path, exclude=(), workers=1, max_file_size=None, source_roots=None, executor=None):
+    """Return the ScanResult of an archive: every import plus its local modules."""
+    archive_path = os.path.abspath(archive_path)
+    member_filter = MemberFilter(archive_path, exclude)
+    imports = set()
+    paths = []
+    for record in iter_archive_imports(archive_path, exclude, workers, max_file_size, executor):
+        imports |= record.imports
+        rel = member_filter.relative(os.path.relpath(record.path, archive_path).replace(os.sep, "/"))
+        paths.append(os.path.join(archive_path, rel))
+    return ScanResult(imports, collect_local_modules(paths, archive_path, source_roots))
@@ -0,0 +1,230 @@
+import json
+import os
+import threading
+import time
+
+CACHE_DIR_NAME = ".auto-reqs-cache"
+IMPORT_CACHE_FILE = "imports.json"
+METADATA_CACHE_FILE = "index-metadata.json"
+
+# Bump when the on-disk layout of the cache file changes.
+CACHE_FORMAT_VERSION = 1
+
+
+def get_cache_dir(repo_path):
+    """Return the project-local cache directory, creating it if needed."""
+    cache_dir = os.path.join(repo_path, CACHE_DIR_NAME)
+    os.makedirs(cache_dir, exist_ok=True)
+    ignore_file = os.path.join(cache_dir, ".gitignore")
+    if not os.path.exists(ignore_file):
+        with open(ignore_file, "w", encoding="utf-8") as f:
+            f.write("*\n")
+    return cache_dir
+
+
+def user_cache_dir():
+    """
+    Return the per-user cache directory shared by all projects, creating it.
+
+    Honours $AUTO_REQS_CACHE_DIR, then $XDG_CACHE_HOME, then ~/.cache.
+    """
+    cache_dir = os.environ.get("AUTO_REQS_CACHE_DIR") or os.path.join(
+        os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache"),
+        "auto-reqs",
+    )
+    os.makedirs(cache_dir, exist_ok=True)
+    return cache_dir
+
+
+def write_json_atomic(path, data):
+    """Write JSON to path via a temp file so readers never see partial output."""
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, separators=(",", ":"))
+    os.replace(tmp_path, path)
+
+
+class ImportCache:
+    """
+    Persistent per-file import sets keyed by (path, st_mtime_ns, st_size).
+
+    The cache is tagged with a version string; loading a file written with a
+    different format or extractor version yields an empty cache.
+    """
+
+    def __init__(self, path=None, version=""):
+        self.path = path
+        self.version = f"{CACHE_FORMAT_VERSION}:{version}"
+        self.entries = {}
+        self.dirty = False
+
+    @classmethod
+    def load(cls, path, version=""):
+        """Load the cache at path, discarding it if missing, corrupt or stale."""
+        cache = cls(path, version)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return cache
+        if isinstance(data, dict) and data.get("version") == cache.version:
+            cache.entries = data.get("files", {})
+        return cache
+
+    def get(self, filepath, stat):
+        """Return the cached imports for filepath, or None if stale or absent."""
+        entry = self.entries.get(str(filepath))
+        if entry and entry[0] == stat.st_mtime_ns and entry[1] == stat.st_size:
+            return set(entry[2])
+        return None
+
+    def signature(self, filepath):
+        """Return the (st_mtime_ns, st_size) filepath was cached at, or None."""
+        entry = self.entries.get(str(filepath))
+        return (entry[0], entry[1]) if entry else None
+
+    def put(self, filepath, stat, imports):
+        """Record the imports found in filepath at its current mtime and size."""
+        self.entries[str(filepath)] = [stat.st_mtime_ns, stat.st_size, sorted(imports)]
+        self.dirty = True
+
+    def discard(self, filepath):
+        """Forget filepath, if it is cached."""
+        if self.entries.pop(str(filepath), None) is not None:
+            self.dirty = True
+
+    def prune(self, live_paths):
+        """Drop entries for files that no longer exist in the scanned tree."""
+        live = {str(p) for p in live_paths}
+        stale = [p for p in self.entries if p not in live]
+        for p in stale:
+            del self.entries[p]
+        if stale:
+            self.dirty = True
+
+    def clear(self):
+        """Forget every entry (used by --rebuild-cache)."""
+        self.entries = {}
+        self.dirty = True
+
+    def save(self):
+        """Persist the cache if anything changed since it was loaded."""
+        if not self.path or not self.dirty:
+            return
+        write_json_atomic(self.path, {"version": self.version, "files": self.entries})
+        self.dirty = False
+
+
+class MetadataCache:
+    """
+    Persistent cache of package index responses, shared across projects.
+
+    Only the fields the resolver uses are kept (whether the project exists,
+    its latest version and the validators needed for conditional requests).
+    Entries younger than ttl seconds are served as-is; older ones are
+    revalidated with If-None-Match / If-Modified-Since. The least recently
+    used entries are evicted once max_entries is exceeded. Safe to share
+    between the resolver's worker threads.
+    """
+
+    def __init__(self, path=None, ttl=6 * 3600, max_entries=5000):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.entries = {}
+        self.counters = {"hits": 0, "misses": 0, "revalidated": 0, "evicted": 0}
+        self.dirty = False
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load(cls, path, ttl=6 * 3600, max_entries=5000):
+        """Load the cache at path, starting empty if it is missing or corrupt."""
+        cache = cls(path, ttl, max_entries)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return cache
+        if isinstance(data, dict) and data.get("version") == CACHE_FORMAT_VERSION:
+            cache.entries = data.get("entries", {})
+            cache.counters.update(data.get("counters", {}))
+        return cache
+
+    def lookup(self, key):
+        """Return (entry, is_fresh) for key; entry is None on a miss."""
+        with self._lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                self.counters["misses"] += 1
+                return None, False
+            entry["used"] = time.time()
+            self.dirty = True
+            fresh = time.time() - entry["fetched"] < self.ttl
+            if fresh:
+                self.counters["hits"] += 1
+            return dict(entry), fresh
+
+    def store(self, key, exists, version=None, etag=None, last_modified=None):
+        """Record a fresh response for key."""
+        now = time.time()
+        with self._lock:
+            self.entries[key] = {
+                "exists": exists,
+                "version": version,
+                "etag": etag,
+                "last_modified": last_modified,
+                "fetched": now,
+                "used": now,
+            }
+            self.dirty = True
+            self._evict()
+
+    def touch(self, key):
+        """Mark a stale entry as fresh after a 304 Not Modified response."""
+        with self._lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                entry["fetched"] = entry["used"] = time.time()
+                self.counters["revalidated"] += 1
+                self.dirty = True
+
+    def _evict(self):
+        overflow = len(self.entries) - self.max_entries
+        if overflow <= 0:
+            return
+        oldest = sorted(self.entries, key=lambda k: self.entries[k]["used"])[:overflow]
+        for key in oldest:
+            del self.entries[key]
+        self.counters["evicted"] += overflow
+
+    def stats(self):
+        """Return a summary of the cache contents and lifetime counters."""
+        now = time.time()
+        fresh = sum(1 for e in self.entries.values() if now - e["fetched"] < self.ttl)
+        size = 0
+        if self.path and os.path.exists(self.path):
+            size = os.path.getsize(self.path)
+        return {
+            "path": self.path,
+            "entries": len(self.entries),
+            "fresh": fresh,
+            "stale": len(self.entries) - fresh,
+            "bytes": size,
+            **self.counters,
+        }
+
+    def clear(self):
+        """Drop every entry and reset the counters."""
+        with self._lock:
+            self.entries = {}
+            self.counters = dict.fromkeys(self.counters, 0)
+            self.dirty = True
+
+    def save(self):
+        """Persist the cache if anything changed since it was loaded."""
+        with self._lock:
+            if not self.path or not self.dirty:
+                return
+            data = {"version": CACHE_FORMAT_VERSION, "entries": self.entries, "counters": self.counters}
+            write_json_atomic(self.path, data)
+            self.dirty = False
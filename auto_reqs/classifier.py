@@ -1,36 +1,190 @@
+import functools
+import importlib.util
+import os
 import sys
 import sysconfig
-import importlib.util
-from stdlib_list import stdlib_list
+from auto_reqs import profiling
 
-# Accurate stdlib detection using stdlib-list
-STDLIB_MODULES = set(stdlib_list(f"{sys.version_info.major}.{sys.version_info.minor}"))
+STDLIB = "stdlib"
+LOCAL = "local"
+THIRD_PARTY = "third-party"
+UNKNOWN = "unknown"
 
 # Explicitly allowlist for modules that may look like stdlib but are external
 THIRD_PARTY_WHITELIST = {"stdlib_list", "setuptools", "pkg_resources"}
 
+# Legacy stdlib aliases that may appear in old codebases or vendored libs
+LEGACY_STDLIB_NAMES = {
+    "Queue",
+    "StringIO",
+    "ConfigParser",
+    "cPickle",
+    "SocketServer",
+    "SimpleHTTPServer",
+    "BaseHTTPServer",
+    "UserDict",
+    "UserList",
+    "UserString",
+    "whichdb",
+    "dbhash",
+    "commands",
+    "copy_reg",
+    "dummy_thread",
+    "dummy_threading",
+    "repr",
+    "urlparse",
+    "urllib2",
+    "htmlentitydefs",
+    "httplib",
+}
+
+# Maximum number of find_spec-based verdicts remembered per interpreter.
+CLASSIFIER_CACHE_SIZE = 4096
+
+RUNNING_VERSION = f"{sys.version_info.major}.{sys.version_info.minor}"
+
+
+def _norm_path(path):
+    """Lowercase, forward-slash form of path for cross-platform prefix checks."""
+    return (path or "").lower().replace("\\", "/")
+
+
+class ModuleClassifier:
+    """
+    Classify top-level import names as stdlib, local, third-party or unknown.
+
+    Lookup tables are built once, on first use. Verdicts that need
+    importlib.util.find_spec are memoized in a bounded LRU cache, so every
+    name is probed at most once per classifier (see get_classifier).
+
+    With an explicit python_version (--target-python) classification uses
+    only the precompiled stdlib table of that version: nothing is probed
+    in the running interpreter, and names that are neither stdlib nor
+    local are third-party.
+    """
+
+    def __init__(self, python_version=None, cache_size=CLASSIFIER_CACHE_SIZE):
+        self.targeted = python_version is not None
+        self.python_version = python_version or RUNNING_VERSION
+        self._stdlib_names = None
+        self._stdlib_path = None
+        self._lookup = functools.lru_cache(maxsize=cache_size)(self._find_spec_verdict)
+
+    @property
+    def stdlib_names(self):
+        """
+        Known stdlib module names for this classifier's Python version.
+
+        Comes from the shipped per-version tables (see stdlib_tables); an
+        untargeted classifier adds the running interpreter's own builtin
+        and stdlib module names. stdlib_list is only imported for versions
+        without a table.
+        """
+        if self._stdlib_names is None:
+            from auto_reqs.stdlib_tables import stdlib_module_names
+
+            names = set(LEGACY_STDLIB_NAMES)
+            table = stdlib_module_names(self.python_version)
+            if table is not None:
+                names.update(table)
+            running = self.python_version == RUNNING_VERSION and not self.targeted
+            if running:
+                names.update(sys.builtin_module_names)
+                names.update(getattr(sys, "stdlib_module_names", ()))
+            elif table is None:
+                try:
+                    from stdlib_list import stdlib_list
+
+                    names.update(stdlib_list(self.python_version))
+                except Exception:
+                    pass
+            self._stdlib_names = frozenset(names)
+        return self._stdlib_names
+
+    @property
+    def stdlib_path(self):
+        """Normalized stdlib directory of the running interpreter."""
+        if self._stdlib_path is None:
+            self._stdlib_path = _norm_path(sysconfig.get_paths().get("stdlib", ""))
+        return self._stdlib_path
+
+    def _find_spec_verdict(self, name):
+        """Classify a name the tables do not know by where it would import from."""
+        profiling.count("find_spec calls")
+        try:
+            spec = importlib.util.find_spec(name)
+        except Exception:
+            return UNKNOWN
+        if not spec:
+            return UNKNOWN
+        origin = getattr(spec, "origin", None)
+        if not origin:
+            return THIRD_PARTY
+
+        # Only count as stdlib if inside the stdlib directory
+        # and NOT in any site-packages directory
+        origin = _norm_path(origin)
+        if self.stdlib_path and origin.startswith(self.stdlib_path) and "site-packages" not in origin:
+            return STDLIB
+        return THIRD_PARTY
+
+    def classify(self, name, repo_path=None, local_modules=None):
+        """
+        Return the verdict for one top-level module name.
+
+        local_modules (the scanner's local-module index) is a plain set
+        lookup; without it, repo_path is probed on disk instead.
+        """
+        if not name or name.startswith("_"):
+            return STDLIB
+        if name in THIRD_PARTY_WHITELIST:
+            return THIRD_PARTY
+        if name in self.stdlib_names:
+            return STDLIB
+        if local_modules is not None:
+            if name in local_modules:
+                return LOCAL
+        elif repo_path and is_local_module(name, repo_path):
+            return LOCAL
+        if self.targeted:
+            return THIRD_PARTY
+        return self._lookup(name)
+
+    def classify_many(self, names, repo_path=None, local_modules=None):
+        """Return {name: verdict} for every name in one pass."""
+        with profiling.phase("classify"):
+            return {name: self.classify(name, repo_path, local_modules) for name in names}
+
+    def cache_clear(self):
+        """Forget every memoized find_spec verdict."""
+        self._lookup.cache_clear()
+
+
+_classifiers = {}
+
+
+def get_classifier(python_version=None):
+    """
+    Return the shared ModuleClassifier for a target Python version, or for
+    the running interpreter when python_version is None.
+    """
+    if python_version not in _classifiers:
+        _classifiers[python_version] = ModuleClassifier(python_version)
+    return _classifiers[python_version]
+
+
+def classify_many(names, repo_path=None, local_modules=None, python_version=None):
+    """Classify many import names at once with the shared classifier (see get_classifier)."""
+    return get_classifier(python_version).classify_many(names, repo_path, local_modules)
+
 
 def is_stdlib(name):
     """Return True if the module belongs to Python's stdlib."""
-    if not name or name.startswith("_"):
-        return True
-    if name in THIRD_PARTY_WHITELIST:
-        return False
-    if name in sys.builtin_module_names or name in STDLIB_MODULES:
-        return True
-    try:
-        spec = importlib.util.find_spec(name)
-        if not spec or not spec.origin:
-            return False
-        stdlib_path = sysconfig.get_paths().get("stdlib", "")
-        return spec.origin.startswith(stdlib_path)
-    except Exception:
-        return False
+    return get_classifier().classify(name) == STDLIB
 
 
 def is_local_module(name, repo_path):
     """Check if an import corresponds to a local file or package."""
-    import os
     candidate_dir = os.path.join(repo_path, name)
     candidate_file = candidate_dir + ".py"
     return os.path.isdir(candidate_dir) or os.path.exists(candidate_file)
@@ -1,47 +1,423 @@
 import argparse
 import os
-from auto_reqs.utils import validate_repo_path
-from auto_reqs.scanner import scan_project_for_imports
-from auto_reqs.resolver import get_installed_distributions, get_latest_version_from_pypi
-from auto_reqs.updater import load_requirements, write_requirements, determine_changes
-from auto_reqs.config import load_config
+import shutil
+import sys
+from auto_reqs import daemon
 
 
-def main():
-    parser = argparse.ArgumentParser(description="Auto Reqs - Smart dependency manager")
-    parser.add_argument("action", choices=["scan", "update", "upgrade"], help="Action to perform")
-    parser.add_argument("path", help="Path to Python project directory")
-    parser.add_argument("--dry-run", action="store_true", help="Show changes without writing file")
+def cache_main(argv):
+    """Handle `auto-reqs cache stats|clear [path]`."""
+    from auto_reqs.cache import CACHE_DIR_NAME, IMPORT_CACHE_FILE, ImportCache, user_cache_dir
+    from auto_reqs.config import load_config
+    from auto_reqs.content_cache import CONTENT_CACHE_FILE, ContentCache
+    from auto_reqs.pipeline import load_metadata_cache
+    from auto_reqs.scanner import EXTRACTOR_VERSION
+
+    parser = argparse.ArgumentParser(prog="auto-reqs cache", description="Inspect or clear auto-reqs caches")
+    parser.add_argument("command", choices=["stats", "clear"], help="Cache operation")
+    parser.add_argument("path", nargs="?", default=".", help="Project whose import cache to include")
+    args = parser.parse_args(argv)
 
-    args = parser.parse_args()
-    repo_path = validate_repo_path(args.path)
+    repo_path = os.path.abspath(args.path)
     config = load_config(repo_path)
+    metadata = load_metadata_cache(config)
+    project_cache = os.path.join(repo_path, CACHE_DIR_NAME)
+    content = None
+    if os.path.exists(os.path.join(user_cache_dir(), CONTENT_CACHE_FILE)):
+        content = ContentCache.open(EXTRACTOR_VERSION, config.get("content_cache_size"))
+
+    if args.command == "clear":
+        metadata.clear()
+        metadata.save()
+        if content is not None:
+            content.clear()
+            content.close()
+            print(f"Cleared content cache: {content.path}")
+        if os.path.isdir(project_cache):
+            shutil.rmtree(project_cache)
+        print(f"Cleared package index cache: {metadata.path}")
+        print(f"Cleared project cache: {project_cache}")
+        return
+
+    stats = metadata.stats()
+    print(f"Package index cache: {stats['path']}")
+    for key in ("entries", "fresh", "stale", "bytes", "hits", "misses", "revalidated", "evicted"):
+        print(f"  {key:<12} {stats[key]}")
+    imports = ImportCache.load(os.path.join(project_cache, IMPORT_CACHE_FILE), EXTRACTOR_VERSION)
+    print(f"Project import cache: {project_cache}")
+    print(f"  {'files':<12} {len(imports.entries)}")
+    if content is not None:
+        stats = content.stats()
+        content.close()
+        print(f"Content cache: {stats['path']}")
+        for key in ("entries", "bytes", "max_bytes", "hits", "misses", "stored", "evicted"):
+            print(f"  {key:<12} {stats[key]}")
+
+
+def serve_main(argv):
+    """Handle `auto-reqs serve [--idle-timeout S] [--socket PATH] [--stop|--status]`."""
+    parser = argparse.ArgumentParser(prog="auto-reqs serve", description="Run the resident auto-reqs daemon")
+    parser.add_argument(
+        "--idle-timeout", type=float, default=daemon.DEFAULT_IDLE_TIMEOUT, metavar="SECONDS",
+        help="Exit after this long without a request",
+    )
+    parser.add_argument("--socket", metavar="PATH", help="Unix socket to listen on")
+    parser.add_argument("--status", action="store_true", help="Report whether a daemon is running")
+    parser.add_argument("--stop", action="store_true", help="Ask a running daemon to exit")
+    args = parser.parse_args(argv)
+
+    socket_path = args.socket or daemon.default_socket_path()
+    if args.status or args.stop:
+        reply = daemon.request({"action": "shutdown" if args.stop else "ping"}, socket_path, timeout=5)
+        if reply is None:
+            print("No daemon running.")
+            sys.exit(1)
+        print("Daemon stopped." if args.stop else f"Daemon running (pid {reply['pid']}, {reply['requests']} requests).")
+        return
+
+    print(f"Listening on {socket_path}")
+    try:
+        daemon.Daemon(socket_path, args.idle_timeout).serve()
+    except RuntimeError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+    except KeyboardInterrupt:
+        pass
+
+
+def target_environment(args):
+    """Site-packages directories chosen with --python/--site-packages, or None."""
+    if not (args.python or args.site_packages):
+        return None
+    from auto_reqs.environment import environment_paths
+
+    try:
+        return environment_paths(args.python, args.site_packages)
+    except OSError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+
+
+def python_version(value):
+    """argparse type for --target-python: a version with a shipped stdlib table."""
+    from auto_reqs.stdlib_tables import table_versions
+
+    if value not in table_versions():
+        raise argparse.ArgumentTypeError(
+            f"no stdlib table for Python {value!r} (choose from {', '.join(table_versions())})"
+        )
+    return value
+
+
+def why_main(argv):
+    """Handle `auto-reqs why <package> [path] [--refresh]`."""
+    from auto_reqs.cache import user_cache_dir
+    from auto_reqs.config import load_config
+    from auto_reqs.environment import load_environment
+    from auto_reqs.pipeline import project_files
+    from auto_reqs.provenance import ProvenanceIndex
+    from auto_reqs.resolver import ResolverIndex
+
+    parser = argparse.ArgumentParser(prog="auto-reqs why", description="Show which files require a package")
+    parser.add_argument("package", help="Distribution or top-level import name")
+    parser.add_argument("path", nargs="?", default=".", help="Project to query")
+    parser.add_argument("--refresh", action="store_true", help="Re-index changed files before answering")
+    args = parser.parse_args(argv)
+
+    repo_path = os.path.abspath(args.path)
+    with ProvenanceIndex.open(repo_path) as index:
+        if args.refresh or not len(index):
+            config = load_config(repo_path)
+            index.refresh(project_files(repo_path, config), config.get("max_file_size"))
+        snapshot = load_environment(cache_dir=user_cache_dir())
+        index.resolve_distributions(ResolverIndex(snapshot.top_level, snapshot.fingerprint))
+        rows = index.why(args.package)
+
+    if not rows:
+        print(f"No file imports {args.package}.")
+        sys.exit(1)
+    files = {path for path, _, _ in rows}
+    print(f"{args.package} is imported {len(rows)} times in {len(files)} files:")
+    for path, line, module in rows:
+        print(f"  {path}:{line}  {module}")
+
+
+def run_archive(args):
+    """Print the requirements of a wheel, sdist, zip or zipapp without unpacking it."""
+    from auto_reqs.config import load_config, override
+    from auto_reqs.pipeline import RunContext, audit_archive
+
+    archive_path = os.path.abspath(args.path)
+    if args.action == "watch":
+        print("Error: watch mode needs a directory, not an archive.")
+        sys.exit(1)
+    config = override(load_config(os.path.dirname(archive_path)), target_python=args.target_python)
+    use_cache = not args.no_cache
+    ctx = RunContext(config, use_cache=use_cache, index_url=args.index_url, environment=target_environment(args))
+    print(f"Scanning archive: {archive_path}")
+    required = audit_archive(archive_path, config, ctx, jobs=args.jobs)
+    ctx.save()
+    if not required:
+        print("\nNo third-party imports found.")
+        return
+    print(f"\nRequires {len(required)} packages (the archive is read, never modified):")
+    for name, version in required:
+        print(f"  {name}=={version}")
+
+
+def run_project(args, contexts=None, import_caches=None, show_progress=True):
+    """
+    Scan, update or watch one project in-process.
+
+    The daemon passes its contexts and import_caches dicts so RunContexts
+    and ImportCaches are reused across requests. Third-party imports are
+    resolved while the scan is still running. With --since/--staged only
+    the files git reports as changed are re-read. Archives are audited
+    in place by run_archive.
+    """
+    from auto_reqs.config import load_config, override
+    from auto_reqs.pipeline import (
+        REQUIREMENTS_FILE,
+        Prefetcher,
+        RunContext,
+        apply_changes,
+        load_import_cache,
+        print_report,
+        project_files,
+        scan_for_update,
+        scan_git_changes,
+    )
+    from auto_reqs.progress import ScanProgress
+    from auto_reqs.updater import load_requirements
+    from auto_reqs.utils import validate_repo_path
+
+    if os.path.isfile(args.path):
+        from auto_reqs.archive import is_archive
+
+        if is_archive(args.path):
+            return run_archive(args)
+
+    config = override(
+        load_config(os.path.abspath(args.path)), target_python=args.target_python, content_cache=args.content_cache,
+    )
+    files = project_files(args.path, config)
+    repo_path = validate_repo_path(args.path, files)
+    use_cache = not args.no_cache
 
     print(f"Scanning repository at: {repo_path}")
-    imports = scan_project_for_imports(repo_path, config["exclude"])
-    installed = get_installed_distributions()
-    req_path = os.path.join(repo_path, "requirements.txt")
-    requirements = load_requirements(req_path)
+    environment = target_environment(args)
+    key = (repo_path, args.index_url, use_cache, tuple(environment) if environment is not None else None)
+    ctx = contexts.get(key) if contexts is not None else None
+    if ctx is None:
+        ctx = RunContext(config, use_cache=use_cache, index_url=args.index_url, environment=environment)
+        if contexts is not None:
+            contexts[key] = ctx
+    if args.action == "watch":
+        from auto_reqs.watch import watch_project
 
-    missing, unused = determine_changes(
-        imports, installed, requirements, get_latest_version_from_pypi, repo_path
+        if args.dry_run:
+            print("\nDry Run: no changes will be saved.")
+        watch_project(
+            repo_path, config, ctx, dry_run=args.dry_run, use_cache=use_cache, poll=args.poll,
+            prune_transitive=args.prune_transitive,
+        )
+        return
+
+    cache = None
+    if import_caches is not None and use_cache:
+        if repo_path not in import_caches:
+            import_caches[repo_path] = load_import_cache(repo_path)
+        cache = import_caches[repo_path]
+    # The provenance index is built from the scan's own records and the
+    # signatures in its import cache, so neither is read from disk twice.
+    index_provenance = use_cache and config.get("provenance") and not args.dry_run
+    import_records = {} if index_provenance else None
+    if cache is None and index_provenance:
+        cache = load_import_cache(repo_path)
+
+    scan = None
+    if (args.since or args.staged) and use_cache and not args.rebuild_cache:
+        from auto_reqs import profiling
+        from auto_reqs.gitdiff import GitError, changed_python_files
+
+        try:
+            with profiling.phase("git diff"):
+                changes = changed_python_files(repo_path, since=args.since, staged=args.staged)
+        except GitError as e:
+            print(f"Error: {e}")
+            sys.exit(1)
+        if cache is None:
+            cache = load_import_cache(repo_path)
+        incremental = scan_git_changes(repo_path, config, changes, cache)
+        if incremental is None:
+            print("No import baseline cached yet; scanning every file.")
+        else:
+            cache.save()
+            touched = len(changes.changed) + len(changes.deleted)
+            if not incremental.delta:
+                print(f"{touched} changed files add or remove no third-party imports: no dependency change possible.")
+                return
+            print(f"{touched} changed files; third-party imports affected: {', '.join(sorted(incremental.delta))}")
+            scan = incremental.scan
+
+    if scan is None:
+        pinned = load_requirements(os.path.join(repo_path, REQUIREMENTS_FILE))
+        prefetcher = Prefetcher(ctx, repo_path, pinned, config.get("target_python"))
+        progress = ScanProgress() if show_progress else None
+        try:
+            scan = scan_for_update(
+                repo_path, config, files=files, jobs=args.jobs,
+                use_cache=use_cache, rebuild_cache=args.rebuild_cache, cache=cache,
+                progress=progress, on_new_imports=prefetcher, import_records=import_records,
+            )
+        finally:
+            if progress is not None:
+                progress.finish()
+            prefetcher.wait()
+    result = apply_changes(
+        repo_path, scan, ctx, dry_run=args.dry_run, prune_transitive=args.prune_transitive,
+        python_version=config.get("target_python"),
     )
+    ctx.save()
+    if index_provenance:
+        from auto_reqs.provenance import ProvenanceIndex
+
+        with ProvenanceIndex.open(repo_path) as index:
+            index.refresh(files, config.get("max_file_size"), scanned=import_records, cache=cache)
 
     if args.dry_run:
         print("\nDry Run: no changes will be saved.")
-    else:
-        write_requirements(requirements, req_path)
-
-    if missing:
-        print(f"\nAdded {len(missing)} new packages:")
-        for name, version in missing:
-            print(f"  {name}=={version}")
-    if unused:
-        print(f"\nRemoved {len(unused)} unused packages:")
-        for pkg in unused:
-            print(f"  {pkg}")
-    if not missing and not unused:
-        print("\nNo changes required.")
+    print_report(result)
+
+
+def absolute_paths(args):
+    """
+    Options of args with paths made absolute, since the daemon resolves them
+    from its own working directory; a bare --python name is left for PATH.
+    """
+    options = {**vars(args), "path": os.path.abspath(args.path)}
+    if args.site_packages:
+        options["site_packages"] = [os.path.abspath(d) for d in args.site_packages]
+    if args.python and (os.sep in args.python or (os.altsep and os.altsep in args.python) or os.path.exists(args.python)):
+        options["python"] = os.path.abspath(args.python)
+    return options
+
+
+def run(args):
+    """Run parsed CLI arguments, via the daemon when one is running."""
+    if args.monorepo:
+        from auto_reqs.config import load_config
+        from auto_reqs.pipeline import run_monorepo
+
+        print(f"Scanning monorepo at: {os.path.abspath(args.path)}")
+        run_monorepo(args.path, args, load_config(os.path.abspath(args.path)), target_environment(args))
+        return
+
+    in_process = args.no_daemon or args.profile or args.trace
+    if args.action in daemon.PROJECT_ACTIONS and not in_process:
+        options = absolute_paths(args)
+        reply = daemon.request({"action": args.action, "args": options})
+        if reply is not None and reply.get("ok"):
+            sys.stdout.write(reply["output"])
+            if reply.get("exit_code"):
+                sys.exit(reply["exit_code"])
+            return
+        if reply is not None:
+            print(f"Daemon error ({reply.get('error')}); running in-process.", file=sys.stderr)
+
+    run_project(args)
+
+
+def main(argv=None):
+    if argv is None:
+        argv = sys.argv[1:]
+    if argv and argv[0] == "cache":
+        return cache_main(argv[1:])
+    if argv and argv[0] == "serve":
+        return serve_main(argv[1:])
+    if argv and argv[0] == "why":
+        return why_main(argv[1:])
+
+    parser = argparse.ArgumentParser(
+        description="Auto Reqs - Smart dependency manager",
+        epilog="Use `auto-reqs cache stats|clear [path]` to inspect or reset caches, "
+        "`auto-reqs why <package> [path]` to see which files require a package "
+        "and `auto-reqs serve` to start the resident daemon.",
+    )
+    parser.add_argument("action", choices=["scan", "update", "upgrade", "watch"], help="Action to perform")
+    parser.add_argument(
+        "path", help="Path to Python project directory, or a .whl/.zip/.pyz/.tar.gz archive to audit",
+    )
+    parser.add_argument("--dry-run", action="store_true", help="Show changes without writing file")
+    parser.add_argument(
+        "--prune-transitive", action="store_true",
+        help="Also remove requirements that are only needed by other imported packages",
+    )
+    parser.add_argument(
+        "--jobs", "-j", type=int, default=1, metavar="N",
+        help="Parse files on N worker processes (0 = one per CPU)",
+    )
+    parser.add_argument(
+        "--index-url", metavar="URL",
+        help="Package index JSON API base, or file:///path for an offline mirror",
+    )
+    parser.add_argument("--no-cache", action="store_true", help="Do not read or write any cache")
+    target = parser.add_mutually_exclusive_group()
+    target.add_argument(
+        "--python", metavar="PATH",
+        help="Resolve against the environment of this interpreter (e.g. venv/bin/python) instead of auto-reqs' own",
+    )
+    target.add_argument(
+        "--site-packages", action="append", metavar="DIR",
+        help="Resolve against the distributions installed in DIR (repeatable)",
+    )
+    parser.add_argument(
+        "--target-python", type=python_version, metavar="X.Y",
+        help="Classify stdlib modules for this Python version instead of the running interpreter",
+    )
+    parser.add_argument("--rebuild-cache", action="store_true", help="Re-parse every file and rewrite the import cache")
+    parser.add_argument(
+        "--content-cache", action="store_true", default=None,
+        help="Reuse imports of files with identical bytes from the shared cache in $AUTO_REQS_CACHE_DIR (CI)",
+    )
+    parser.add_argument("--poll", action="store_true", help="watch: poll for changes instead of using inotify")
+    changed = parser.add_mutually_exclusive_group()
+    changed.add_argument(
+        "--since", metavar="REF",
+        help="Only re-read .py files changed since a git ref; the rest come from the import cache",
+    )
+    changed.add_argument(
+        "--staged", action="store_true",
+        help="Only re-read .py files staged for commit (pre-commit hooks)",
+    )
+    parser.add_argument(
+        "--monorepo", action="store_true",
+        help="Update every project (requirements.txt, pyproject.toml or .auto-reqs.json) under path",
+    )
+    parser.add_argument("--no-daemon", action="store_true", help="Run in-process even if a daemon is running")
+    parser.add_argument("--profile", action="store_true", help="Print time per phase and counters (runs in-process)")
+    parser.add_argument("--trace", metavar="FILE", help="Write a Chrome trace-event JSON file (runs in-process)")
+
+    args = parser.parse_args(argv)
+    if (args.since or args.staged) and (args.monorepo or args.action == "watch"):
+        parser.error("--since/--staged cannot be combined with --monorepo or watch")
+    if args.monorepo and args.action == "watch":
+        parser.error("watch cannot be combined with --monorepo; watch each project separately")
+    if not (args.profile or args.trace):
+        return run(args)
+
+    from auto_reqs import profiling
+
+    profiler = profiling.enable(trace=bool(args.trace))
+    try:
+        run(args)
+    finally:
+        profiling.disable()
+        if args.profile:
+            print("\n".join(profiler.summary()))
+        if args.trace:
+            profiler.write_trace(args.trace)
+            print(f"Trace written to {args.trace}")
 
 
 if __name__ == "__main__":
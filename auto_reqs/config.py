@@ -2,9 +2,36 @@ import json
 import os
 
 DEFAULT_CONFIG = {
-    "exclude": ["venv", ".venv", "env", "build", "dist", "__pycache__", ".git"],
+    # Directory names or gitignore-style glob patterns to skip while scanning.
+    "exclude": ["venv", ".venv", "env", "build", "dist", "__pycache__", ".git", "node_modules", ".tox"],
+    # Also skip anything matched by the project's .gitignore files.
+    "use_gitignore": True,
     "include": [],
-    "ignore_warnings": True
+    # Extra directories (relative to the repo) whose top-level modules are local.
+    "source_roots": [],
+    "ignore_warnings": True,
+    # Files larger than this many bytes are scanned as a stream, not read whole.
+    "max_file_size": 5 * 1024 * 1024,
+    # Maximum number of concurrent package index lookups.
+    "max_concurrency": 8,
+    # Package index responses are reused for this many seconds, then revalidated.
+    "metadata_ttl": 6 * 3600,
+    # Maximum number of package index responses kept in the shared cache.
+    "metadata_cache_size": 5000,
+    # Package index JSON API base URL, or file:///path for an offline mirror
+    # (a PEP 503/691 directory tree or a static JSON snapshot).
+    "index_url": None,
+    # Keep a SQLite index of where each import comes from (for `auto-reqs why`),
+    # refreshed incrementally on every scan.
+    "provenance": True,
+    # Python version ("X.Y") the project runs on; stdlib modules are then
+    # classified from that version's shipped table instead of this interpreter.
+    "target_python": None,
+    # Also look files up by a hash of their bytes in a cache shared through
+    # the user cache directory ($AUTO_REQS_CACHE_DIR), for fresh CI checkouts.
+    "content_cache": False,
+    # Size bound of that shared cache in bytes; least recently used entries go first.
+    "content_cache_size": 256 * 1024 * 1024,
 }
 
 def load_config(repo_path):
@@ -18,3 +45,9 @@ def load_config(repo_path):
         except Exception:
             pass
     return DEFAULT_CONFIG
+
+
+def override(config, **values):
+    """Return config with every non-None value (a command-line option) set over it."""
+    values = {key: value for key, value in values.items() if value is not None}
+    return {**config, **values} if values else config
@@ -0,0 +1,205 @@
+import contextlib
+import hashlib
+import json
+import os
+import sqlite3
+import time
+from auto_reqs import profiling
+from auto_reqs.cache import user_cache_dir
+
+CONTENT_CACHE_FILE = "content-cache.sqlite3"
+
+# Bump when the schema changes; a database with a different user_version
+# is dropped and rebuilt.
+SCHEMA_VERSION = 1
+
+# Default bound on the stored entries, in bytes (config "content_cache_size").
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+# Once over the bound, evict least recently used entries down to this fraction of it.
+EVICT_TO = 0.9
+
+# Per-entry bookkeeping counted on top of the digest and import list.
+ENTRY_OVERHEAD = 48
+
+_COUNTERS = ("hits", "misses", "stored", "evicted")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    digest TEXT NOT NULL,
+    version TEXT NOT NULL,
+    imports TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    used REAL NOT NULL,
+    PRIMARY KEY (digest, version)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS entries_by_use ON entries (used);
+CREATE TABLE IF NOT EXISTS counters (
+    name TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+"""
+
+
+def file_digest(path, chunk_size=1024 * 1024):
+    """BLAKE2b-128 hex digest of a file's bytes, read in chunks; raises OSError."""
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ContentCache:
+    """
+    Per-file import sets keyed by a hash of the file's bytes, for CI.
+
+    Unlike the mtime-keyed ImportCache, entries survive fresh checkouts and
+    can be shared by every checkout and CI worker pointed at the same
+    AUTO_REQS_CACHE_DIR. Entries are tagged with the extractor version.
+    The SQLite database runs in WAL mode, and lookups and stores are batched
+    into one transaction per flush, so concurrent writers only wait on each
+    other briefly. Counters are incremented in that same transaction, so
+    they add up across processes. When the entries exceed max_bytes, the
+    least recently used ones are evicted.
+    """
+
+    def __init__(self, db_path, version="", max_bytes=DEFAULT_MAX_BYTES):
+        self.path = db_path
+        self.version = version
+        self.max_bytes = max_bytes
+        self._pending = {}
+        self._used = set()
+        self._counts = dict.fromkeys(_COUNTERS, 0)
+        # Autocommit mode: transactions are opened explicitly by _transaction.
+        self.conn = sqlite3.connect(db_path, timeout=30, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        with self._transaction():
+            if self.conn.execute("PRAGMA user_version").fetchone()[0] != SCHEMA_VERSION:
+                self.conn.execute("DROP TABLE IF EXISTS entries")
+                self.conn.execute("DROP TABLE IF EXISTS counters")
+                self.conn.execute(f"PRAGMA user_version={SCHEMA_VERSION}")
+            for statement in _SCHEMA.split(";"):
+                if statement.strip():
+                    self.conn.execute(statement)
+
+    @classmethod
+    def open(cls, version="", max_bytes=None, cache_dir=None):
+        """Open (creating if needed) the shared cache in the user cache directory."""
+        path = os.path.join(cache_dir or user_cache_dir(), CONTENT_CACHE_FILE)
+        return cls(path, version, max_bytes or DEFAULT_MAX_BYTES)
+
+    def close(self):
+        self.flush()
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    @contextlib.contextmanager
+    def _transaction(self):
+        # IMMEDIATE takes the write lock up front, so two writers queue on
+        # the busy timeout instead of failing to upgrade a read lock.
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield
+        except BaseException:
+            self.conn.execute("ROLLBACK")
+            raise
+        self.conn.execute("COMMIT")
+
+    def get_many(self, digests):
+        """Return {digest: imports} for the digests that are cached."""
+        found = {}
+        wanted = list(dict.fromkeys(d for d in digests if d))
+        for i in range(0, len(wanted), 500):
+            batch = wanted[i:i + 500]
+            rows = self.conn.execute(
+                f"SELECT digest, imports FROM entries WHERE version = ? AND digest IN ({','.join('?' * len(batch))})",
+                [self.version, *batch],
+            )
+            for digest, imports in rows:
+                found[digest] = set(json.loads(imports))
+        self._used.update(found)
+        self._counts["hits"] += len(found)
+        self._counts["misses"] += len(wanted) - len(found)
+        profiling.count("content cache hits", len(found))
+        profiling.count("content cache misses", len(wanted) - len(found))
+        return found
+
+    def put(self, digest, imports):
+        """Queue the imports of the file with this digest; written by flush()."""
+        self._pending[digest] = sorted(imports)
+
+    def flush(self):
+        """Write queued entries, access times and counters, then evict if over the bound."""
+        if not (self._pending or self._used or any(self._counts.values())):
+            return
+        now = time.time()
+        rows = []
+        for digest, imports in self._pending.items():
+            text = json.dumps(imports, separators=(",", ":"))
+            rows.append((digest, self.version, text, len(digest) + len(text) + ENTRY_OVERHEAD, now))
+        self._counts["stored"] += len(rows)
+        with profiling.phase("content cache save"), self._transaction():
+            self.conn.executemany("INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?)", rows)
+            self.conn.executemany(
+                "UPDATE entries SET used = ? WHERE digest = ? AND version = ?",
+                [(now, digest, self.version) for digest in self._used],
+            )
+            self._count()
+            self._evict()
+        self._pending.clear()
+        self._used.clear()
+
+    def _count(self):
+        for name, value in self._counts.items():
+            if value:
+                self.conn.execute(
+                    "INSERT INTO counters VALUES (?, ?) ON CONFLICT(name) DO UPDATE SET value = value + excluded.value",
+                    (name, value),
+                )
+        self._counts = dict.fromkeys(_COUNTERS, 0)
+
+    def _evict(self):
+        total = self.conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        excess = total - int(self.max_bytes * EVICT_TO)
+        victims = []
+        for digest, version, size in self.conn.execute("SELECT digest, version, size FROM entries ORDER BY used"):
+            victims.append((digest, version))
+            excess -= size
+            if excess <= 0:
+                break
+        self.conn.executemany("DELETE FROM entries WHERE digest = ? AND version = ?", victims)
+        self._counts["evicted"] += len(victims)
+        self._count()
+
+    def stats(self):
+        """Return a summary of the cache contents and lifetime counters."""
+        entries, size = self.conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries").fetchone()
+        counters = dict.fromkeys(_COUNTERS, 0)
+        counters.update(self.conn.execute("SELECT name, value FROM counters"))
+        for name, value in self._counts.items():
+            counters[name] += value
+        return {
+            "path": self.path,
+            "entries": entries,
+            "bytes": size,
+            "max_bytes": self.max_bytes,
+            **counters,
+        }
+
+    def clear(self):
+        """Drop every entry and reset the counters."""
+        self._pending.clear()
+        self._used.clear()
+        self._counts = dict.fromkeys(_COUNTERS, 0)
+        with self._transaction():
+            self.conn.execute("DELETE FROM entries")
+            self.conn.execute("DELETE FROM counters")
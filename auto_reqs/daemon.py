@@ -0,0 +1,197 @@
+import argparse
+import contextlib
+import hashlib
+import importlib
+import io
+import json
+import os
+import socket
+import sys
+import time
+from auto_reqs.cache import user_cache_dir
+
+# One socket per Python environment, keyed by a hash of the interpreter.
+SOCKET_FILE = "daemon-{}.sock"
+# The daemon exits after this many seconds without a request.
+DEFAULT_IDLE_TIMEOUT = 15 * 60
+# Longest a client waits for one request to be answered.
+CLIENT_TIMEOUT = 300
+# Actions the daemon runs on behalf of the CLI.
+PROJECT_ACTIONS = ("scan", "update", "upgrade")
+# Options a client may leave out of a request's args.
+OPTION_DEFAULTS = {
+    "since": None, "staged": False, "python": None, "site_packages": None, "prune_transitive": False,
+    "target_python": None, "content_cache": None,
+}
+
+
+def default_socket_path():
+    """
+    Socket path in the per-user cache directory for the running interpreter.
+
+    A daemon classifies and resolves against its own environment, so a CLI
+    only ever talks to a daemon started from the same Python environment.
+    """
+    key = hashlib.blake2b(f"{sys.executable}\0{sys.prefix}".encode("utf-8"), digest_size=6).hexdigest()
+    return os.path.join(user_cache_dir(), SOCKET_FILE.format(key))
+
+
+def _send(sock, message):
+    sock.sendall(json.dumps(message).encode("utf-8") + b"\n")
+
+
+def _receive(sock):
+    with sock.makefile("rb") as f:
+        line = f.readline()
+    return json.loads(line) if line else None
+
+
+def request(message, socket_path=None, timeout=CLIENT_TIMEOUT):
+    """
+    Send one JSON message to a running daemon and return its reply.
+
+    Returns None when no daemon is listening (or it went away mid-request),
+    so callers can fall back to running in-process.
+    """
+    path = socket_path or default_socket_path()
+    if not hasattr(socket, "AF_UNIX") or not os.path.exists(path):
+        return None
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.settimeout(timeout)
+    try:
+        with sock:
+            sock.connect(path)
+            _send(sock, message)
+            return _receive(sock)
+    except (OSError, ValueError):
+        return None
+
+
+class Daemon:
+    """
+    Resident server answering scan/update requests over a Unix socket.
+
+    Requests are newline-terminated JSON objects: {"action": "update",
+    "args": {...CLI options, with an absolute "path"...}}, "ping" or
+    "shutdown". Project requests run exactly like the CLI would, with their
+    output captured and returned as {"ok": true, "output": ..., "exit_code":
+    ...}. Imported modules, classifier tables, each project's RunContext and
+    its in-memory import cache stay warm between requests; the environment
+    state is dropped whenever the site-packages fingerprint changes.
+    Requests are handled one at a time.
+    """
+
+    def __init__(self, socket_path=None, idle_timeout=DEFAULT_IDLE_TIMEOUT):
+        self.socket_path = socket_path or default_socket_path()
+        self.idle_timeout = idle_timeout
+        self.contexts = {}
+        self.import_caches = {}
+        self.fingerprint = None
+        self.requests = 0
+        self.started = time.time()
+        self.stopping = False
+
+    def refresh_environment(self):
+        """
+        Drop environment-derived state if installed distributions changed,
+        either in the daemon's own environment or in a context's target one.
+        """
+        from auto_reqs.classifier import get_classifier
+        from auto_reqs.resolver import site_packages_fingerprint
+
+        fingerprint = site_packages_fingerprint()
+        if fingerprint != self.fingerprint:
+            for ctx in self.contexts.values():
+                ctx.save()
+            self.contexts.clear()
+            importlib.invalidate_caches()
+            get_classifier().cache_clear()
+            self.fingerprint = fingerprint
+        for key, ctx in list(self.contexts.items()):
+            if ctx.environment is not None and ctx.environment_changed():
+                ctx.save()
+                del self.contexts[key]
+
+    def warm_up(self):
+        """Import the pipeline and build the stdlib tables before the first request."""
+        from auto_reqs import cli, pipeline  # noqa: F401
+        from auto_reqs.classifier import get_classifier
+
+        get_classifier().stdlib_names
+        self.refresh_environment()
+
+    def handle(self, message):
+        """Answer one request message."""
+        action = message.get("action")
+        if action == "ping":
+            return {
+                "ok": True,
+                "pid": os.getpid(),
+                "requests": self.requests,
+                "uptime": round(time.time() - self.started, 1),
+            }
+        if action == "shutdown":
+            self.stopping = True
+            return {"ok": True}
+        if action not in PROJECT_ACTIONS:
+            return {"ok": False, "error": f"Unknown action: {action}"}
+
+        from auto_reqs.cli import run_project
+
+        self.refresh_environment()
+        # Versions are only memoized within one request: later requests go
+        # back to the metadata cache and its TTL revalidation.
+        for ctx in self.contexts.values():
+            ctx.forget_versions()
+        args = argparse.Namespace(**{**OPTION_DEFAULTS, **message.get("args", {})})
+        args.action = action
+        output = io.StringIO()
+        exit_code = 0
+        with contextlib.redirect_stdout(output):
+            try:
+                run_project(args, contexts=self.contexts, import_caches=self.import_caches, show_progress=False)
+            except SystemExit as e:
+                exit_code = e.code if isinstance(e.code, int) else 1
+            except Exception as e:
+                return {"ok": False, "error": f"{type(e).__name__}: {e}", "output": output.getvalue()}
+        self.requests += 1
+        return {"ok": True, "output": output.getvalue(), "exit_code": exit_code}
+
+    def serve(self):
+        """Listen until shut down or idle for idle_timeout seconds."""
+        if request({"action": "ping"}, self.socket_path, timeout=5) is not None:
+            raise RuntimeError(f"A daemon is already listening on {self.socket_path}")
+        with contextlib.suppress(FileNotFoundError):
+            os.unlink(self.socket_path)
+
+        self.warm_up()
+        server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            # Create the socket owner-only; a chmod after bind would leave it
+            # briefly reachable with the default permissions.
+            umask = os.umask(0o177)
+            try:
+                server.bind(self.socket_path)
+            finally:
+                os.umask(umask)
+            server.listen()
+            server.settimeout(self.idle_timeout)
+            while not self.stopping:
+                try:
+                    conn, _ = server.accept()
+                except socket.timeout:
+                    break
+                with conn:
+                    conn.settimeout(CLIENT_TIMEOUT)
+                    try:
+                        message = _receive(conn)
+                        if message is not None:
+                            _send(conn, self.handle(message))
+                    except (OSError, ValueError):
+                        continue
+        finally:
+            server.close()
+            for ctx in self.contexts.values():
+                ctx.save()
+            with contextlib.suppress(FileNotFoundError):
+                os.unlink(self.socket_path)
@@ -0,0 +1,289 @@
+import os
+import platform
+import re
+import sys
+from auto_reqs import profiling
+from auto_reqs.utils import normalize_pkg_name
+
+# "name[extra,...]" at the start of a Requires-Dist value.
+_NAME = re.compile(r"\s*([A-Za-z0-9](?:[A-Za-z0-9._-]*[A-Za-z0-9])?)\s*(?:\[([^\]]*)\])?")
+_TOKEN = re.compile(
+    r"""\s*(?:(?P<string>'[^']*'|"[^"]*")|(?P<op>===|==|!=|<=|>=|~=|<|>|\(|\))|(?P<word>[A-Za-z_][A-Za-z0-9_.]*))"""
+)
+# Marker variables compared as versions rather than strings.
+_VERSION_VARIABLES = {"python_version", "python_full_version", "implementation_version"}
+
+
+def marker_environment():
+    """PEP 508 marker variables of the running interpreter."""
+    implementation = sys.implementation
+    return {
+        "os_name": os.name,
+        "sys_platform": sys.platform,
+        "platform_machine": platform.machine(),
+        "platform_python_implementation": platform.python_implementation(),
+        "platform_release": platform.release(),
+        "platform_system": platform.system(),
+        "platform_version": platform.version(),
+        "python_version": ".".join(platform.python_version_tuple()[:2]),
+        "python_full_version": platform.python_version(),
+        "implementation_name": implementation.name,
+        "implementation_version": ".".join(str(part) for part in implementation.version[:3]),
+    }
+
+
+def parse_requirement(text):
+    """(normalized name, extras, marker) of a Requires-Dist value, or None if it has no name."""
+    requirement, _, marker = text.partition(";")
+    match = _NAME.match(requirement)
+    if match is None:
+        return None
+    extras = tuple(normalize_pkg_name(e) for e in (match.group(2) or "").split(",") if e.strip())
+    return normalize_pkg_name(match.group(1)), extras, marker.strip()
+
+
+def _version(value):
+    parts = []
+    for piece in value.split("."):
+        digits = re.match(r"\d+", piece)
+        if digits is None:
+            break
+        parts.append(int(digits.group()))
+    return tuple(parts)
+
+
+def _compare(left, op, right, as_version):
+    if op == "in":
+        return left in right
+    if op == "not in":
+        return left not in right
+    if as_version:
+        left, right = _version(left), _version(right)
+        if op == "~=":
+            return left >= right and left[:len(right) - 1] == right[:-1]
+    elif op == "~=":
+        op = "=="
+    return {
+        "==": left == right, "===": left == right, "!=": left != right,
+        "<": left < right, "<=": left <= right, ">": left > right, ">=": left >= right,
+    }[op]
+
+
+def evaluate_marker(marker, environment, extra=""):
+    """
+    Evaluate a PEP 508 environment marker. Markers that cannot be parsed
+    count as true, so a dependency is never silently dropped.
+    """
+    if not marker:
+        return True
+    tokens = []
+    pos = 0
+    while pos < len(marker):
+        match = _TOKEN.match(marker, pos)
+        if match is None or match.end() == pos:
+            if marker[pos:].strip():
+                return True
+            break
+        tokens.append((match.lastgroup, match.group(match.lastgroup)))
+        pos = match.end()
+    variables = {**environment, "extra": extra}
+
+    def value(i):
+        kind, text = tokens[i]
+        if kind == "string":
+            return text[1:-1], False
+        if kind == "word" and text in variables:
+            return variables[text], text in _VERSION_VARIABLES
+        raise ValueError(text)
+
+    def atom(i):
+        if tokens[i] == ("op", "("):
+            result, i = disjunction(i + 1)
+            if tokens[i] != ("op", ")"):
+                raise ValueError(")")
+            return result, i + 1
+        left, left_version = value(i)
+        kind, op = tokens[i + 1]
+        step = 2
+        if (kind, op) == ("word", "not") and tokens[i + 2] == ("word", "in"):
+            op, step = "not in", 3
+        elif kind != "op" and op != "in":
+            raise ValueError(op)
+        right, right_version = value(i + step)
+        if tokens[i] == ("word", "extra") or tokens[i + step] == ("word", "extra"):
+            left, right = normalize_pkg_name(left), normalize_pkg_name(right)
+        return _compare(left, op, right, left_version or right_version), i + step + 1
+
+    def conjunction(i):
+        result, i = atom(i)
+        while i < len(tokens) and tokens[i] == ("word", "and"):
+            right, i = atom(i + 1)
+            result = result and right
+        return result, i
+
+    def disjunction(i):
+        result, i = conjunction(i)
+        while i < len(tokens) and tokens[i] == ("word", "or"):
+            right, i = conjunction(i + 1)
+            result = result or right
+        return result, i
+
+    try:
+        result, end = disjunction(0)
+    except (ValueError, IndexError, KeyError, TypeError):
+        return True
+    return result if end == len(tokens) else True
+
+
+def _closures(edges):
+    """
+    Bitset of every node reachable from each node, itself included.
+
+    Runs an iterative Tarjan pass: components complete in reverse
+    topological order, so each one ORs together the finished closures of
+    the components it points at, and every member shares the result.
+    """
+    count = len(edges)
+    index = [None] * count
+    low = [0] * count
+    on_stack = [False] * count
+    stack = []
+    reach = [0] * count
+    counter = 0
+    for root in range(count):
+        if index[root] is not None:
+            continue
+        work = [(root, 0)]
+        while work:
+            node, i = work.pop()
+            if i == 0:
+                index[node] = low[node] = counter
+                counter += 1
+                stack.append(node)
+                on_stack[node] = True
+            targets = edges[node]
+            descended = False
+            while i < len(targets):
+                target = targets[i]
+                i += 1
+                if index[target] is None:
+                    work.append((node, i))
+                    work.append((target, 0))
+                    descended = True
+                    break
+                if on_stack[target]:
+                    low[node] = min(low[node], index[target])
+            if descended:
+                continue
+            if low[node] == index[node]:
+                members = []
+                bits = 0
+                while True:
+                    member = stack.pop()
+                    on_stack[member] = False
+                    members.append(member)
+                    bits |= 1 << member
+                    if member == node:
+                        break
+                for member in members:
+                    for target in edges[member]:
+                        bits |= reach[target]
+                for member in members:
+                    reach[member] = bits
+            if work:
+                parent = work[-1][0]
+                low[parent] = min(low[parent], low[node])
+    return reach
+
+
+class DependencyGraph:
+    """
+    Requires-Dist graph of one environment snapshot, compacted for lookups.
+
+    Distributions are numbered and each one's transitive closure is kept as
+    a bitset (a Python int), computed once, so asking whether a requirement
+    is needed by any of a set of distributions costs one OR per root and a
+    bit test. Only requirements whose markers hold are edges; an extra's
+    requirements are included once any installed distribution asks for it.
+    """
+
+    def __init__(self, names, edges):
+        self.names = list(names)
+        self.nodes = {name: i for i, name in enumerate(self.names)}
+        self.edges = edges
+        self.reach = _closures(edges)
+
+    @classmethod
+    def from_snapshot(cls, snapshot, environment=None):
+        """Build the graph of an EnvironmentSnapshot, evaluating markers for environment."""
+        environment = marker_environment() if environment is None else environment
+        with profiling.phase("dependency graph"):
+            names = sorted(snapshot.distributions)
+            requires = {}
+            for name in names:
+                parsed = (parse_requirement(text) for text in snapshot.requires.get(name, ()))
+                requires[name] = [r for r in parsed if r is not None and r[0] in snapshot.distributions]
+
+            # Extras may request further extras, so activate them to a fixpoint.
+            active = {name: {""} for name in names}
+            applies = {}
+
+            def holds(marker, extra):
+                key = (marker, extra)
+                if key not in applies:
+                    applies[key] = evaluate_marker(marker, environment, extra)
+                return applies[key]
+
+            changed = True
+            while changed:
+                changed = False
+                for name in names:
+                    for dep, extras, marker in requires[name]:
+                        if extras and any(holds(marker, e) for e in active[name]):
+                            if not active[dep].issuperset(extras):
+                                active[dep].update(extras)
+                                changed = True
+
+            nodes = {name: i for i, name in enumerate(names)}
+            edges = []
+            for name in names:
+                targets = {
+                    nodes[dep]
+                    for dep, _, marker in requires[name]
+                    if dep != name and any(holds(marker, e) for e in active[name])
+                }
+                edges.append(sorted(targets))
+            return cls(names, edges)
+
+    def closure(self, names):
+        """Bitset of the given distributions and everything they need."""
+        bits = 0
+        for name in names:
+            node = self.nodes.get(normalize_pkg_name(name))
+            if node is not None:
+                bits |= self.reach[node]
+        return bits
+
+    def contains(self, bits, name):
+        """True if name is in a closure() bitset."""
+        node = self.nodes.get(normalize_pkg_name(name))
+        return node is not None and bool(bits >> node & 1)
+
+    def required_by(self, name, roots):
+        """The first of roots (alphabetically) that needs name, directly or not; None if none."""
+        node = self.nodes.get(normalize_pkg_name(name))
+        if node is None:
+            return None
+        for root in sorted(roots):
+            start = self.nodes.get(normalize_pkg_name(root))
+            if start is not None and start != node and self.reach[start] >> node & 1:
+                return root
+        return None
+
+    def dependencies(self, name):
+        """Every distribution name needs, directly or not, excluding itself."""
+        node = self.nodes.get(normalize_pkg_name(name))
+        if node is None:
+            return set()
+        bits = self.reach[node]
+        return {other for i, other in enumerate(self.names) if bits >> i & 1 and i != node}
@@ -0,0 +1,262 @@
+import hashlib
+import importlib.machinery
+import json
+import os
+import subprocess
+import sys
+from auto_reqs import profiling
+from auto_reqs.cache import write_json_atomic
+from auto_reqs.utils import normalize_pkg_name
+
+ENVIRONMENTS_DIR = "environments"
+METADATA_SUFFIXES = (".dist-info", ".egg-info")
+
+# Bump when what read_distribution reports changes.
+SNAPSHOT_VERSION = 2
+
+# Below this many changed dist-info directories they are read serially.
+PARALLEL_MIN_DISTS = 16
+
+_PRINT_SYS_PATH = "import json, sys; print(json.dumps(sys.path))"
+
+
+def python_site_packages(python):
+    """
+    Return the sys.path directories of another interpreter (e.g. a venv's
+    bin/python), asking it once; raises OSError if it cannot be run.
+    """
+    try:
+        result = subprocess.run([python, "-c", _PRINT_SYS_PATH], capture_output=True, timeout=60, check=False)
+    except (OSError, subprocess.SubprocessError) as e:
+        raise OSError(f"cannot run {python}: {e}") from e
+    if result.returncode != 0:
+        raise OSError(f"{python} failed: {result.stderr.decode('utf-8', errors='replace').strip()}")
+    return [p for p in json.loads(result.stdout) if p and os.path.isdir(p)]
+
+
+def environment_paths(python=None, site_packages=None):
+    """
+    Directories of the target environment, or None for the running interpreter;
+    raises OSError if a site-packages directory does not exist.
+    """
+    if site_packages:
+        for d in site_packages:
+            if not os.path.isdir(d):
+                raise OSError(f"site-packages directory does not exist: {d}")
+        return [os.path.abspath(d) for d in site_packages]
+    if python:
+        return python_site_packages(python)
+    return None
+
+
+def _module_name(filename):
+    for suffix in sorted(importlib.machinery.all_suffixes(), key=len, reverse=True):
+        if filename.endswith(suffix):
+            return filename[:-len(suffix)]
+    return None
+
+
+def _read_text(path):
+    try:
+        with open(path, "r", encoding="utf-8", errors="replace") as f:
+            return f.read()
+    except OSError:
+        return None
+
+
+def _headers(text):
+    """Name, Version and Requires-Dist from the RFC 822 header block of METADATA/PKG-INFO."""
+    name = version = None
+    requires = []
+    for line in text.splitlines():
+        if not line.strip():
+            break
+        key, _, value = line.partition(":")
+        if key == "Name" and name is None:
+            name = value.strip()
+        elif key == "Version" and version is None:
+            version = value.strip()
+        elif key == "Requires-Dist":
+            requires.append(value.strip())
+    return name, version, requires
+
+
+def _egg_requires(text):
+    """requires.txt of an *.egg-info as Requires-Dist strings ([extra:marker] sections become markers)."""
+    requires = []
+    marker = ""
+    for line in text.splitlines():
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        if line.startswith("[") and line.endswith("]"):
+            extra, _, condition = line[1:-1].partition(":")
+            parts = [f"({condition})"] if condition else []
+            if extra:
+                parts.append(f'extra == "{extra}"')
+            marker = " and ".join(parts)
+            continue
+        requires.append(f"{line} ; {marker}" if marker else line)
+    return requires
+
+
+def read_distribution(path):
+    """
+    Read one *.dist-info / *.egg-info entry without importlib.metadata.
+
+    Returns [name, version, top_level_names, requires] or None if it has no
+    name. Top-level names come from top_level.txt, else are inferred from
+    RECORD the way importlib.metadata.packages_distributions does; requires
+    lists the raw Requires-Dist strings.
+    """
+    if os.path.isdir(path):
+        metadata = _read_text(os.path.join(path, "METADATA")) or _read_text(os.path.join(path, "PKG-INFO"))
+    else:
+        metadata = _read_text(path)
+    if not metadata:
+        return None
+    name, version, requires = _headers(metadata)
+    if not name:
+        return None
+    if not requires and os.path.isdir(path) and path.endswith(".egg-info"):
+        requires = _egg_requires(_read_text(os.path.join(path, "requires.txt")) or "")
+
+    top_level = []
+    declared = _read_text(os.path.join(path, "top_level.txt")) if os.path.isdir(path) else None
+    if declared:
+        candidates = declared.split()
+    else:
+        record = _read_text(os.path.join(path, "RECORD")) or ""
+        candidates = []
+        for line in record.splitlines():
+            parts = line.split(",", 1)[0].split("/")
+            module = _module_name(parts[-1])
+            if module and "__pycache__" not in parts:
+                candidates.append(parts[0] if len(parts) > 1 else module)
+    for candidate in candidates:
+        if candidate and "." not in candidate and candidate not in top_level:
+            top_level.append(candidate)
+    return [normalize_pkg_name(name), version, top_level, requires]
+
+
+def _listing(paths):
+    """[(entry path, mtime_ns)] of every metadata entry on paths, in path order."""
+    entries = []
+    for path in paths:
+        try:
+            found = sorted(
+                (entry.path, entry.stat().st_mtime_ns)
+                for entry in os.scandir(path)
+                if entry.name.endswith(METADATA_SUFFIXES)
+            )
+        except OSError:
+            continue
+        entries.extend(found)
+    return entries
+
+
+def _fingerprint(entries):
+    digest = hashlib.sha1()
+    for path, mtime in entries:
+        digest.update(f"{path}:{mtime};".encode("utf-8", "surrogateescape"))
+    return digest.hexdigest()
+
+
+class EnvironmentSnapshot:
+    """
+    Installed distributions of one environment: {name: version} and the
+    top-level import names each distribution provides, plus each
+    distribution's raw Requires-Dist strings (see depgraph).
+
+    Built from the *.dist-info / *.egg-info entries of a list of directories
+    (the target interpreter's sys.path), with the first entry for a name
+    winning as it does at import time. fingerprint covers the directory
+    listing and every entry's mtime.
+    """
+
+    def __init__(self, paths, distributions, top_level, fingerprint, requires=None):
+        self.paths = list(paths)
+        self.distributions = distributions
+        self.top_level = top_level
+        self.fingerprint = fingerprint
+        self.requires = requires or {}
+
+    @classmethod
+    def from_entries(cls, paths, entries, records):
+        distributions = {}
+        top_level = {}
+        requires = {}
+        for path, _ in entries:
+            record = records.get(path)
+            if not record or record[0] in distributions:
+                continue
+            name, version, modules, requires[name] = record
+            distributions[name] = version
+            for module in modules:
+                providers = top_level.setdefault(module, [])
+                if name not in providers:
+                    providers.append(name)
+        return cls(paths, distributions, top_level, _fingerprint(entries), requires)
+
+    def is_current(self):
+        """True if nothing was installed, upgraded or removed since the snapshot."""
+        return _fingerprint(_listing(self.paths)) == self.fingerprint
+
+
+def _snapshot_cache_path(cache_dir, paths):
+    key = hashlib.sha1("\0".join(paths).encode("utf-8", "surrogateescape")).hexdigest()[:16]
+    return os.path.join(cache_dir, ENVIRONMENTS_DIR, f"{key}.json")
+
+
+def load_environment(paths=None, cache_dir=None, max_workers=8):
+    """
+    Return the EnvironmentSnapshot of paths (default: this interpreter's sys.path).
+
+    With a cache_dir, each entry's parsed record is stored next to its mtime,
+    so only entries that appeared or changed since the last call are read;
+    those are read on a thread pool when there are many of them.
+    """
+    # An empty sys.path entry stands for the current directory.
+    paths = [p or os.getcwd() for p in (paths if paths is not None else sys.path)]
+    paths = [p for p in paths if os.path.isdir(p)]
+    with profiling.phase("environment snapshot"):
+        entries = _listing(paths)
+        cache_path = _snapshot_cache_path(cache_dir, paths) if cache_dir else None
+        cached = {}
+        if cache_path:
+            try:
+                with open(cache_path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+                if data.get("version") == SNAPSHOT_VERSION:
+                    cached = data.get("entries", {})
+            except (OSError, ValueError, AttributeError):
+                pass
+
+        records = {}
+        stale = []
+        for path, mtime in entries:
+            entry = cached.get(path)
+            if entry and entry[0] == mtime:
+                records[path] = entry[1]
+            else:
+                stale.append(path)
+        profiling.count("dist-info read", len(stale))
+        if len(stale) >= PARALLEL_MIN_DISTS and max_workers > 1:
+            from concurrent.futures import ThreadPoolExecutor
+
+            with ThreadPoolExecutor(max_workers=max_workers) as pool:
+                records.update(zip(stale, pool.map(read_distribution, stale)))
+        else:
+            records.update((path, read_distribution(path)) for path in stale)
+
+        if cache_path and (stale or len(cached) != len(entries)):
+            try:
+                os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+                write_json_atomic(cache_path, {
+                    "version": SNAPSHOT_VERSION,
+                    "paths": paths,
+                    "entries": {path: [mtime, records[path]] for path, mtime in entries},
+                })
+            except OSError:
+                pass
+        return EnvironmentSnapshot.from_entries(paths, entries, records)
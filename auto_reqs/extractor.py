@@ -0,0 +1,247 @@
+import ast
+import codecs
+import re
+import tokenize
+
+# Lexical scan used to find import statements without parsing the whole file.
+# String openers and comments are matched so their contents can be skipped;
+# "import" and "from" are keywords, so any other whole-word match outside a
+# string or comment is the start of a statement (or part of one).
+_LEXER = re.compile(
+    rb"""
+    (?P<string>\"\"\"|'''|"|')
+  | (?P<comment>\#[^\r\n]*)
+  | (?P<keyword>\b(?:import|from)\b)
+    """,
+    re.VERBOSE,
+)
+
+# Positions where an import statement could begin. Anything after the last
+# such position cannot contain an import, so lexing stops there.
+_CANDIDATE = re.compile(rb"(?:^|[;:])[ \t\f]*(?:import|from)\b", re.M)
+
+# Remainder of a string literal after its opening quote (unrolled loops, so
+# long literals are consumed without backtracking).
+_STRING_TAIL = {
+    b'"""': re.compile(rb'[^"\\]*(?:(?:\\.|"(?!""))[^"\\]*)*"""', re.S),
+    b"'''": re.compile(rb"[^'\\]*(?:(?:\\.|'(?!''))[^'\\]*)*'''", re.S),
+    b'"': re.compile(rb'[^"\\\r\n]*(?:\\.[^"\\\r\n]*)*"', re.S),
+    b"'": re.compile(rb"[^'\\\r\n]*(?:\\.[^'\\\r\n]*)*'", re.S),
+}
+
+# Longest import statement (in physical lines) the fast scanner will follow.
+MAX_STATEMENT_LINES = 1000
+
+
+class UnsupportedSource(Exception):
+    """Raised when the fast scanner cannot follow a file's lexical structure."""
+
+
+def _imported_modules(tree):
+    """Yield (node, dotted module name) for every Import/ImportFrom in tree."""
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            for alias in node.names:
+                yield node, alias.name
+        elif isinstance(node, ast.ImportFrom) and node.module:
+            yield node, node.module
+
+
+def _top_level_names(tree, imports):
+    """Add the top-level names of every Import/ImportFrom in tree to imports."""
+    for _, module in _imported_modules(tree):
+        imports.add(module.split(".")[0])
+
+
+def extract_imports_ast(source, filename="<unknown>"):
+    """Extract import names by parsing the full source into an AST."""
+    try:
+        tree = ast.parse(source, filename=filename)
+    except SyntaxError:
+        return set()
+    imports = set()
+    _top_level_names(tree, imports)
+    return imports
+
+
+def _parse_statement(text, imports):
+    """Parse one import statement on its own; ignore it if it is not valid."""
+    try:
+        tree = ast.parse(text.decode("utf-8", errors="ignore").strip())
+    except SyntaxError:
+        return
+    _top_level_names(tree, imports)
+
+
+def _parse_statement_records(text, line, records):
+    """Like _parse_statement, appending (line, dotted module) to records."""
+    try:
+        tree = ast.parse(text.decode("utf-8", errors="ignore").strip())
+    except SyntaxError:
+        return
+    records.extend((line, module) for _, module in _imported_modules(tree))
+
+
+def _strip_bom(data):
+    """Drop a leading UTF-8 BOM, which would hide a first-line import."""
+    return data[len(codecs.BOM_UTF8):] if data.startswith(codecs.BOM_UTF8) else data
+
+
+def _at_statement_start(data, pos):
+    """True if only indentation separates pos from a statement boundary."""
+    i = pos - 1
+    while i >= 0 and data[i] in b" \t\f":
+        i -= 1
+    return i < 0 or data[i] in b"\r\n;:"
+
+
+def _statement_end(data, pos):
+    """
+    Return the offset where the import statement starting at pos ends.
+
+    Import statements contain no string literals, so "#" always starts a
+    comment and only parentheses and backslashes can continue a line.
+    """
+    depth = 0
+    for _ in range(MAX_STATEMENT_LINES):
+        eol = data.find(b"\n", pos)
+        if eol < 0:
+            eol = len(data)
+        line = data[pos:eol]
+        comment = line.find(b"#")
+        if comment >= 0:
+            line = line[:comment]
+        for offset, char in enumerate(line):
+            if char == 0x28:  # "("
+                depth += 1
+            elif char == 0x29:  # ")"
+                depth -= 1
+            elif char == 0x3B and depth <= 0:  # ";"
+                return pos + offset
+        if eol >= len(data) or (depth <= 0 and not line.rstrip().endswith(b"\\")):
+            return eol
+        pos = eol + 1
+    raise UnsupportedSource("import statement too long")
+
+
+def _iter_statements(data):
+    """
+    Yield (start, end) offsets of every import statement in source bytes.
+
+    Raises UnsupportedSource when the lexical scan loses track of the file.
+    """
+    if b"import" not in data:
+        return
+    limit = -1
+    for candidate in _CANDIDATE.finditer(data):
+        limit = candidate.end()
+    if limit < 0:
+        return
+
+    pos = 0
+    search = _LEXER.search
+    while True:
+        match = search(data, pos, limit)
+        if match is None:
+            return
+        kind = match.lastgroup
+        if kind == "string":
+            tail = _STRING_TAIL[match.group()].match(data, match.end())
+            if tail is None:
+                raise UnsupportedSource("unterminated string literal")
+            pos = tail.end()
+        elif kind == "keyword" and _at_statement_start(data, match.start()):
+            pos = _statement_end(data, match.start())
+            yield match.start(), pos
+        else:
+            pos = match.end()
+
+
+def extract_imports_fast(data):
+    """
+    Extract import names from raw source bytes without building a full AST.
+
+    Gives the same result as extract_imports_ast for any file that parses.
+    Each statement is parsed on its own, so a file with a syntax error
+    elsewhere still reports its valid import statements, like the streaming
+    path does, where extract_imports_ast reports nothing. Raises
+    UnsupportedSource when the lexical scan loses track of the file (e.g. an
+    unterminated string) so the caller can fall back to the AST.
+    """
+    data = _strip_bom(data)
+    imports = set()
+    for start, end in _iter_statements(data):
+        _parse_statement(data[start:end], imports)
+    return imports
+
+
+def extract_import_records(data):
+    """
+    Return [(line, module)] for every import in raw source bytes.
+
+    module is the full dotted name and line the 1-based line its statement
+    starts on. Uses the fast scanner, falling back to a full AST parse.
+    """
+    data = _strip_bom(data)
+    records = []
+    try:
+        line, last = 1, 0
+        for start, end in _iter_statements(data):
+            line += data.count(b"\n", last, start)
+            last = start
+            _parse_statement_records(data[start:end], line, records)
+        return records
+    except UnsupportedSource:
+        pass
+    try:
+        tree = ast.parse(data.decode("utf-8", errors="ignore"))
+    except SyntaxError:
+        return []
+    return sorted((node.lineno, module) for node, module in _imported_modules(tree))
+
+
+def extract_imports_streaming(readline, records=None):
+    """
+    Extract import names from a byte-line reader using the tokenizer.
+
+    Memory use is bounded by the longest line rather than the file size, so
+    this is used for files above the configured size ceiling. Tokenizer errors
+    end the scan and return whatever was found up to that point. If a records
+    list is given, (line, dotted module) pairs are appended to it as well.
+    """
+    imports = set()
+    statement = None
+    line = 0
+    depth = 0
+    at_start = True
+    try:
+        for tok in tokenize.tokenize(readline):
+            ttype, string = tok.type, tok.string
+            if ttype == tokenize.OP:
+                if string in "([{":
+                    depth += 1
+                elif string in ")]}":
+                    depth -= 1
+            if statement is not None:
+                if ttype in (tokenize.NEWLINE, tokenize.ENDMARKER) or (ttype == tokenize.OP and string == ";"):
+                    text = " ".join(statement).encode("utf-8")
+                    _parse_statement(text, imports)
+                    if records is not None:
+                        _parse_statement_records(text, line, records)
+                    statement = None
+                elif ttype not in (tokenize.NL, tokenize.COMMENT):
+                    statement.append(string)
+                    continue
+            if ttype in (tokenize.NL, tokenize.COMMENT):
+                continue
+            if at_start and ttype == tokenize.NAME and string in ("import", "from"):
+                statement = [string]
+                line = tok.start[0]
+                at_start = False
+                continue
+            at_start = ttype in (
+                tokenize.ENCODING, tokenize.NEWLINE, tokenize.INDENT, tokenize.DEDENT
+            ) or (ttype == tokenize.OP and (string == ";" or (string == ":" and depth == 0)))
+    except (tokenize.TokenError, SyntaxError):
+        pass
+    return imports
@@ -0,0 +1,93 @@
+import os
+import subprocess
+from collections import namedtuple
+
+# .py files touched since a ref or staged for commit, as absolute paths.
+# contents maps a changed path to the bytes to scan when they do not come
+# from the working tree (the staged blob), and is empty otherwise.
+GitChanges = namedtuple("GitChanges", ["changed", "deleted", "contents"])
+
+PYTHON_PATHSPEC = "*.py"
+
+
+class GitError(Exception):
+    """A git command failed (not a work tree, unknown ref, git missing...)."""
+
+
+def _git(repo_path, *args, input=None):
+    try:
+        result = subprocess.run(
+            ["git", "-C", repo_path, *args], input=input, capture_output=True, check=False
+        )
+    except OSError as e:
+        raise GitError(f"cannot run git: {e}") from e
+    if result.returncode != 0:
+        message = result.stderr.decode("utf-8", errors="replace").strip()
+        raise GitError(message or f"git {args[0]} failed")
+    return result.stdout
+
+
+def _split(output):
+    return [item.decode("utf-8", errors="surrogateescape") for item in output.split(b"\0") if item]
+
+
+def _name_status(output):
+    """Parse `git diff --name-status -z` output into (changed, deleted) relative paths."""
+    changed, deleted = [], []
+    items = _split(output)
+    for status, path in zip(items[::2], items[1::2]):
+        (deleted if status == "D" else changed).append(path)
+    return changed, deleted
+
+
+def read_staged(repo_path, paths):
+    """Return {path: bytes} of the index versions of paths (relative to repo_path)."""
+    if not paths:
+        return {}
+    request = "".join(f":./{path}\n" for path in paths).encode("utf-8", errors="surrogateescape")
+    output = _git(repo_path, "cat-file", "--batch", input=request)
+    contents = {}
+    pos = 0
+    for path in paths:
+        end = output.index(b"\n", pos)
+        header = output[pos:end].split()
+        pos = end + 1
+        if len(header) != 3:
+            # "<object> missing": nothing staged under that name.
+            continue
+        size = int(header[2])
+        contents[path] = output[pos:pos + size]
+        pos += size + 1
+    return contents
+
+
+def changed_python_files(repo_path, since=None, staged=False):
+    """
+    Return the GitChanges of .py files under repo_path.
+
+    staged compares the index with HEAD and takes file contents from the
+    index, i.e. exactly what the next commit will contain. since compares
+    the working tree with a ref and also counts untracked (not ignored)
+    files as changed. Paths are limited to repo_path even when it is a
+    subdirectory of the work tree.
+    """
+    repo_path = os.path.abspath(repo_path)
+    diff = ["diff", "--name-status", "-z", "--no-renames", "--relative"]
+    if staged:
+        changed, deleted = _name_status(_git(repo_path, *diff, "--cached", "--", PYTHON_PATHSPEC))
+        contents = read_staged(repo_path, changed)
+    else:
+        _git(repo_path, "rev-parse", "--verify", "--quiet", f"{since}^{{commit}}")
+        changed, deleted = _name_status(_git(repo_path, *diff, since, "--", PYTHON_PATHSPEC))
+        untracked = _git(repo_path, "ls-files", "--others", "--exclude-standard", "-z", "--", PYTHON_PATHSPEC)
+        changed += _split(untracked)
+        contents = {}
+
+    def absolute(path):
+        return os.path.join(repo_path, os.path.normpath(path))
+
+    return GitChanges(
+        [absolute(p) for p in changed],
+        [absolute(p) for p in deleted],
+        {absolute(p): data for p, data in contents.items()},
+    )
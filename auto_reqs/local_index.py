@@ -0,0 +1,198 @@
+import json
+import os
+import re
+from functools import lru_cache
+from html.parser import HTMLParser
+from urllib.parse import unquote, urlparse
+
+DIST_EXTENSIONS = (".whl", ".tar.gz", ".tar.bz2", ".zip", ".tgz")
+
+_VERSION_RE = re.compile(
+    r"""
+    ^v?(?P<release>\d+(?:\.\d+)*)
+    (?:[._-]?(?P<pre>a|b|c|rc|alpha|beta|pre|preview)[._-]?(?P<pre_n>\d*))?
+    (?:[._-]?(?:post|rev|r)[._-]?(?P<post>\d*))?
+    (?:[._-]?dev[._-]?(?P<dev>\d*))?
+    (?:\+.*)?$
+    """,
+    re.VERBOSE | re.IGNORECASE,
+)
+_PRE_RANK = {"a": 0, "alpha": 0, "b": 1, "beta": 1, "c": 2, "rc": 2, "pre": 2, "preview": 2}
+
+
+def canonical_name(name):
+    """Normalize a project name the way PEP 503 directory names are."""
+    return re.sub(r"[-_.]+", "-", name).lower()
+
+
+def version_key(version):
+    """
+    Sort key approximating PEP 440 ordering for the versions found on an index.
+
+    Unparseable versions sort before every valid one.
+    """
+    match = _VERSION_RE.match(version.strip())
+    if not match:
+        return (0, (), (0, 0, 0), 0, 0)
+    release = tuple(int(p) for p in match.group("release").split("."))
+    while len(release) > 1 and release[-1] == 0:
+        release = release[:-1]
+    pre, dev = match.group("pre"), match.group("dev")
+    # Ordering within a release: dev < pre < final < post.
+    if pre:
+        phase = (1, _PRE_RANK[pre.lower()], int(match.group("pre_n") or 0))
+    elif dev is not None and match.group("post") is None:
+        phase = (0, 0, 0)
+    else:
+        phase = (2, 0, 0)
+    post = match.group("post")
+    return (
+        1,
+        release,
+        phase,
+        -1 if post is None else int(post or 0),
+        float("inf") if dev is None else int(dev or 0),
+    )
+
+
+def is_prerelease(version):
+    """True for alpha/beta/rc and dev versions."""
+    match = _VERSION_RE.match(version.strip())
+    return bool(match and (match.group("pre") or match.group("dev") is not None))
+
+
+def latest_version(versions):
+    """Return the newest final release, or the newest version if all are pre-releases."""
+    versions = [v for v in versions if v]
+    if not versions:
+        return None
+    final = [v for v in versions if not is_prerelease(v)]
+    return max(final or versions, key=version_key)
+
+
+def version_from_filename(filename, project):
+    """Extract the version from a wheel or sdist filename of project, if it is one."""
+    if not filename.endswith(DIST_EXTENSIONS):
+        return None
+    if filename.endswith(".whl"):
+        parts = filename[: -len(".whl")].split("-")
+        if len(parts) >= 5 and canonical_name(parts[0]) == project:
+            return parts[1]
+        return None
+    stem = filename
+    for ext in DIST_EXTENSIONS:
+        if stem.endswith(ext):
+            stem = stem[: -len(ext)]
+            break
+    name, sep, version = stem.rpartition("-")
+    if sep and canonical_name(name) == project:
+        return version
+    return None
+
+
+class _LinkParser(HTMLParser):
+    """Collect anchor texts/hrefs from a PEP 503 project page."""
+
+    def __init__(self):
+        super().__init__()
+        self.filenames = []
+
+    def handle_starttag(self, tag, attrs):
+        if tag != "a":
+            return
+        attrs = dict(attrs)
+        if "data-yanked" in attrs:
+            return
+        href = attrs.get("href") or ""
+        self.filenames.append(unquote(os.path.basename(urlparse(href).path)))
+
+
+class LocalIndex:
+    """
+    Package index answered entirely from local files; never opens a socket.
+
+    root may be a JSON snapshot file mapping project names to their latest
+    version (a string), their versions (a list) or an object with "version"
+    or "versions", or a PEP 503/691 directory tree with one sub-directory per
+    normalized project name holding an index.json, an index.html, or the
+    distribution files themselves.
+    """
+
+    def __init__(self, root):
+        self.root = root
+        self.snapshot = None
+        if os.path.isfile(root):
+            with open(root, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            data = data.get("packages", data) if isinstance(data, dict) else {}
+            self.snapshot = {canonical_name(k): v for k, v in data.items()}
+
+    @classmethod
+    def from_url(cls, url):
+        """Open the index behind a file:// URL."""
+        return cls(unquote(urlparse(url).path))
+
+    def versions(self, name):
+        """Return every version listed for name (empty if the project is unknown)."""
+        project = canonical_name(name)
+        if self.snapshot is not None:
+            entry = self.snapshot.get(project)
+            if isinstance(entry, dict):
+                entry = entry.get("versions") or [entry.get("version")]
+            if isinstance(entry, str):
+                entry = [entry]
+            return [v for v in (entry or []) if v]
+
+        project_dir = os.path.join(self.root, project)
+        if not os.path.isdir(project_dir):
+            return []
+        json_page = os.path.join(project_dir, "index.json")
+        html_page = os.path.join(project_dir, "index.html")
+        if os.path.isfile(json_page):
+            with open(json_page, "r", encoding="utf-8") as f:
+                page = json.load(f)
+            if page.get("versions"):
+                return list(page["versions"])
+            filenames = [f["filename"] for f in page.get("files", []) if not f.get("yanked")]
+        elif os.path.isfile(html_page):
+            parser = _LinkParser()
+            with open(html_page, "r", encoding="utf-8") as f:
+                parser.feed(f.read())
+            filenames = parser.filenames
+        else:
+            filenames = os.listdir(project_dir)
+        versions = (version_from_filename(f, project) for f in filenames)
+        return sorted({v for v in versions if v}, key=version_key)
+
+    def project_info(self, name):
+        """Return {"exists": bool, "version": str | None} like the JSON API lookup."""
+        versions = self.versions(name)
+        return {"exists": bool(versions), "version": latest_version(versions)}
+
+
+def is_local_index_url(url):
+    """True if url points at a file-based index."""
+    return bool(url) and url.startswith("file://")
+
+
+@lru_cache(maxsize=8)
+def _load_local_index(url, stamp):
+    return LocalIndex.from_url(url)
+
+
+def open_local_index(url):
+    """
+    Return the (shared) LocalIndex for a file:// URL.
+
+    It is reopened whenever the file or directory behind url changes, so a
+    long-running process (the daemon) sees an updated mirror.
+    """
+    try:
+        st = os.stat(unquote(urlparse(url).path))
+        stamp = (st.st_mtime_ns, st.st_size)
+    except OSError:
+        stamp = None
+    return _load_local_index(url, stamp)
+
+
+open_local_index.cache_clear = _load_local_index.cache_clear
@@ -0,0 +1,595 @@
+import os
+import threading
+from collections import namedtuple
+from functools import partial
+from auto_reqs import profiling
+from auto_reqs.cache import (
+    IMPORT_CACHE_FILE,
+    METADATA_CACHE_FILE,
+    ImportCache,
+    MetadataCache,
+    get_cache_dir,
+    user_cache_dir,
+    write_json_atomic,
+)
+from auto_reqs.classifier import LOCAL, STDLIB, classify_many
+from auto_reqs.config import load_config, override
+from auto_reqs.resolver import (
+    PYPI_JSON_URL,
+    ResolverIndex,
+    create_session,
+    get_installed_distributions,
+    get_latest_version_from_pypi,
+    resolve_many,
+)
+from auto_reqs.scanner import (
+    EXTRACTOR_VERSION,
+    ScanResult,
+    collect_local_modules,
+    extract_imports_from_file,
+    extract_imports_from_source,
+    scan_project,
+)
+from auto_reqs.requirements import RequirementsFile
+from auto_reqs.updater import determine_changes
+from auto_reqs.utils import normalize_pkg_name
+from auto_reqs.walker import ProjectFiles, marker_dirs
+
+REQUIREMENTS_FILE = "requirements.txt"
+CONFIG_FILE = ".auto-reqs.json"
+# Files whose presence makes a directory a project in monorepo mode.
+MONOREPO_MARKERS = (REQUIREMENTS_FILE, "pyproject.toml", CONFIG_FILE)
+SUMMARY_FILE = "auto-reqs-summary.json"
+
+# transitive maps requirements kept (or, with prune_transitive, removed)
+# only because an imported distribution needs them to the one that does.
+ProjectResult = namedtuple("ProjectResult", ["repo_path", "req_path", "missing", "unused", "transitive"])
+# Outcome of scan_git_changes: the merged ScanResult and the third-party
+# names the changed files added to or removed from the whole project.
+IncrementalScan = namedtuple("IncrementalScan", ["scan", "delta"])
+
+
+def load_metadata_cache(config):
+    """Open the shared package-index response cache with the project's limits."""
+    return MetadataCache.load(
+        os.path.join(user_cache_dir(), METADATA_CACHE_FILE),
+        ttl=config["metadata_ttl"],
+        max_entries=config["metadata_cache_size"],
+    )
+
+
+class RunContext:
+    """
+    State shared by every project processed in one run.
+
+    The installed-distribution snapshot and the ResolverIndex are built on
+    first use, package index responses go through one pooled session and
+    metadata cache, and every version lookup is memoized, so processing
+    many projects costs one environment crawl and one lookup per package.
+    environment lists the site-packages directories of a target environment
+    (see environment_paths); by default the running interpreter's is used.
+    The environment is read through a cached EnvironmentSnapshot unless
+    caching is off and no target is given.
+    """
+
+    def __init__(self, config, use_cache=True, index_url=None, environment=None):
+        self.config = config
+        self.environment = environment
+        self.use_cache = use_cache
+        self.index_url = (index_url or config.get("index_url") or PYPI_JSON_URL).rstrip("/")
+        self.max_workers = config.get("max_concurrency") or 1
+        self.metadata = load_metadata_cache(config) if use_cache else None
+        self._session = None
+        self._installed = None
+        self._index = None
+        self._snapshot = None
+        self._graph = None
+        self._versions = {}
+        self._lock = threading.Lock()
+
+    @property
+    def session(self):
+        """Pooled HTTP session, created (and requests imported) on first use."""
+        with self._lock:
+            if self._session is None:
+                self._session = create_session(self.max_workers)
+            return self._session
+
+    def _uses_snapshot(self):
+        return self.environment is not None or self.use_cache
+
+    def _environment_snapshot(self):
+        # Called with the lock held.
+        if self._snapshot is None:
+            from auto_reqs.environment import load_environment
+
+            self._snapshot = load_environment(
+                self.environment, user_cache_dir() if self.use_cache else None, self.max_workers
+            )
+        return self._snapshot
+
+    @property
+    def installed(self):
+        """Installed distributions as {package_name: version}, read once."""
+        with self._lock:
+            if self._installed is None:
+                if self._uses_snapshot():
+                    self._installed = self._environment_snapshot().distributions
+                else:
+                    self._installed = get_installed_distributions()
+            return self._installed
+
+    @property
+    def index(self):
+        """The import-to-distribution ResolverIndex, loaded or built once."""
+        with self._lock:
+            if self._index is None:
+                if self._uses_snapshot():
+                    snapshot = self._environment_snapshot()
+                    self._index = ResolverIndex(snapshot.top_level, snapshot.fingerprint)
+                else:
+                    self._index = ResolverIndex.from_metadata()
+            return self._index
+
+    @property
+    def graph(self):
+        """The environment's DependencyGraph, built once per snapshot."""
+        with self._lock:
+            if self._graph is None:
+                from auto_reqs.depgraph import DependencyGraph
+
+                self._graph = DependencyGraph.from_snapshot(self._environment_snapshot())
+            return self._graph
+
+    def environment_changed(self):
+        """True if the environment snapshot in use no longer matches what is installed."""
+        with self._lock:
+            return self._snapshot is not None and not self._snapshot.is_current()
+
+    def fetch_version(self, package_name, index_url=None):
+        """
+        Latest version of package_name on the index, memoized for the run.
+
+        index_url overrides the context's index for this lookup (a project's
+        own index in a monorepo). Failed lookups (None) are not memoized, so
+        a transient index error is retried next time.
+        """
+        index_url = index_url.rstrip("/") if index_url else self.index_url
+        key = (index_url, package_name)
+        with self._lock:
+            if key in self._versions:
+                return self._versions[key]
+        from auto_reqs.local_index import is_local_index_url
+
+        session = None if is_local_index_url(index_url) else self.session
+        version = get_latest_version_from_pypi(
+            package_name, session=session, index_url=index_url, cache=self.metadata
+        )
+        if version is not None:
+            with self._lock:
+                self._versions[key] = version
+        return version
+
+    def forget_versions(self):
+        """Drop memoized versions, so the next lookups go back to the metadata cache."""
+        with self._lock:
+            self._versions.clear()
+
+    def prefetch(self, names, index_url=None):
+        """Resolve many import names in one concurrent batch to warm the memo."""
+        if names:
+            resolve_many(
+                sorted(names), self.installed, partial(self.fetch_version, index_url=index_url),
+                index=self.index, max_workers=self.max_workers,
+            )
+
+    def save(self):
+        """Persist shared caches."""
+        if self.metadata is not None:
+            self.metadata.save()
+
+
+def project_files(repo_path, config, extra_exclude=()):
+    """Build the ProjectFiles listing for a project from its config."""
+    return ProjectFiles(
+        repo_path,
+        list(config["exclude"]) + list(extra_exclude),
+        use_gitignore=config.get("use_gitignore", True),
+    )
+
+
+def load_import_cache(repo_path):
+    """Open a project's per-file import cache."""
+    with profiling.phase("import cache load"):
+        return ImportCache.load(os.path.join(get_cache_dir(repo_path), IMPORT_CACHE_FILE), EXTRACTOR_VERSION)
+
+
+def scan_for_update(
+    repo_path,
+    config,
+    files=None,
+    jobs=1,
+    use_cache=True,
+    rebuild_cache=False,
+    executor=None,
+    per_file=None,
+    cache=None,
+    progress=None,
+    on_new_imports=None,
+    import_records=None,
+):
+    """
+    Scan one project, using and refreshing its per-file import cache.
+
+    Pass an already loaded ImportCache as cache to reuse it across runs;
+    progress, on_new_imports and import_records are handed to scan_project. With the
+    "content_cache" option, files the ImportCache does not know are looked
+    up in the shared ContentCache before being parsed.
+    """
+    content_cache = None
+    if use_cache:
+        if cache is None:
+            cache = load_import_cache(repo_path)
+        if rebuild_cache:
+            cache.clear()
+        elif config.get("content_cache"):
+            import sqlite3
+            from auto_reqs.content_cache import ContentCache
+
+            try:
+                content_cache = ContentCache.open(EXTRACTOR_VERSION, config.get("content_cache_size"))
+            except (OSError, sqlite3.Error) as e:
+                print(f"Warning: content cache unavailable ({e}); parsing every changed file.")
+    else:
+        cache = None
+    try:
+        result = scan_project(
+            repo_path,
+            config["exclude"],
+            workers=jobs,
+            cache=cache,
+            max_file_size=config.get("max_file_size"),
+            source_roots=config.get("source_roots"),
+            files=files,
+            executor=executor,
+            per_file=per_file,
+            progress=progress,
+            on_new_imports=on_new_imports,
+            content_cache=content_cache,
+            import_records=import_records,
+        )
+    finally:
+        if content_cache is not None:
+            try:
+                content_cache.close()
+            except (OSError, sqlite3.Error) as e:
+                print(f"Warning: could not update the content cache ({e}).")
+    if cache is not None:
+        with profiling.phase("import cache save"):
+            cache.save()
+    return result
+
+
+def scan_git_changes(repo_path, config, changes, cache):
+    """
+    Re-extract only the files in a GitChanges and merge them into the
+    baseline of every other file's imports held in the ImportCache.
+
+    Changed working-tree files are stored back in cache (saving it is left
+    to the caller); staged contents are not, as they may differ from the
+    file on disk. Returns None when the cache holds no baseline yet.
+    """
+    if not cache.entries:
+        return None
+    files = project_files(repo_path, config)
+    current = {path: entry[2] for path, entry in cache.entries.items()}
+    before = set().union(*current.values())
+
+    parsed = 0
+    with profiling.phase("incremental scan", files=len(changes.changed)):
+        for path in changes.deleted:
+            current.pop(path, None)
+            if not os.path.exists(path):
+                cache.discard(path)
+        for path in changes.changed:
+            if files.ignores(path):
+                continue
+            try:
+                if path in changes.contents:
+                    imports = extract_imports_from_source(changes.contents[path], path)
+                else:
+                    imports = extract_imports_from_file(path, config.get("max_file_size"))
+                    cache.put(path, os.stat(path), imports)
+            except (OSError, ValueError):
+                current.pop(path, None)
+                cache.discard(path)
+                continue
+            current[path] = imports
+            parsed += 1
+        profiling.count("files parsed", parsed)
+    after = set().union(*current.values())
+
+    # Nested projects are found from the known files' parents, as the full
+    # scan's walk would, without walking the tree again.
+    local_modules = collect_local_modules(
+        current, repo_path, config.get("source_roots"), marker_dirs(current, repo_path)
+    )
+    verdicts = classify_many(
+        before ^ after, repo_path, local_modules=local_modules, python_version=config.get("target_python")
+    )
+    delta = {
+        name for name, kind in verdicts.items()
+        if kind not in (STDLIB, LOCAL) and not name.startswith("_")
+    }
+    return IncrementalScan(ScanResult(after, local_modules), delta)
+
+
+class Prefetcher:
+    """
+    Resolve third-party imports on background threads while a scan runs.
+
+    Pass the instance as scan_project's on_new_imports callback: each batch
+    of newly seen names is classified right away, and those not pinned in
+    the requirements yet are resolved through the RunContext, so by the
+    time determine_changes runs their versions are already memoized.
+    Nothing (not even the environment crawl) is started for a project
+    whose imports are all pinned.
+    """
+
+    def __init__(self, ctx, repo_path, pinned=(), python_version=None):
+        self.ctx = ctx
+        self.repo_path = repo_path
+        self.pinned = {_norm(name) for name in pinned}
+        self.python_version = python_version
+        self.futures = []
+        self._pool = None
+
+    def __call__(self, names, local_modules):
+        verdicts = classify_many(names, self.repo_path, local_modules=local_modules, python_version=self.python_version)
+        wanted = {
+            _norm(name)
+            for name, kind in verdicts.items()
+            if kind not in (STDLIB, LOCAL) and not name.startswith("_")
+        } - self.pinned
+        if not wanted:
+            return
+        if self._pool is None:
+            from concurrent.futures import ThreadPoolExecutor
+
+            self._pool = ThreadPoolExecutor(max_workers=self.ctx.max_workers)
+        self.futures.append(self._pool.submit(self.ctx.prefetch, wanted))
+
+    def wait(self):
+        """Wait for outstanding lookups; failures are left for determine_changes to retry."""
+        for future in self.futures:
+            try:
+                future.result()
+            except Exception:
+                pass
+        if self._pool is not None:
+            self._pool.shutdown()
+
+
+def _norm(name):
+    # Same normalization determine_changes applies to import names.
+    return normalize_pkg_name(name).lower().replace("_", "-")
+
+
+def apply_changes(
+    repo_path, scan, ctx, dry_run=False, prune_transitive=False, python_version=None, index_url=None,
+):
+    """
+    Compute and (unless dry_run) write one project's requirements changes.
+
+    Requirements needed by an imported distribution are kept unless
+    prune_transitive is set; only true orphans are removed otherwise.
+    python_version is the project's target Python (see classifier), and
+    index_url overrides the context's package index for this project.
+    """
+    req_path = os.path.join(repo_path, REQUIREMENTS_FILE)
+    document = RequirementsFile.load(req_path)
+    requirements = document.requirements()
+    # The environment is only crawled if some import actually needs resolving.
+    transitive = {}
+    with profiling.phase("determine changes"):
+        missing, unused = determine_changes(
+            scan.imports,
+            lambda: ctx.installed,
+            requirements,
+            partial(ctx.fetch_version, index_url=index_url),
+            repo_path,
+            index=lambda: ctx.index,
+            max_workers=ctx.max_workers,
+            local_modules=scan.local_modules,
+            graph=lambda: ctx.graph,
+            prune_transitive=prune_transitive,
+            transitive=transitive,
+            python_version=python_version,
+        )
+    # Requirements that come from -r includes are never edited from here.
+    unused = [name for name in unused if document.defines(name)]
+    document.apply(missing, unused)
+    if not dry_run:
+        with profiling.phase("write requirements"):
+            document.save()
+    return ProjectResult(repo_path, req_path, missing, unused, transitive)
+
+
+def audit_archive(archive_path, config, ctx, jobs=1):
+    """
+    Return the [(name, version)] requirements of an archive's third-party
+    imports, read in place; nothing is written.
+    """
+    from auto_reqs.archive import scan_archive
+
+    scan = scan_archive(
+        archive_path,
+        config["exclude"],
+        workers=jobs,
+        max_file_size=config.get("max_file_size"),
+        source_roots=config.get("source_roots"),
+    )
+    with profiling.phase("determine changes"):
+        required, _ = determine_changes(
+            scan.imports,
+            lambda: ctx.installed,
+            {},
+            ctx.fetch_version,
+            archive_path,
+            index=lambda: ctx.index,
+            max_workers=ctx.max_workers,
+            local_modules=scan.local_modules,
+            python_version=config.get("target_python"),
+        )
+    return required
+
+
+def print_report(result):
+    """Print the added/removed packages of a ProjectResult."""
+    if result.missing:
+        print(f"\nAdded {len(result.missing)} new packages:")
+        for name, version in result.missing:
+            print(f"  {name}=={version}")
+    orphans = [pkg for pkg in result.unused if pkg not in result.transitive]
+    pruned = [pkg for pkg in result.unused if pkg in result.transitive]
+    if orphans:
+        print(f"\nRemoved {len(orphans)} unused packages:")
+        for pkg in orphans:
+            print(f"  {pkg}")
+    if pruned:
+        print(f"\nPruned {len(pruned)} transitive pins:")
+        for pkg in pruned:
+            print(f"  {pkg} (required by {result.transitive[pkg]})")
+    kept = len(result.transitive) - len(pruned)
+    if kept:
+        print(f"\nKept {kept} packages needed by imported ones (--prune-transitive removes them).")
+    if not result.missing and not result.unused:
+        print("\nNo changes required.")
+
+
+def discover_projects(root, config):
+    """
+    Return the project roots under root, sorted.
+
+    A project is a directory holding one of the MONOREPO_MARKERS. The root
+    itself only counts when it has its own requirements.txt, since a
+    monorepo root usually carries tooling config rather than a service.
+    """
+    root = os.path.abspath(root)
+    files = ProjectFiles(root, config["exclude"], config.get("use_gitignore", True), markers=MONOREPO_MARKERS)
+    for _ in files:
+        pass
+    projects = {d for d in files.project_dirs if d != root}
+    if os.path.isfile(os.path.join(root, REQUIREMENTS_FILE)):
+        projects.add(root)
+    return sorted(projects)
+
+
+def _nested_excludes(project, projects):
+    """Anchored exclude patterns for the projects nested inside project."""
+    prefix = project + os.sep
+    return [
+        "/" + os.path.relpath(other, project).replace(os.sep, "/") + "/"
+        for other in projects
+        if other.startswith(prefix)
+    ]
+
+
+def run_monorepo(root, args, root_config, environment=None):
+    """
+    Update every project under root in one process and write a summary.
+
+    All projects are scanned concurrently on one shared process pool, every
+    third-party name across the repo is resolved in a single batch per
+    package index, and then each project's requirements file is updated
+    from the shared results. Each project uses its own .auto-reqs.json (its
+    index_url falling back to the root's); projects without any .py file
+    are skipped, as a single-project run would refuse them. environment is
+    passed on to the shared RunContext.
+    """
+    from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+    root = os.path.abspath(root)
+    projects = discover_projects(root, root_config)
+    if not projects:
+        print("No projects found.")
+        return []
+
+    use_cache = not args.no_cache
+    ctx = RunContext(root_config, use_cache=use_cache, index_url=args.index_url, environment=environment)
+    configs = {
+        p: override(
+            load_config(p), target_python=args.target_python, content_cache=args.content_cache,
+            index_url=args.index_url,
+        )
+        for p in projects
+    }
+    index_urls = {p: configs[p].get("index_url") or ctx.index_url for p in projects}
+
+    def scan(project):
+        files = project_files(project, configs[project], _nested_excludes(project, projects))
+        if not files.has_python_files():
+            return None
+        return scan_for_update(
+            project, configs[project], files=files, use_cache=use_cache,
+            rebuild_cache=args.rebuild_cache, executor=executor,
+        )
+
+    jobs = args.jobs if args.jobs != 0 else os.cpu_count() or 1
+    executor = ProcessPoolExecutor(max_workers=jobs) if jobs > 1 else None
+    try:
+        with ThreadPoolExecutor(max_workers=min(len(projects), 8)) as threads:
+            scans = dict(zip(projects, threads.map(scan, projects)))
+    finally:
+        if executor is not None:
+            executor.shutdown()
+    skipped = [p for p in projects if scans[p] is None]
+    projects = [p for p in projects if scans[p] is not None]
+
+    candidates = {}
+    for project in projects:
+        result = scans[project]
+        verdicts = classify_many(
+            result.imports, project, local_modules=result.local_modules,
+            python_version=configs[project].get("target_python"),
+        )
+        candidates.setdefault(index_urls[project], set()).update(
+            n for n, kind in verdicts.items() if kind not in (STDLIB, LOCAL)
+        )
+    for index_url, names in candidates.items():
+        ctx.prefetch(names, index_url)
+
+    results = [
+        apply_changes(
+            p, scans[p], ctx, dry_run=args.dry_run, prune_transitive=args.prune_transitive,
+            python_version=configs[p].get("target_python"), index_url=index_urls[p],
+        )
+        for p in projects
+    ]
+    ctx.save()
+
+    summary = {
+        "root": root,
+        "dry_run": bool(args.dry_run),
+        "projects": [
+            {
+                "path": os.path.relpath(r.repo_path, root),
+                "added": [f"{n}=={v}" for n, v in r.missing],
+                "removed": list(r.unused),
+            }
+            for r in results
+        ],
+        "skipped": [os.path.relpath(p, root) for p in skipped],
+    }
+    if args.dry_run:
+        print("\nDry Run: no changes will be saved.")
+    else:
+        write_json_atomic(os.path.join(root, SUMMARY_FILE), summary)
+
+    for r in results:
+        rel = os.path.relpath(r.repo_path, root)
+        print(f"  {rel:<40} +{len(r.missing):<3} -{len(r.unused)}")
+    for p in skipped:
+        print(f"  {os.path.relpath(p, root):<40} skipped (no Python files)")
+    print(f"\nProcessed {len(results)} projects.")
+    return results
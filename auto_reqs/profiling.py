@@ -0,0 +1,127 @@
+import contextlib
+import json
+import os
+import threading
+import time
+from collections import defaultdict
+
+# The active Profiler, or None. Every hook checks this first, so disabled
+# instrumentation costs one global lookup per call.
+_active = None
+_NULL = contextlib.nullcontext()
+
+
+class Profiler:
+    """
+    Wall time per phase, named counters and latency samples for one run.
+
+    With trace=True every phase is also kept as a Chrome trace event
+    (load the written file in chrome://tracing or Perfetto).
+    """
+
+    def __init__(self, trace=False):
+        self.started = time.perf_counter()
+        self.phases = defaultdict(lambda: [0, 0.0])
+        self.counters = defaultdict(int)
+        self.latencies = defaultdict(list)
+        self.events = [] if trace else None
+        self._lock = threading.Lock()
+
+    @contextlib.contextmanager
+    def phase(self, name, **args):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            end = time.perf_counter()
+            with self._lock:
+                entry = self.phases[name]
+                entry[0] += 1
+                entry[1] += end - start
+                if self.events is not None:
+                    self.events.append({
+                        "name": name,
+                        "cat": "auto-reqs",
+                        "ph": "X",
+                        "ts": (start - self.started) * 1e6,
+                        "dur": (end - start) * 1e6,
+                        "pid": os.getpid(),
+                        "tid": threading.get_ident(),
+                        "args": args,
+                    })
+
+    def count(self, name, n=1):
+        with self._lock:
+            self.counters[name] += n
+
+    def observe(self, name, seconds):
+        with self._lock:
+            self.latencies[name].append(seconds)
+
+    def summary(self):
+        """Return the summary table as a list of lines."""
+        lines = [f"\nProfile (total {time.perf_counter() - self.started:.3f} s):"]
+        lines.append(f"  {'phase':<28} {'calls':>7} {'seconds':>10}")
+        for name, (calls, seconds) in sorted(self.phases.items(), key=lambda item: -item[1][1]):
+            lines.append(f"  {name:<28} {calls:>7} {seconds:>10.4f}")
+        if self.counters:
+            lines.append(f"  {'counter':<28} {'value':>18}")
+            for name, value in sorted(self.counters.items()):
+                lines.append(f"  {name:<28} {value:>18}")
+        for name, samples in sorted(self.latencies.items()):
+            ordered = sorted(samples)
+            p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+            lines.append(
+                f"  {name + ' latency':<28} n={len(ordered)} mean={sum(ordered) / len(ordered) * 1000:.1f}ms "
+                f"p95={p95 * 1000:.1f}ms max={ordered[-1] * 1000:.1f}ms"
+            )
+        return lines
+
+    def write_trace(self, path):
+        """Write the recorded phases and final counters in Chrome trace-event format."""
+        events = list(self.events or [])
+        now = (time.perf_counter() - self.started) * 1e6
+        if self.counters:
+            events.append({
+                "name": "counters", "ph": "C", "ts": now, "pid": os.getpid(), "tid": 0,
+                "args": dict(self.counters),
+            })
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+
+
+def enable(trace=False):
+    """Start collecting into a new Profiler and return it."""
+    global _active
+    _active = Profiler(trace=trace)
+    return _active
+
+
+def disable():
+    """Stop collecting; return the Profiler that was active, if any."""
+    global _active
+    profiler, _active = _active, None
+    return profiler
+
+
+def enabled():
+    return _active is not None
+
+
+def phase(name, **args):
+    """Context manager timing a phase (a shared no-op when profiling is off)."""
+    if _active is None:
+        return _NULL
+    return _active.phase(name, **args)
+
+
+def count(name, n=1):
+    """Add n to a named counter."""
+    if _active is not None:
+        _active.count(name, n)
+
+
+def observe(name, seconds):
+    """Record one latency sample."""
+    if _active is not None:
+        _active.observe(name, seconds)
@@ -0,0 +1,53 @@
+import sys
+import time
+
+# Minimum seconds between two redraws of the progress line.
+REFRESH_INTERVAL = 0.1
+
+
+class ScanProgress:
+    """
+    One-line scan progress (files/s and ETA), redrawn in place on a TTY.
+
+    Use an instance as the progress callback of iter_project_imports or
+    scan_project, then call finish(). Nothing is written when the stream is
+    not a terminal, so piped and captured output stays clean.
+    """
+
+    def __init__(self, stream=None, interval=REFRESH_INTERVAL):
+        self.stream = stream or sys.stderr
+        self.enabled = self.stream.isatty()
+        self.interval = interval
+        self.started = time.perf_counter()
+        self._drawn = 0.0
+        self._width = 0
+
+    def __call__(self, done, total):
+        if not self.enabled:
+            return
+        now = time.perf_counter()
+        if done < total and now - self._drawn < self.interval:
+            return
+        self._drawn = now
+        self._write(self.format(done, total, now - self.started))
+
+    @staticmethod
+    def format(done, total, elapsed):
+        """Return the progress text for done of total files after elapsed seconds."""
+        rate = done / elapsed if elapsed > 0 else 0.0
+        text = f"Scanned {done}/{total} files ({rate:.0f} files/s"
+        if done < total and rate > 0:
+            text += f", ETA {(total - done) / rate:.0f}s"
+        return text + ")"
+
+    def _write(self, text):
+        self.stream.write("\r" + text.ljust(self._width))
+        self.stream.flush()
+        self._width = len(text)
+
+    def finish(self):
+        """Erase the progress line."""
+        if self.enabled and self._width:
+            self._write("")
+            self.stream.write("\r")
+            self.stream.flush()
@@ -0,0 +1,191 @@
+import contextlib
+import os
+import sqlite3
+from auto_reqs import profiling
+from auto_reqs.cache import get_cache_dir
+from auto_reqs.scanner import extract_import_records_from_file
+from auto_reqs.utils import normalize_pkg_name
+
+PROVENANCE_FILE = "provenance.sqlite3"
+
+# Bump when the schema or what extract_import_records reports changes; an
+# index with a different user_version is dropped and rebuilt.
+SCHEMA_VERSION = 2
+
+# Changed files are written in transactions of this many files.
+BATCH_SIZE = 500
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY,
+    mtime_ns INTEGER NOT NULL,
+    size INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS imports (
+    path TEXT NOT NULL,
+    line INTEGER NOT NULL,
+    module TEXT NOT NULL,
+    name TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS imports_by_name ON imports (name);
+CREATE INDEX IF NOT EXISTS imports_by_path ON imports (path);
+CREATE TABLE IF NOT EXISTS distributions (
+    name TEXT PRIMARY KEY,
+    distribution TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS distributions_by_distribution ON distributions (distribution);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+
+class ProvenanceIndex:
+    """
+    On-disk index of where every import comes from, for `auto-reqs why`.
+
+    Stores one row per import (file, line, dotted module, top-level name)
+    plus the distribution each top-level name resolves to, in a SQLite
+    database in the project cache directory. refresh() re-indexes only files
+    whose (st_mtime_ns, st_size) changed and drops vanished ones, taking the
+    records a scan already extracted where it can and reading the rest one
+    file at a time. Paths are stored relative to the project root.
+    """
+
+    def __init__(self, db_path, root):
+        self.path = db_path
+        self.root = os.path.abspath(root)
+        # Autocommit mode: transactions are opened explicitly by _transaction.
+        self.conn = sqlite3.connect(db_path, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        if self.conn.execute("PRAGMA user_version").fetchone()[0] != SCHEMA_VERSION:
+            self.conn.executescript(
+                "DROP TABLE IF EXISTS files; DROP TABLE IF EXISTS imports; "
+                "DROP TABLE IF EXISTS distributions; DROP TABLE IF EXISTS meta;"
+            )
+            self.conn.execute(f"PRAGMA user_version={SCHEMA_VERSION}")
+        self.conn.executescript(_SCHEMA)
+
+    @classmethod
+    def open(cls, repo_path):
+        """Open (creating if needed) the index in a project's cache directory."""
+        return cls(os.path.join(get_cache_dir(repo_path), PROVENANCE_FILE), repo_path)
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    @contextlib.contextmanager
+    def _transaction(self):
+        self.conn.execute("BEGIN")
+        try:
+            yield
+        except BaseException:
+            self.conn.execute("ROLLBACK")
+            raise
+        self.conn.execute("COMMIT")
+
+    def __len__(self):
+        """Number of indexed files."""
+        return self.conn.execute("SELECT COUNT(*) FROM files").fetchone()[0]
+
+    def refresh(self, paths, max_file_size=None, scanned=None, cache=None):
+        """
+        Bring the index in line with paths (the project's current .py files).
+
+        scanned maps paths to the [(line, dotted module)] records a scan just
+        extracted (see scan_project's import_records), so those files are not
+        read again. cache is the ImportCache that scan used: the (st_mtime_ns,
+        st_size) it recorded for a file, taken before the file was read,
+        stands in for a fresh stat. Returns (updated, removed) file counts.
+        Unreadable files are indexed with no imports so they are retried once
+        they change again.
+        """
+        known = {path: (mtime, size) for path, mtime, size in self.conn.execute("SELECT * FROM files")}
+        scanned = scanned or {}
+        prefix = os.path.join(self.root, "")
+        updated = 0
+        with profiling.phase("provenance index"), self._transaction():
+            for path in paths:
+                path = str(path)
+                rel = path[len(prefix):] if path.startswith(prefix) else os.path.relpath(path, self.root)
+                signature = cache.signature(path) if cache is not None else None
+                if signature is None:
+                    try:
+                        st = os.stat(path)
+                    except OSError:
+                        continue
+                    signature = (st.st_mtime_ns, st.st_size)
+                if known.pop(rel, None) == signature:
+                    continue
+                records = scanned.get(path)
+                if records is None:
+                    try:
+                        records = extract_import_records_from_file(path, max_file_size)
+                    except (OSError, ValueError):
+                        records = []
+                self.conn.execute("DELETE FROM imports WHERE path = ?", (rel,))
+                self.conn.executemany(
+                    "INSERT INTO imports VALUES (?, ?, ?, ?)",
+                    [(rel, line, module, module.split(".")[0]) for line, module in records],
+                )
+                self.conn.execute("INSERT OR REPLACE INTO files VALUES (?, ?, ?)", (rel, *signature))
+                updated += 1
+                if updated % BATCH_SIZE == 0:
+                    self.conn.execute("COMMIT")
+                    self.conn.execute("BEGIN")
+            for rel in known:
+                self.conn.execute("DELETE FROM imports WHERE path = ?", (rel,))
+                self.conn.execute("DELETE FROM files WHERE path = ?", (rel,))
+        profiling.count("provenance files updated", updated)
+        return updated, len(known)
+
+    def names(self):
+        """Iterate the distinct top-level import names, straight from disk."""
+        for (name,) in self.conn.execute("SELECT DISTINCT name FROM imports ORDER BY name"):
+            yield name
+
+    def resolve_distributions(self, index):
+        """
+        Record the distribution of every top-level name not yet mapped.
+
+        index is a ResolverIndex; names it does not know map to their own
+        normalized name. The mapping is dropped whenever the ResolverIndex
+        fingerprint changes, i.e. when installed distributions changed.
+        """
+        row = self.conn.execute("SELECT value FROM meta WHERE key = 'fingerprint'").fetchone()
+        with self._transaction():
+            if row is None or row[0] != index.fingerprint:
+                self.conn.execute("DELETE FROM distributions")
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO meta VALUES ('fingerprint', ?)", (index.fingerprint,)
+                )
+            unmapped = self.conn.execute(
+                "SELECT DISTINCT name FROM imports WHERE name NOT IN (SELECT name FROM distributions)"
+            ).fetchall()
+            self.conn.executemany(
+                "INSERT INTO distributions VALUES (?, ?)",
+                [(name, index.resolve(name) or normalize_pkg_name(name)) for (name,) in unmapped],
+            )
+
+    def why(self, package):
+        """
+        Return [(path, line, module)] of imports that require package.
+
+        package may be a distribution name (matched through the recorded
+        distributions) or a top-level import name.
+        """
+        rows = self.conn.execute(
+            "SELECT path, line, module FROM imports "
+            "WHERE name IN (SELECT name FROM distributions WHERE distribution = ?) OR name = ? "
+            "ORDER BY path, line, module",
+            (normalize_pkg_name(package), package),
+        )
+        return rows.fetchall()
@@ -0,0 +1,203 @@
+import os
+import re
+import shutil
+from auto_reqs.utils import normalize_pkg_name
+
+HEADER = "# Automatically maintained by auto-reqs\n"
+
+# "name[extras] <specifiers> ; <markers>" or "name[extras] @ url".
+_REQUIREMENT = re.compile(r"\s*([A-Za-z0-9](?:[A-Za-z0-9._-]*[A-Za-z0-9])?)\s*(\[[^\]]*\])?\s*(.*)$", re.S)
+_PIN = re.compile(r"==\s*([^\s,;=]+)\s*$")
+_INCLUDE = re.compile(r"(?:-r|--requirement)(?:\s*=\s*|\s+|(?=[^\s=-]))(\S+)")
+# Local archives named directly ("foo-1.0.tar.gz") are not package names.
+_ARCHIVE = re.compile(r"\.(whl|zip|tar\.gz|tgz|tar\.bz2)$", re.I)
+# A comment starts at a "#" at the beginning of a line or after whitespace.
+_COMMENT = re.compile(r"(^|\s)#.*$", re.S)
+
+
+class Entry:
+    """
+    One logical line of a requirements file: its physical lines (with
+    backslash continuations and line endings kept verbatim), plus the
+    normalized name, pinned version and -r include it declares, if any.
+    """
+
+    def __init__(self, lines, name=None, version=None, include=None):
+        self.lines = lines
+        self.name = name
+        self.version = version
+        self.include = include
+
+    @classmethod
+    def parse(cls, lines):
+        text = _COMMENT.sub("", "".join(lines).replace("\\\r\n", "").replace("\\\n", "")).strip()
+        if not text:
+            return cls(lines)
+        if text.startswith("-"):
+            include = _INCLUDE.match(text)
+            return cls(lines, include=include.group(1) if include else None)
+        match = _REQUIREMENT.match(text)
+        if match is None or match.group(3).startswith(("/", "\\", ":")) or _ARCHIVE.search(match.group(1)):
+            # Paths, bare URLs and archive files carry no usable name.
+            return cls(lines)
+        # Drop markers and per-requirement options such as --hash.
+        spec = match.group(3).split(";", 1)[0].split(" -", 1)[0].strip()
+        if spec.startswith("@"):
+            return cls(lines, normalize_pkg_name(match.group(1)))
+        pin = _PIN.fullmatch(spec) if spec.count("==") == 1 and "," not in spec else None
+        return cls(lines, normalize_pkg_name(match.group(1)), pin.group(1) if pin else None)
+
+
+def _split_entries(text):
+    entries = []
+    pending = []
+    for line in text.splitlines(keepends=True):
+        pending.append(line)
+        if line.rstrip("\r\n").endswith("\\"):
+            continue
+        entries.append(Entry.parse(pending))
+        pending = []
+    if pending:
+        entries.append(Entry.parse(pending))
+    return entries
+
+
+def write_text_if_changed(path, text):
+    """
+    Atomically replace path with text (via a temp file and rename) unless it
+    already holds exactly these bytes; keeps the file's mode. Returns True
+    if the file was written.
+    """
+    data = text.encode("utf-8")
+    try:
+        with open(path, "rb") as f:
+            if f.read() == data:
+                return False
+        existed = True
+    except OSError:
+        existed = False
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    if existed:
+        shutil.copymode(path, tmp_path)
+    os.replace(tmp_path, path)
+    return True
+
+
+class RequirementsFile:
+    """
+    A requirements file kept as its original lines, so comments, blank
+    lines, extras, markers, specifiers, options and -r includes survive a
+    round trip untouched.
+
+    -r includes are followed (each file is parsed once, even if included
+    several times or in a cycle); their requirements count as present but
+    only the top-level file is ever edited. apply() turns the add/remove
+    set from determine_changes into a minimal edit and save() writes only
+    when the resulting bytes differ from what is on disk.
+    """
+
+    def __init__(self, path, entries=(), includes=(), exists=False):
+        self.path = path
+        self.entries = list(entries)
+        self.includes = list(includes)
+        self.exists = exists
+
+    @classmethod
+    def load(cls, path, _seen=None):
+        """Parse path and everything it includes; a missing file is empty."""
+        seen = {} if _seen is None else _seen
+        key = os.path.realpath(path)
+        if key in seen:
+            return seen[key]
+        doc = seen[key] = cls(path)
+        try:
+            with open(path, "r", encoding="utf-8", newline="") as f:
+                text = f.read()
+        except OSError:
+            return doc
+        doc.exists = True
+        doc.entries = _split_entries(text)
+        base = os.path.dirname(os.path.abspath(path))
+        for entry in doc.entries:
+            if entry.include:
+                doc.includes.append(cls.load(os.path.join(base, entry.include), seen))
+        return doc
+
+    def _walk(self, seen=None):
+        seen = set() if seen is None else seen
+        if id(self) in seen:
+            return
+        seen.add(id(self))
+        yield self
+        for included in self.includes:
+            yield from included._walk(seen)
+
+    def requirements(self):
+        """{normalized name: pinned version or None} across the file and its includes."""
+        found = {}
+        for doc in self._walk():
+            for entry in doc.entries:
+                if entry.name and entry.name not in found:
+                    found[entry.name] = entry.version
+        return found
+
+    def defines(self, name):
+        """True if the top-level file itself lists name."""
+        name = normalize_pkg_name(name)
+        return any(entry.name == name for entry in self.entries)
+
+    def render(self):
+        return "".join(line for entry in self.entries for line in entry.lines)
+
+    def _newline(self):
+        for entry in self.entries:
+            for line in entry.lines:
+                if line.endswith("\r\n"):
+                    return "\r\n"
+                if line.endswith("\n"):
+                    return "\n"
+        return "\n"
+
+    def remove(self, name):
+        """Drop every line requiring name (in the top-level file only)."""
+        name = normalize_pkg_name(name)
+        self.entries = [entry for entry in self.entries if entry.name != name]
+
+    def add(self, name, version=None):
+        """
+        Add a requirement line for name. It goes into alphabetical position
+        when the existing requirements are sorted, otherwise after the last one.
+        """
+        newline = self._newline()
+        if not self.exists and not self.entries:
+            self.entries.append(Entry([HEADER.replace("\n", newline)]))
+        if self.entries and not self.entries[-1].lines[-1].endswith("\n"):
+            self.entries[-1].lines[-1] += newline
+        name = normalize_pkg_name(name)
+        entry = Entry([f"{name}=={version}{newline}" if version else f"{name}{newline}"], name, version)
+        positions = [i for i, e in enumerate(self.entries) if e.name]
+        names = [self.entries[i].name for i in positions]
+        if not positions:
+            self.entries.append(entry)
+        elif names == sorted(names):
+            after = [i for i in positions if self.entries[i].name <= name]
+            self.entries.insert(after[-1] + 1 if after else positions[0], entry)
+        else:
+            self.entries.insert(positions[-1] + 1, entry)
+
+    def apply(self, missing, unused):
+        """Apply determine_changes' missing [(name, version)] and unused [name] lists."""
+        for name in unused:
+            self.remove(name)
+        for name, version in missing:
+            self.add(name, version)
+
+    def save(self):
+        """Write the top-level file if its content changed; returns True if written."""
+        if not self.exists and not self.entries:
+            self.entries.append(Entry([HEADER]))
+        written = write_text_if_changed(self.path, self.render())
+        self.exists = True
+        return written
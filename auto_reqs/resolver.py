@@ -1,44 +1,264 @@
-import importlib.metadata
-import requests
+import os
+import sys
+import time
+from auto_reqs import profiling
 from auto_reqs.utils import normalize_pkg_name
 
+PYPI_JSON_URL = "https://pypi.org/pypi"
+DEFAULT_MAX_WORKERS = 8
+
 
 def get_installed_distributions():
     """Return installed distributions as {package_name: version}."""
+    import importlib.metadata
+
     dists = {}
-    for dist in importlib.metadata.distributions():
+    with profiling.phase("installed distributions"):
+        for dist in importlib.metadata.distributions():
+            try:
+                name = normalize_pkg_name(dist.metadata["Name"])
+                dists[name] = dist.version
+            except Exception:
+                continue
+    return dists
+
+
+def site_packages_fingerprint(paths=None):
+    """
+    Fingerprint the installed-distribution metadata visible on paths.
+
+    Covers the name and mtime of every *.dist-info / *.egg-info entry, so any
+    install, upgrade or removal changes the result. Defaults to sys.path,
+    which is what importlib.metadata searches.
+    """
+    import hashlib
+
+    digest = hashlib.sha1()
+    for path in sorted({p for p in (paths or sys.path) if p and os.path.isdir(p)}):
         try:
-            name = normalize_pkg_name(dist.metadata["Name"])
-            dists[name] = dist.version
-        except Exception:
+            entries = sorted(
+                (entry.name, entry.stat().st_mtime_ns)
+                for entry in os.scandir(path)
+                if entry.name.endswith((".dist-info", ".egg-info"))
+            )
+        except OSError:
             continue
-    return dists
+        digest.update(path.encode("utf-8", "surrogateescape"))
+        for name, mtime in entries:
+            digest.update(f"{name}:{mtime};".encode("utf-8", "surrogateescape"))
+    return digest.hexdigest()
+
+
+class ResolverIndex:
+    """
+    Reverse index from top-level import names to installed distributions.
+
+    Built once per run, from an EnvironmentSnapshot's top-level names or by
+    crawling importlib.metadata; fingerprint identifies the environment.
+    """
 
+    def __init__(self, mapping, fingerprint=None):
+        self.mapping = mapping
+        self.fingerprint = fingerprint
 
-def resolve_import_to_pkg(name):
-    """Resolve an import name to its PyPI package name."""
-    mapping = importlib.metadata.packages_distributions()
-    if name in mapping:
-        return normalize_pkg_name(mapping[name][0])
+    @classmethod
+    def from_metadata(cls, fingerprint=None):
+        """Build the index by crawling installed distribution metadata."""
+        import importlib.metadata
+
+        mapping = {}
+        with profiling.phase("metadata crawl"):
+            for module, dists in importlib.metadata.packages_distributions().items():
+                names = []
+                for dist in dists:
+                    name = normalize_pkg_name(dist)
+                    if name and name not in names:
+                        names.append(name)
+                if names:
+                    mapping[module] = names
+        return cls(mapping, fingerprint)
+
+    def _providers(self, name):
+        # Callers may pass names already normalized ("my-mod"); module names
+        # never contain "-", so look those up as "my_mod" too.
+        return self.mapping.get(name) or self.mapping.get(name.replace("-", "_"))
+
+    def candidates(self, name):
+        """Return every distribution providing the top-level module name."""
+        return list(self._providers(name) or [])
+
+    def resolve(self, name):
+        """
+        Return the distribution providing name, or None if none is installed.
+
+        When several distributions provide the same top-level name, the one
+        whose normalized name matches the import wins; otherwise the choice
+        is the alphabetically first candidate, so results are deterministic.
+        """
+        candidates = self._providers(name)
+        if not candidates:
+            return None
+        if len(candidates) == 1:
+            return candidates[0]
+        wanted = normalize_pkg_name(name)
+        return wanted if wanted in candidates else sorted(candidates)[0]
+
+    def ambiguous(self):
+        """Return {module: [distributions]} for names with several providers."""
+        return {m: list(d) for m, d in self.mapping.items() if len(d) > 1}
+
+
+def resolve_import_to_pkg(name, index=None, session=None, cache=None, index_url=PYPI_JSON_URL):
+    """
+    Resolve an import name to its PyPI package name.
+
+    Pass a ResolverIndex to reuse one metadata crawl across many lookups,
+    and a MetadataCache to reuse index responses across runs.
+    """
+    if index is None:
+        index = ResolverIndex.from_metadata()
+    dist = index.resolve(name)
+    if dist:
+        return dist
 
     # Fallback: verify existence on PyPI
     pkg_name = normalize_pkg_name(name)
-    try:
-        resp = requests.get(f"https://pypi.org/pypi/{pkg_name}/json", timeout=3)
-        if resp.status_code == 200:
-            return pkg_name
-    except Exception:
-        pass
+    fetch_project_info(pkg_name, session=session, index_url=index_url, cache=cache, timeout=3)
     return pkg_name
 
 
-def get_latest_version_from_pypi(package_name):
-    """Fetch latest version from PyPI for a given package."""
+def create_session(max_workers=DEFAULT_MAX_WORKERS):
+    """Return a requests.Session whose connection pool fits max_workers threads."""
+    import requests
+    from requests.adapters import HTTPAdapter
+
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=max_workers, pool_maxsize=max_workers)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def fetch_project_info(package_name, session=None, index_url=PYPI_JSON_URL, cache=None, timeout=5):
+    """
+    Return {"exists": bool, "version": str | None} for a project on the index.
+
+    With a MetadataCache, fresh entries are answered locally and stale ones
+    are revalidated with a conditional request. Returns None when the index
+    cannot be reached and nothing usable is cached. A file:// index_url is
+    answered from a LocalIndex without touching the network or the cache.
+    """
+    from auto_reqs.local_index import is_local_index_url, open_local_index
+
     pkg = normalize_pkg_name(package_name)
+    if is_local_index_url(index_url):
+        profiling.count("local index lookups")
+        return open_local_index(index_url).project_info(pkg)
+
+    url = f"{index_url}/{pkg}/json"
+    entry, fresh = cache.lookup(url) if cache is not None else (None, False)
+    if fresh:
+        profiling.count("metadata cache hits")
+        return entry
+    if cache is not None:
+        profiling.count("metadata cache misses")
+
+    kwargs = {}
+    if entry:
+        headers = {}
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        if headers:
+            kwargs["headers"] = headers
+
+    if session is None:
+        import requests as session
+    profiling.count("http requests")
+    start = time.perf_counter()
     try:
-        r = requests.get(f"https://pypi.org/pypi/{pkg}/json", timeout=5)
+        try:
+            r = session.get(url, timeout=timeout, **kwargs)
+        finally:
+            profiling.observe("http", time.perf_counter() - start)
+        if r.status_code == 304 and entry:
+            profiling.count("http not modified")
+            cache.touch(url)
+            return entry
         if r.status_code == 200:
-            return r.json()["info"]["version"]
-    except Exception:
-        pass
-    return None
+            info = {"exists": True, "version": r.json()["info"]["version"]}
+        elif r.status_code == 404:
+            info = {"exists": False, "version": None}
+        else:
+            return entry
+    except Exception as e:
+        profiling.count("http timeouts" if "Timeout" in type(e).__name__ else "http errors")
+        return entry
+
+    if cache is not None:
+        headers = getattr(r, "headers", None) or {}
+        cache.store(url, info["exists"], info["version"], headers.get("ETag"), headers.get("Last-Modified"))
+    return info
+
+
+def get_latest_version_from_pypi(package_name, session=None, index_url=PYPI_JSON_URL, cache=None):
+    """Fetch latest version from PyPI for a given package."""
+    info = fetch_project_info(package_name, session=session, index_url=index_url, cache=cache)
+    return info["version"] if info else None
+
+
+def resolve_many(
+    names,
+    installed=None,
+    fetch_version=None,
+    index=None,
+    max_workers=DEFAULT_MAX_WORKERS,
+    session=None,
+    index_url=PYPI_JSON_URL,
+    cache=None,
+):
+    """
+    Resolve many import names to (package_name, version) in one batch.
+
+    Names are mapped through the ResolverIndex and the installed versions
+    first; only the remainder hit the package index, concurrently on up to
+    max_workers threads sharing one pooled session. fetch_version overrides
+    the per-package lookup (it is called with a normalized package name).
+    Returns {name: (package_name, version_or_None)}.
+    """
+    installed = installed or {}
+    if index is None:
+        index = ResolverIndex.from_metadata()
+    if fetch_version is None:
+        session = session or create_session(max_workers)
+
+        def fetch_version(pkg):
+            return get_latest_version_from_pypi(pkg, session=session, index_url=index_url, cache=cache)
+
+    profiling.count("names resolved", len(names))
+    results = {}
+    remote = []
+    for name in names:
+        resolved = index.resolve(name) or normalize_pkg_name(name)
+        version = installed.get(resolved) or installed.get(name)
+        results[name] = (resolved, version)
+        if not version:
+            remote.append(name)
+
+    def lookup(name):
+        resolved = results[name][0]
+        version = fetch_version(resolved)
+        if not version and resolved != name:
+            version = fetch_version(name)
+        return name, (resolved, version)
+
+    with profiling.phase("index lookups", names=len(remote)):
+        if len(remote) == 1 or max_workers <= 1:
+            results.update(lookup(name) for name in remote)
+        elif remote:
+            from concurrent.futures import ThreadPoolExecutor
+
+            with ThreadPoolExecutor(max_workers=min(max_workers, len(remote))) as pool:
+                results.update(pool.map(lookup, remote))
+    return results
@@ -1,5 +1,15 @@
-import ast
 import os
+from collections import namedtuple
+from functools import partial
+from auto_reqs.extractor import (
+    UnsupportedSource,
+    extract_import_records,
+    extract_imports_ast,
+    extract_imports_fast,
+    extract_imports_streaming,
+)
+from auto_reqs import profiling
+from auto_reqs.walker import ProjectFiles
 
 EXCLUDE_DIRS_DEFAULT = {
     "__pycache__",
@@ -12,38 +22,336 @@ EXCLUDE_DIRS_DEFAULT = {
     "site-packages",
 }
 
+# Directories searched for top-level modules besides any configured roots.
+SOURCE_ROOTS_DEFAULT = ("", "src")
 
-def extract_imports_from_file(filepath):
-    """Extract import names from a Python file."""
-    with open(filepath, "r", encoding="utf-8", errors="ignore") as f:
+ScanResult = namedtuple("ScanResult", ["imports", "local_modules"])
+# One file's scan outcome; error is None or a short description of why the
+# file could not be read (its imports are then empty).
+FileImports = namedtuple("FileImports", ["path", "imports", "error"])
+
+# Bump whenever extract_imports_from_file changes what it reports, so that
+# persisted per-file results are invalidated automatically. "3": files with
+# syntax errors report their valid import statements instead of nothing;
+# "4": a leading BOM no longer hides the first line's import.
+EXTRACTOR_VERSION = "4"
+
+# Below this many files, process pool startup costs more than it saves.
+PARALLEL_MIN_FILES = 200
+# Upper bound on the number of files handed to a worker in one task.
+PARALLEL_CHUNK_SIZE = 64
+
+
+def extract_imports_from_file(filepath, max_file_size=None):
+    """
+    Extract import names from a Python file.
+
+    Files are scanned lexically and fall back to a full AST parse only when
+    the fast scanner cannot follow them. Files larger than max_file_size
+    bytes are tokenized as a stream instead of being read whole.
+    """
+    if max_file_size and os.path.getsize(filepath) > max_file_size:
+        with open(filepath, "rb") as f:
+            return extract_imports_streaming(f.readline)
+
+    with open(filepath, "rb") as f:
+        return extract_imports_from_source(f.read(), str(filepath))
+
+
+def extract_imports_from_source(data, filename="<unknown>"):
+    """Extract import names from source bytes already in memory."""
+    try:
+        return extract_imports_fast(data)
+    except UnsupportedSource:
+        source = data.decode("utf-8", errors="ignore")
+        return extract_imports_ast(source, filename=filename)
+
+
+def extract_import_records_from_file(filepath, max_file_size=None):
+    """
+    Return [(line, dotted module)] for every import in a Python file.
+
+    Uses the same paths as extract_imports_from_file; the top-level names
+    of the modules are exactly the imports that function reports.
+    """
+    if max_file_size and os.path.getsize(filepath) > max_file_size:
+        records = []
+        with open(filepath, "rb") as f:
+            extract_imports_streaming(f.readline, records)
+        return records
+    with open(filepath, "rb") as f:
+        return extract_import_records(f.read())
+
+
+def _extract_one(path, max_file_size=None):
+    """Return a FileImports record for path, capturing read errors."""
+    try:
+        return FileImports(path, extract_imports_from_file(path, max_file_size), None)
+    except (OSError, ValueError) as e:
+        return FileImports(path, set(), f"{type(e).__name__}: {e}")
+
+
+def _extract_one_with_records(path, max_file_size=None):
+    """Return (FileImports, [(line, dotted module)]) for path, capturing read errors."""
+    try:
+        records = extract_import_records_from_file(path, max_file_size)
+    except (OSError, ValueError) as e:
+        return FileImports(path, set(), f"{type(e).__name__}: {e}"), []
+    return FileImports(path, {module.split(".")[0] for _, module in records}, None), records
+
+
+def _extract_imports_from_batch(paths, max_file_size=None, with_records=False):
+    """Process-pool task: a FileImports record (see _extract_all) for each file in a batch."""
+    extract = _extract_one_with_records if with_records else _extract_one
+    return [extract(path, max_file_size) for path in paths]
+
+
+def collect_local_modules(paths, root_dir, source_roots=None, project_dirs=()):
+    """
+    Return every top-level name the project's own files make importable.
+
+    Each path is resolved against the repo root, src/, any configured
+    source_roots and nested project directories: a module directly in a root
+    contributes its stem, anything deeper contributes its first directory
+    (regular and PEP 420 namespace packages alike), and a root holding an
+    __init__.py contributes its own name.
+    """
+    root_dir = os.path.abspath(root_dir)
+    roots = {os.path.normpath(os.path.join(root_dir, r)) for r in SOURCE_ROOTS_DEFAULT}
+    roots.update(os.path.normpath(os.path.join(root_dir, r)) for r in source_roots or ())
+    roots.update(os.path.abspath(d) for d in project_dirs)
+    prefixes = [(r, r + os.sep) for r in roots]
+
+    names = set()
+    for path in paths:
+        path = os.path.abspath(path)
+        for root, prefix in prefixes:
+            if not path.startswith(prefix):
+                continue
+            head = path[len(prefix):].split(os.sep, 1)
+            name = head[0][:-3] if len(head) == 1 else head[0]
+            if name == "__init__":
+                # The root is itself a package, importable by its own name.
+                name = os.path.basename(root)
+            if name.isidentifier():
+                names.add(name)
+    return names
+
+
+def _chunk(paths, workers):
+    """Split paths into batches small enough to keep every worker busy."""
+    size = max(1, min(PARALLEL_CHUNK_SIZE, len(paths) // (workers * 4)))
+    return [paths[i:i + size] for i in range(0, len(paths), size)]
+
+
+def _extract_all(paths, workers, max_file_size=None, executor=None, with_records=False):
+    """
+    Yield a FileImports record for every path, on a process pool if worthwhile.
+
+    With with_records, yield (FileImports, [(line, dotted module)]) pairs
+    instead. A caller-owned executor (shared by several scans) is used
+    whenever given.
+    """
+    extract = _extract_one_with_records if with_records else _extract_one
+    task = partial(_extract_imports_from_batch, max_file_size=max_file_size, with_records=with_records)
+    if executor is not None and paths:
+        workers = getattr(executor, "_max_workers", None) or os.cpu_count() or 1
+        for results in executor.map(task, _chunk(paths, workers)):
+            yield from results
+        return
+
+    if workers == 0:
+        workers = os.cpu_count() or 1
+    if not workers or workers <= 1 or len(paths) < PARALLEL_MIN_FILES:
+        for path in paths:
+            yield extract(path, max_file_size)
+        return
+
+    from concurrent.futures import ProcessPoolExecutor
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for results in pool.map(task, _chunk(paths, workers)):
+            yield from results
+
+
+def iter_project_imports(
+    root_dir,
+    exclude_dirs=None,
+    workers=None,
+    cache=None,
+    max_file_size=None,
+    files=None,
+    executor=None,
+    progress=None,
+    content_cache=None,
+    import_records=None,
+):
+    """
+    Yield a FileImports(path, imports, error) record per file as it is done.
+
+    The tree is walked first; files answered by the ImportCache are yielded
+    straight away, then those a ContentCache knows by their bytes' digest,
+    then the rest as they are parsed (serially, or chunk by chunk from a
+    process pool, see scan_project). progress, if given, is called as
+    progress(done, total) after every record. The cache is pruned of
+    vanished files once the generator is exhausted; the content cache only
+    queues new entries (flushing it is left to the caller). Pass a dict as
+    import_records to receive [(line, dotted module)] for every file that is
+    actually parsed, from the same read.
+    """
+    if files is None:
+        files = ProjectFiles(root_dir, EXCLUDE_DIRS_DEFAULT if exclude_dirs is None else exclude_dirs)
+    with profiling.phase("walk"):
+        paths = list(files)
+
+    total, done = len(paths), 0
+    to_parse = []
+    stats = {}
+    for path in paths:
+        if cache is None:
+            to_parse.append(path)
+            continue
         try:
-            tree = ast.parse(f.read(), filename=filepath)
-        except SyntaxError:
-            return set()
+            stats[path] = os.stat(path)
+        except OSError:
+            to_parse.append(path)
+            continue
+        cached = cache.get(path, stats[path])
+        if cached is None:
+            to_parse.append(path)
+            continue
+        done += 1
+        yield FileImports(path, cached, None)
+        if progress is not None:
+            progress(done, total)
 
-    imports = set()
-    for node in ast.walk(tree):
-        if isinstance(node, ast.Import):
-            for alias in node.names:
-                imports.add(alias.name.split(".")[0])
-        elif isinstance(node, ast.ImportFrom) and node.module:
-            imports.add(node.module.split(".")[0])
-    return imports
+    cache_misses = len(to_parse)
+    digests = {}
+    if content_cache is not None and to_parse:
+        from auto_reqs.content_cache import file_digest
+
+        with profiling.phase("content cache lookup", files=len(to_parse)):
+            for path in to_parse:
+                try:
+                    digests[path] = file_digest(path)
+                except OSError:
+                    pass
+            found = content_cache.get_many(digests.values())
+        remaining = []
+        for path in to_parse:
+            imports = found.get(digests.get(path))
+            if imports is None:
+                remaining.append(path)
+                continue
+            if cache is not None and path in stats:
+                cache.put(path, stats[path], imports)
+            done += 1
+            yield FileImports(path, imports, None)
+            if progress is not None:
+                progress(done, total)
+        to_parse = remaining
 
+    with profiling.phase("parse", files=len(to_parse)):
+        for record in _extract_all(to_parse, workers, max_file_size, executor, import_records is not None):
+            if import_records is not None:
+                record, lines = record
+                import_records[record.path] = lines
+            if cache is not None and record.error is None and record.path in stats:
+                cache.put(record.path, stats[record.path], record.imports)
+            if record.error is None and record.path in digests:
+                content_cache.put(digests[record.path], record.imports)
+            done += 1
+            yield record
+            if progress is not None:
+                progress(done, total)
 
-def scan_project_for_imports(root_dir, exclude_dirs=None):
-    """Recursively scan the given directory for Python imports."""
-    if exclude_dirs is None:
-        exclude_dirs = EXCLUDE_DIRS_DEFAULT
+    if profiling.enabled():
+        profiling.count("files visited", total)
+        profiling.count("files parsed", len(to_parse))
+        profiling.count("bytes read", sum(_size(p, stats) for p in to_parse))
+        if cache is not None:
+            profiling.count("import cache hits", total - cache_misses)
+            profiling.count("import cache misses", cache_misses)
+    if cache is not None:
+        cache.prune(paths)
+
+
+def _size(path, stats):
+    st = stats.get(path)
+    if st is not None:
+        return st.st_size
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return 0
+
+
+def scan_project(
+    root_dir,
+    exclude_dirs=None,
+    workers=None,
+    cache=None,
+    max_file_size=None,
+    source_roots=None,
+    files=None,
+    executor=None,
+    per_file=None,
+    progress=None,
+    on_new_imports=None,
+    content_cache=None,
+    import_records=None,
+):
+    """
+    Scan the given directory and return a ScanResult of its imports and of
+    the local module names its own files provide, gathered in one walk.
+
+    exclude_dirs holds names or gitignore-style patterns; .gitignore files
+    are honoured too. Pass a ProjectFiles listing to reuse a walk that has
+    already started (e.g. during validate_repo_path), and an executor to
+    share one process pool between several scans.
+
+    With workers > 1 (or 0 for one per CPU) files are parsed on a process
+    pool; small trees are always scanned serially. When an ImportCache is
+    given, only new or changed files are parsed and the cache is updated in
+    place (saving it is left to the caller); a ContentCache is consulted
+    next, for files the ImportCache does not know. Files above max_file_size
+    bytes are scanned as a bounded stream. Pass a dict as per_file to also
+    receive each file's own imports, and one as import_records to receive
+    the (line, dotted module) records of every file that is parsed.
+
+    on_new_imports(names, local_modules) is called whenever files bring up
+    import names not seen before, while the scan is still running, so later
+    stages can start on them early (see iter_project_imports for progress).
+    """
+    if files is None:
+        files = ProjectFiles(root_dir, EXCLUDE_DIRS_DEFAULT if exclude_dirs is None else exclude_dirs)
+    with profiling.phase("walk"):
+        paths = list(files)
+    local_modules = collect_local_modules(paths, root_dir, source_roots, files.project_dirs)
 
     all_imports = set()
-    for root, dirs, files in os.walk(root_dir):
-        dirs[:] = [d for d in dirs if d not in exclude_dirs and not d.startswith(".")]
-        for file in files:
-            if file.endswith(".py"):
-                path = os.path.join(root, file)
-                all_imports.update(extract_imports_from_file(path))
-    return all_imports
+    records = iter_project_imports(
+        root_dir, workers=workers, cache=cache, max_file_size=max_file_size,
+        files=files, executor=executor, progress=progress, content_cache=content_cache,
+        import_records=import_records,
+    )
+    for record in records:
+        if per_file is not None:
+            per_file[record.path] = set(record.imports)
+        new = record.imports - all_imports
+        if new:
+            all_imports |= new
+            if on_new_imports is not None:
+                on_new_imports(new, local_modules)
+    return ScanResult(all_imports, local_modules)
+
+
+def scan_project_for_imports(root_dir, exclude_dirs=None, workers=None, cache=None, max_file_size=None):
+    """Recursively scan the given directory for Python imports (see iter_project_imports)."""
+    imports = set()
+    for record in iter_project_imports(root_dir, exclude_dirs, workers, cache, max_file_size):
+        imports.update(record.imports)
+    return imports
 
 if __name__ == "__main__":
     import sys
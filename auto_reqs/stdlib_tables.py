@@ -0,0 +1,85 @@
+import functools
+import json
+import os
+
+# Frozen per-version stdlib tables, regenerated with
+# `python -m auto_reqs.stdlib_tables` (needs stdlib-list).
+TABLES_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "stdlib_modules.json")
+TABLES_FORMAT = 1
+
+# Versions the shipped tables cover when regenerated.
+TABLE_VERSIONS = ("3.8", "3.9", "3.10", "3.11", "3.12", "3.13", "3.14")
+
+# Corrections to stdlib-list's documentation-derived data: modules every
+# CPython has but some of its lists omit, and names that are build
+# artifacts or (like sys.stdlib_module_names) too easily a local package.
+ALWAYS_STDLIB = {"nt", "pyexpat"}
+NOT_STDLIB = {"lib", "test", "xxlimited", "xxsubtype"}
+
+
+@functools.lru_cache(maxsize=1)
+def _load():
+    try:
+        with open(TABLES_FILE, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return (), {}
+    if data.get("format") != TABLES_FORMAT:
+        return (), {}
+    return tuple(data["versions"]), data["tables"]
+
+
+def table_versions():
+    """Python versions ("X.Y") with a shipped stdlib table."""
+    return _load()[0]
+
+
+@functools.lru_cache(maxsize=None)
+def stdlib_module_names(version):
+    """
+    Frozenset of public top-level stdlib module names of Python version
+    "X.Y", or None when no table ships for it. Private "_" modules are not
+    listed; the classifier treats every one of them as stdlib.
+    """
+    versions, tables = _load()
+    if version not in versions:
+        return None
+    bit = 1 << versions.index(version)
+    names = set()
+    for mask, group in tables.items():
+        if int(mask, 16) & bit:
+            names.update(group)
+    return frozenset(names)
+
+
+def build_tables(versions=TABLE_VERSIONS):
+    """
+    Build the table data from stdlib-list: every name is stored once, in
+    the group of versions (a hex bitmask over versions) that have it.
+    """
+    from stdlib_list import stdlib_list
+
+    present = [
+        {name.split(".")[0] for name in stdlib_list(version) if not name.startswith("_")} - NOT_STDLIB
+        for version in versions
+    ]
+    masks = {}
+    for name in set().union(*present, ALWAYS_STDLIB):
+        bits = [name in ALWAYS_STDLIB or name in names for names in present]
+        # Close gaps: a module in the lists before and after a version was in it too.
+        first, last = bits.index(True), len(bits) - 1 - bits[::-1].index(True)
+        mask = sum(1 << i for i in range(first, last + 1))
+        masks.setdefault(f"{mask:x}", []).append(name)
+    return {
+        "format": TABLES_FORMAT,
+        "versions": list(versions),
+        "tables": {mask: sorted(names) for mask, names in sorted(masks.items(), key=lambda item: -len(item[1]))},
+    }
+
+
+if __name__ == "__main__":
+    os.makedirs(os.path.dirname(TABLES_FILE), exist_ok=True)
+    with open(TABLES_FILE, "w", encoding="utf-8") as f:
+        json.dump(build_tables(), f, separators=(",", ":"))
+        f.write("\n")
+    print(f"Wrote {TABLES_FILE}")
@@ -1,47 +1,60 @@
-import os
-from auto_reqs.classifier import is_stdlib, is_local_module
-from auto_reqs.resolver import resolve_import_to_pkg
+from auto_reqs import profiling
+from auto_reqs.classifier import classify_many
+from auto_reqs.requirements import HEADER, RequirementsFile, write_text_if_changed
 from auto_reqs.utils import normalize_pkg_name
 
 
 def load_requirements(path):
-    """Load existing requirements into a dict of {package_name: version}."""
-    reqs = {}
-    if not os.path.exists(path):
-        return reqs
-    with open(path, "r", encoding="utf-8") as f:
-        for line in f:
-            line = line.strip()
-            if not line or line.startswith("#"):
-                continue
-            if "==" in line:
-                name, version = line.split("==", 1)
-                reqs[normalize_pkg_name(name)] = version
-            else:
-                reqs[normalize_pkg_name(line)] = None
-    return reqs
+    """
+    Load existing requirements (following -r includes) into a dict of
+    {package_name: version}; version is None unless pinned with ==.
+    """
+    return RequirementsFile.load(path).requirements()
 
 
 def write_requirements(requirements, path):
-    """Write the final sorted requirements.txt file."""
-    with open(path, "w", encoding="utf-8") as f:
-        f.write("# Automatically maintained by auto-reqs\n")
-        for name, version in sorted(requirements.items()):
-            if version:
-                f.write(f"{name}=={version}\n")
-            else:
-                f.write(f"{name}\n")
+    """Write the final sorted requirements.txt file, unless it already has this content."""
+    lines = [HEADER]
+    for name, version in sorted(requirements.items()):
+        lines.append(f"{name}=={version}\n" if version else f"{name}\n")
+    with profiling.phase("write requirements"):
+        return write_text_if_changed(path, "".join(lines))
 
 
-def determine_changes(imports, installed, requirements, resolver, repo_path):
+def determine_changes(
+    imports,
+    installed,
+    requirements,
+    resolver,
+    repo_path,
+    index=None,
+    max_workers=None,
+    local_modules=None,
+    graph=None,
+    prune_transitive=False,
+    transitive=None,
+    python_version=None,
+):
     """
     Compare imports vs requirements and detect missing or unused packages.
     Filters out stdlib and local modules, normalizes all names.
     Dynamically imports helpers at runtime so monkeypatches take effect.
+    The import-to-distribution ResolverIndex is built once unless one is given,
+    and missing packages are looked up with `resolver` as one concurrent batch.
+    Pass the scanner's local_modules index to avoid probing repo_path on disk.
+    installed and index may also be zero-argument callables; they are only
+    evaluated when some import is not pinned yet.
+
+    Without a graph, every requirement that no import resolves to is unused.
+    With a DependencyGraph (or a callable returning one), requirements that
+    an imported distribution needs at runtime are kept, unless
+    prune_transitive is set; they are recorded in the optional transitive
+    dict as {requirement: imported distribution that needs it}.
+    python_version classifies stdlib modules for that target version.
     """
     # --- Dynamic imports (ensures test patches are honored) ---
-    from auto_reqs.classifier import is_stdlib, is_local_module
-    from auto_reqs.resolver import resolve_import_to_pkg
+    from auto_reqs.classifier import LOCAL, STDLIB, classify_many
+    from auto_reqs.resolver import DEFAULT_MAX_WORKERS, ResolverIndex, resolve_many
     from auto_reqs.utils import normalize_pkg_name
 
     missing, unused = [], []
@@ -53,40 +66,66 @@ def determine_changes(imports, installed, requirements, resolver, repo_path):
         return normalize_pkg_name(name).lower().replace("_", "-")
 
     # Normalize all dict keys for consistent comparison
-    installed_norm = {norm(k): v for k, v in installed.items()}
     requirements_norm = {norm(k): v for k, v in requirements.items()}
 
-    # Filter and normalize imports
+    # Filter and normalize imports (third-party and unknown names remain)
+    verdicts = classify_many(imports, repo_path, local_modules=local_modules, python_version=python_version)
     imports_norm = {
         norm(i)
-        for i in imports
-        if not is_stdlib(i)
-        and not is_local_module(i, repo_path)
-        and not i.startswith("_")
+        for i, kind in verdicts.items()
+        if kind not in (STDLIB, LOCAL) and not i.startswith("_")
     }
 
     # --- Detect missing packages ---
-    for pkg in sorted(imports_norm):
-        if pkg not in requirements_norm:
-            resolved = norm(resolve_import_to_pkg(pkg))
-            version = (
-                installed_norm.get(resolved)
-                or installed_norm.get(pkg)
-                or resolver(resolved)
-                or resolver(pkg)
-            )
-            if version:
-                requirements[resolved] = version
-                requirements_norm[resolved] = version
-                missing.append((resolved, version))
-            else:
-                print(f"Warning: Could not find version for '{pkg}'")
+    # Distributions the code imports, by requirement name.
+    imported = {pkg for pkg in imports_norm if pkg in requirements_norm}
+    pending = [pkg for pkg in sorted(imports_norm) if pkg not in requirements_norm]
+    resolved_versions = {}
+    if pending:
+        if callable(installed):
+            installed = installed()
+        if callable(index):
+            index = index()
+        if index is None:
+            index = ResolverIndex.from_metadata()
+        # An import provided by a required distribution of another name
+        # (yaml -> pyyaml) is already satisfied.
+        provided = {pkg: norm(index.resolve(pkg) or pkg) for pkg in pending}
+        imported.update(dist for dist in provided.values() if dist in requirements_norm)
+        pending = [pkg for pkg in pending if provided[pkg] not in requirements_norm]
+        installed_norm = {norm(k): v for k, v in installed.items()}
+        resolved_versions = resolve_many(
+            pending,
+            installed_norm,
+            fetch_version=resolver,
+            index=index,
+            max_workers=max_workers or DEFAULT_MAX_WORKERS,
+        )
+    for pkg in pending:
+        resolved, version = resolved_versions[pkg]
+        resolved = norm(resolved)
+        if version:
+            requirements[resolved] = version
+            requirements_norm[resolved] = version
+            imported.add(resolved)
+            missing.append((resolved, version))
+        else:
+            print(f"Warning: Could not find version for '{pkg}'")
 
     # --- Detect unused packages ---
-    imports_set = set(imports_norm)
-    for pkg in list(requirements.keys()):
-        if norm(pkg) not in imports_set:
-            unused.append(pkg)
-            del requirements[pkg]
+    candidates = [pkg for pkg in requirements if norm(pkg) not in imported]
+    needed = 0
+    if candidates and graph is not None:
+        if callable(graph):
+            graph = graph()
+        needed = graph.closure(imported)
+    for pkg in candidates:
+        if needed and graph.contains(needed, norm(pkg)):
+            if transitive is not None:
+                transitive[pkg] = graph.required_by(norm(pkg), imported)
+            if not prune_transitive:
+                continue
+        unused.append(pkg)
+        del requirements[pkg]
 
     return missing, unused
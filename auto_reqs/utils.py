@@ -1,12 +1,21 @@
 import os
 import sys
 
-def validate_repo_path(repo_path):
-    """Ensure target directory exists and contains .py files."""
+def validate_repo_path(repo_path, files=None):
+    """
+    Ensure target directory exists and contains .py files.
+
+    The check stops at the first .py file. Pass the ProjectFiles listing the
+    scan will use so the walk started here is reused rather than repeated.
+    """
+    from auto_reqs.walker import ProjectFiles
+
     if not os.path.exists(repo_path):
         print(f"Error: Path '{repo_path}' does not exist.")
         sys.exit(1)
-    if not any(fname.endswith(".py") for _, _, files in os.walk(repo_path) for fname in files):
+    if files is None:
+        files = ProjectFiles(repo_path)
+    if not files.has_python_files():
         print("No Python files found in target directory.")
         sys.exit(0)
     return os.path.abspath(repo_path)
@@ -0,0 +1,271 @@
+import os
+import re
+
+GITIGNORE_FILE = ".gitignore"
+# Files marking a nested project whose directory is itself a source root.
+PROJECT_MARKERS = ("setup.py", "setup.cfg", "pyproject.toml")
+
+
+def _translate(pattern):
+    """Translate the body of a gitignore pattern into a regex for posix paths."""
+    out = []
+    i, n = 0, len(pattern)
+    while i < n:
+        if pattern.startswith("**/", i):
+            out.append("(?:.*/)?")
+            i += 3
+        elif pattern.startswith("/**", i) and i + 3 == n:
+            out.append("/.*")
+            i += 3
+        elif pattern.startswith("**", i):
+            out.append(".*")
+            i += 2
+        elif pattern[i] == "*":
+            out.append("[^/]*")
+            i += 1
+        elif pattern[i] == "?":
+            out.append("[^/]")
+            i += 1
+        elif pattern[i] == "[":
+            end = pattern.find("]", i + 2)
+            if end < 0:
+                out.append(re.escape("["))
+                i += 1
+                continue
+            body = pattern[i + 1:end]
+            if body.startswith("!"):
+                body = "^" + body[1:]
+            out.append(f"[{body}]")
+            i = end + 1
+        elif pattern[i] == "\\" and i + 1 < n:
+            out.append(re.escape(pattern[i + 1]))
+            i += 2
+        else:
+            out.append(re.escape(pattern[i]))
+            i += 1
+    return "".join(out)
+
+
+def parse_pattern(line):
+    """
+    Parse one gitignore line into (regex, negate, dir_only), or None.
+
+    Patterns without an inner slash match a name at any depth; patterns with
+    one are anchored to the directory the pattern list belongs to.
+    """
+    line = line.rstrip("\n\r")
+    if not line.endswith("\\ "):
+        line = line.rstrip(" ")
+    if not line or line.startswith("#"):
+        return None
+    negate = line.startswith("!")
+    if negate:
+        line = line[1:]
+    elif line.startswith("\\"):
+        line = line[1:]
+    dir_only = line.endswith("/")
+    line = line.rstrip("/")
+    if not line:
+        return None
+    anchored = "/" in line
+    line = line.lstrip("/")
+    prefix = "" if anchored else "(?:.*/)?"
+    return f"{prefix}{_translate(line)}", negate, dir_only
+
+
+class PathMatcher:
+    """
+    Gitignore-style patterns compiled once and matched against relative paths.
+
+    base is the posix path (relative to the walk root) of the directory the
+    patterns belong to. Without negations every pattern is folded into one
+    regex; otherwise rules are checked last-to-first, as git does.
+    """
+
+    def __init__(self, patterns=(), base=""):
+        self.base = base.strip("/")
+        self.rules = [r for r in map(parse_pattern, patterns) if r]
+        self.has_negation = any(negate for _, negate, _ in self.rules)
+        if self.has_negation:
+            self._compiled = [(re.compile(rx + "$"), neg, d) for rx, neg, d in self.rules]
+        else:
+            self._any = self._combine(rx for rx, _, d in self.rules if not d)
+            self._dirs = self._combine(rx for rx, _, d in self.rules if d)
+
+    @staticmethod
+    def _combine(regexes):
+        regexes = list(regexes)
+        return re.compile("(?:" + "|".join(regexes) + ")$") if regexes else None
+
+    @classmethod
+    def from_file(cls, path, base=""):
+        """Load patterns from a .gitignore-style file (empty if unreadable)."""
+        try:
+            with open(path, "r", encoding="utf-8", errors="ignore") as f:
+                return cls(f.readlines(), base)
+        except OSError:
+            return cls((), base)
+
+    def __bool__(self):
+        return bool(self.rules)
+
+    def match(self, rel_path, is_dir):
+        """
+        Return True if rel_path is ignored, False if a negation re-includes it,
+        or None if no pattern applies.
+        """
+        if self.base:
+            if not rel_path.startswith(self.base + "/"):
+                return None
+            rel_path = rel_path[len(self.base) + 1:]
+        if not self.has_negation:
+            if self._any is not None and self._any.match(rel_path):
+                return True
+            if is_dir and self._dirs is not None and self._dirs.match(rel_path):
+                return True
+            return None
+        for regex, negate, dir_only in reversed(self._compiled):
+            if dir_only and not is_dir:
+                continue
+            if regex.match(rel_path):
+                return not negate
+        return None
+
+
+class ProjectFiles:
+    """
+    Lazily walked, memoized listing of a project's .py files.
+
+    The tree is walked once with os.scandir, pruning hidden directories and
+    anything matched by the exclude patterns or by .gitignore files (nested
+    ones included). Files are produced on demand, so a caller can stop after
+    the first one (see has_python_files) while later iterations replay the
+    cached prefix and continue the same walk. Directories holding one of the
+    markers (PROJECT_MARKERS by default) are collected in project_dirs, and
+    every directory visited in directories, as a side effect.
+    """
+
+    def __init__(self, root, exclude=(), use_gitignore=True, markers=PROJECT_MARKERS):
+        self.root = os.path.abspath(root)
+        self.use_gitignore = use_gitignore
+        self.markers = markers
+        self.exclude = PathMatcher(exclude)
+        self.project_dirs = set()
+        self.directories = []
+        self._files = []
+        self._walker = self._walk()
+        self._done = False
+
+    def _ignored(self, rel_path, is_dir, matchers):
+        # Deeper .gitignore files override shallower ones; excludes always win.
+        if self.exclude.match(rel_path, is_dir):
+            return True
+        for matcher in reversed(matchers):
+            verdict = matcher.match(rel_path, is_dir)
+            if verdict is not None:
+                return verdict
+        return False
+
+    def _root_matchers(self):
+        matchers = []
+        if self.use_gitignore:
+            for path in (os.path.join(self.root, ".git", "info", "exclude"), os.path.join(self.root, GITIGNORE_FILE)):
+                matcher = PathMatcher.from_file(path)
+                if matcher:
+                    matchers.append(matcher)
+        return matchers
+
+    def ignores(self, path):
+        """
+        True if the walk would skip path, checked without walking the tree.
+
+        Used to vet single files that appear after the walk (e.g. in watch
+        mode); .gitignore files along path's parents are read on each call.
+        """
+        rel = os.path.relpath(os.path.abspath(path), self.root).replace(os.sep, "/")
+        parts = rel.split("/")
+        if parts[0] == ".." or any(p.startswith(".") for p in parts[:-1]):
+            return True
+        matchers = self._root_matchers()
+        for i in range(1, len(parts) + 1):
+            rel_path = "/".join(parts[:i])
+            is_dir = i < len(parts)
+            if self._ignored(rel_path, is_dir, matchers):
+                return True
+            gitignore = os.path.join(self.root, rel_path, GITIGNORE_FILE)
+            if is_dir and self.use_gitignore and os.path.isfile(gitignore):
+                matchers = matchers + [PathMatcher.from_file(gitignore, rel_path)]
+        return False
+
+    def _walk(self):
+        stack = [(self.root, "", self._root_matchers())]
+        while stack:
+            dir_path, rel_dir, matchers = stack.pop()
+            try:
+                with os.scandir(dir_path) as it:
+                    entries = list(it)
+            except OSError:
+                continue
+
+            self.directories.append(dir_path)
+            names = {e.name for e in entries}
+            if any(m in names for m in self.markers):
+                self.project_dirs.add(dir_path)
+            if self.use_gitignore and rel_dir and GITIGNORE_FILE in names:
+                matcher = PathMatcher.from_file(os.path.join(dir_path, GITIGNORE_FILE), rel_dir)
+                if matcher:
+                    matchers = matchers + [matcher]
+
+            subdirs = []
+            filtered = bool(matchers) or bool(self.exclude)
+            prefix = f"{rel_dir}/" if rel_dir else ""
+            for entry in entries:
+                name = entry.name
+                try:
+                    is_dir = entry.is_dir(follow_symlinks=False)
+                except OSError:
+                    continue
+                if is_dir:
+                    if name.startswith("."):
+                        continue
+                    rel_path = prefix + name
+                    if not filtered or not self._ignored(rel_path, True, matchers):
+                        subdirs.append((entry.path, rel_path, matchers))
+                elif name.endswith(".py"):
+                    if not filtered or not self._ignored(prefix + name, False, matchers):
+                        yield entry.path
+            stack.extend(reversed(subdirs))
+
+    def __iter__(self):
+        i = 0
+        while True:
+            if i < len(self._files):
+                yield self._files[i]
+                i += 1
+            elif self._done:
+                return
+            else:
+                try:
+                    self._files.append(next(self._walker))
+                except StopIteration:
+                    self._done = True
+
+    def has_python_files(self):
+        """True if the project contains at least one .py file (stops at the first)."""
+        return next(iter(self), None) is not None
+
+
+def marker_dirs(paths, root, markers=PROJECT_MARKERS):
+    """
+    Return the directories from root down to each of paths that hold one of
+    the markers: the project_dirs a ProjectFiles walk would record for those
+    files, found by checking their parent directories instead of walking.
+    """
+    root = os.path.abspath(root)
+    parents = set()
+    for path in paths:
+        parent = os.path.dirname(os.path.abspath(path))
+        while parent not in parents and (parent == root or parent.startswith(root + os.sep)):
+            parents.add(parent)
+            parent = os.path.dirname(parent)
+    return {d for d in parents if any(os.path.exists(os.path.join(d, m)) for m in markers)}
@@ -0,0 +1,309 @@
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import time
+from collections import Counter
+from auto_reqs.classifier import LOCAL, STDLIB, classify_many
+from auto_reqs.pipeline import apply_changes, print_report, project_files, scan_for_update
+from auto_reqs.scanner import ScanResult, collect_local_modules, extract_imports_from_file
+
+# Quiet period after the last event before a batch of changes is applied.
+DEBOUNCE_SECONDS = 0.3
+# How often the polling watcher re-stats the tree.
+POLL_INTERVAL = 1.0
+
+# Returned by a watcher when events were lost and the tree must be rescanned.
+RESCAN = object()
+
+# inotify(7) event bits.
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+
+_EVENT = struct.Struct("iIII")
+
+
+class ImportTally:
+    """
+    Imports of every file, plus how many files use each name.
+
+    A name stays in names() until the last file importing it stops doing so.
+    """
+
+    def __init__(self):
+        self.files = {}
+        self.counts = Counter()
+
+    def set_file(self, path, imports):
+        """Record path's current imports."""
+        old = self.files.get(path, set())
+        new = set(imports)
+        for name in old - new:
+            self.counts[name] -= 1
+            if not self.counts[name]:
+                del self.counts[name]
+        for name in new - old:
+            self.counts[name] += 1
+        self.files[path] = new
+
+    def remove_file(self, path):
+        """Forget path and its imports."""
+        self.set_file(path, ())
+        del self.files[path]
+
+    def names(self):
+        return set(self.counts)
+
+
+class PollingWatcher:
+    """Detect changed .py files by re-walking the tree and comparing stats."""
+
+    def __init__(self, make_files):
+        self.make_files = make_files
+        self.snapshot = self._snapshot()
+
+    def _snapshot(self):
+        snapshot = {}
+        for path in self.make_files():
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            snapshot[path] = (st.st_mtime_ns, st.st_size)
+        return snapshot
+
+    def watch(self, directories):
+        pass
+
+    def changes(self, timeout):
+        """Wait timeout seconds and return the paths that changed meanwhile."""
+        time.sleep(timeout)
+        old, self.snapshot = self.snapshot, self._snapshot()
+        return {p for p in old.keys() | self.snapshot.keys() if old.get(p) != self.snapshot.get(p)}
+
+    def close(self):
+        pass
+
+
+def _load_libc():
+    """Return libc with inotify bound, or None where inotify is unavailable."""
+    if not sys.platform.startswith("linux"):
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        libc.inotify_init1.argtypes = [ctypes.c_int]
+        libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        libc.inotify_rm_watch.argtypes = [ctypes.c_int, ctypes.c_int]
+    except (OSError, AttributeError):
+        return None
+    return libc
+
+
+class InotifyWatcher:
+    """
+    Detect changed .py files with inotify, one watch per walked directory.
+
+    Directories created later are watched as they appear, and the .py files
+    already inside them are reported. A queue overflow, or a directory moved
+    away (its watches would keep reporting under the old path), returns RESCAN.
+    """
+
+    def __init__(self, files, libc=None):
+        self.files = files
+        self.libc = libc or _load_libc()
+        if self.libc is None:
+            raise OSError("inotify is not available")
+        self.fd = self.libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.watches = {}
+        self.watch(files.directories)
+
+    def watch(self, directories):
+        """Add watches for directories (re-adding an existing one is harmless)."""
+        for path in directories:
+            wd = self.libc.inotify_add_watch(self.fd, os.fsencode(path), WATCH_MASK)
+            if wd >= 0:
+                self.watches[wd] = path
+
+    def _add_tree(self, top):
+        found = set()
+        for dir_path, dirnames, filenames in os.walk(top):
+            dirnames[:] = [d for d in dirnames if not self.files.ignores(os.path.join(dir_path, d))]
+            self.watch([dir_path])
+            found.update(os.path.join(dir_path, f) for f in filenames if f.endswith(".py"))
+        return found
+
+    def _drop_tree(self, top):
+        """Remove the watches on top and every directory below it."""
+        prefix = os.path.join(top, "")
+        for wd, path in list(self.watches.items()):
+            if path == top or path.startswith(prefix):
+                self.libc.inotify_rm_watch(self.fd, wd)
+                del self.watches[wd]
+
+    def changes(self, timeout):
+        """Wait up to timeout seconds; return changed paths (or RESCAN)."""
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return set()
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return set()
+
+        changed = set()
+        offset = 0
+        while offset + _EVENT.size <= len(data):
+            wd, mask, _, length = _EVENT.unpack_from(data, offset)
+            offset += _EVENT.size
+            name = os.fsdecode(data[offset:offset + length].rstrip(b"\0"))
+            offset += length
+            if mask & IN_Q_OVERFLOW:
+                return RESCAN
+            if mask & IN_IGNORED:
+                self.watches.pop(wd, None)
+                continue
+            directory = self.watches.get(wd)
+            if directory is None or not name:
+                continue
+            path = os.path.join(directory, name)
+            if not mask & IN_ISDIR:
+                if name.endswith(".py"):
+                    changed.add(path)
+            elif mask & (IN_CREATE | IN_MOVED_TO):
+                if not self.files.ignores(path):
+                    changed |= self._add_tree(path)
+            elif mask & IN_MOVED_FROM:
+                self._drop_tree(path)
+                return RESCAN
+            else:
+                changed.add(path)
+        return changed
+
+    def close(self):
+        os.close(self.fd)
+
+
+def create_watcher(files, make_files, poll=False):
+    """Return an InotifyWatcher where possible, else a PollingWatcher."""
+    if not poll:
+        try:
+            return InotifyWatcher(files)
+        except OSError:
+            pass
+    return PollingWatcher(make_files)
+
+
+class ProjectWatch:
+    """
+    Keep one project's requirements in sync with its files.
+
+    After one full scan only changed files are re-extracted, and
+    determine_changes runs again only when the project's third-party
+    import set actually changes.
+    """
+
+    def __init__(self, repo_path, config, ctx, dry_run=False, use_cache=True, prune_transitive=False):
+        self.repo_path = repo_path
+        self.config = config
+        self.ctx = ctx
+        self.dry_run = dry_run
+        self.prune_transitive = prune_transitive
+        self.use_cache = use_cache
+        self.tally = ImportTally()
+        self.files = None
+        self.third_party = None
+
+    def scan(self):
+        """Scan the whole tree from scratch and sync; returns a ProjectResult or None."""
+        self.files = project_files(self.repo_path, self.config)
+        per_file = {}
+        scan_for_update(self.repo_path, self.config, files=self.files, use_cache=self.use_cache, per_file=per_file)
+        self.tally = ImportTally()
+        for path, imports in per_file.items():
+            self.tally.set_file(path, imports)
+        return self.sync()
+
+    def update(self, paths):
+        """Re-extract changed paths and sync; returns a ProjectResult or None."""
+        for path in paths:
+            if os.path.isfile(path):
+                if not path.endswith(".py") or self.files.ignores(path):
+                    continue
+                try:
+                    self.tally.set_file(path, extract_imports_from_file(path, self.config.get("max_file_size")))
+                    continue
+                except (OSError, ValueError):
+                    pass
+            prefix = path + os.sep
+            for known in [p for p in self.tally.files if p == path or p.startswith(prefix)]:
+                self.tally.remove_file(known)
+        return self.sync()
+
+    def sync(self):
+        """Re-run determine_changes if the third-party import set changed."""
+        names = self.tally.names()
+        local_modules = collect_local_modules(
+            self.tally.files, self.repo_path, self.config.get("source_roots"), self.files.project_dirs
+        )
+        python_version = self.config.get("target_python")
+        verdicts = classify_many(names, self.repo_path, local_modules=local_modules, python_version=python_version)
+        third_party = {n for n, kind in verdicts.items() if kind not in (STDLIB, LOCAL)}
+        if third_party == self.third_party:
+            return None
+        self.third_party = third_party
+        return apply_changes(
+            self.repo_path, ScanResult(names, local_modules), self.ctx,
+            dry_run=self.dry_run, prune_transitive=self.prune_transitive, python_version=python_version,
+        )
+
+    def run(self, watcher, debounce=DEBOUNCE_SECONDS, interval=POLL_INTERVAL, stop=None, report=print_report):
+        """Apply debounced batches of changes from watcher until stop is set."""
+        pending = set()
+        rescan = False
+        while stop is None or not stop.is_set():
+            changed = watcher.changes(debounce if pending or rescan else interval)
+            if changed is RESCAN:
+                rescan = True
+                continue
+            if changed:
+                pending |= changed
+                continue
+            if rescan:
+                result = self.scan()
+                watcher.watch(self.files.directories)
+                rescan = False
+                pending.clear()
+            elif pending:
+                result = self.update(pending)
+                pending = set()
+            else:
+                continue
+            if result is not None and report is not None:
+                report(result)
+
+
+def watch_project(repo_path, config, ctx, dry_run=False, use_cache=True, poll=False, prune_transitive=False):
+    """Scan repo_path once, then keep its requirements in sync until interrupted."""
+    project = ProjectWatch(repo_path, config, ctx, dry_run=dry_run, use_cache=use_cache, prune_transitive=prune_transitive)
+    print_report(project.scan())
+    watcher = create_watcher(project.files, lambda: project_files(repo_path, config), poll=poll)
+    kind = "polling" if isinstance(watcher, PollingWatcher) else "inotify"
+    print(f"\nWatching for changes ({kind}); press Ctrl+C to stop.")
+    try:
+        project.run(watcher)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        watcher.close()
+        ctx.save()
@@ -0,0 +1,125 @@
+import json
+import os
+import random
+
+STDLIB_IMPORTS = ["os", "sys", "json", "re", "collections", "itertools", "functools", "typing", "pathlib", "logging"]
+THIRD_PARTY_PREFIX = "benchpkg"
+
+
+def _third_party(i):
+    return f"{THIRD_PARTY_PREFIX}_{i}"
+
+
+def _module_source(rng, fanout, local_names, third_party_count):
+    """Source text for one generated module with fanout imports."""
+    lines = ['"""Generated benchmark module."""']
+    for _ in range(fanout):
+        kind = rng.random()
+        if kind < 0.4:
+            lines.append(f"import {rng.choice(STDLIB_IMPORTS)}")
+        elif kind < 0.7 and local_names:
+            lines.append(f"from {rng.choice(local_names)} import helpers")
+        else:
+            lines.append(f"import {_third_party(rng.randrange(third_party_count))}")
+    lines.append("")
+    lines.append('TEMPLATE = """import not_an_import  # inside a string"""')
+    for j in range(rng.randint(3, 12)):
+        lines.append(f"def func_{j}(value):")
+        lines.append("    # import in a comment must be ignored")
+        lines.append(f"    return [value * {j} for _ in range({j})]")
+        lines.append("")
+    return "\n".join(lines) + "\n"
+
+
+def _huge_source(size, third_party_count):
+    """A generated module of roughly size bytes (e.g. a protobuf/data dump)."""
+    header = f"import os\nimport {_third_party(0)}\nimport {_third_party(third_party_count - 1)}\n"
+    row = "    {'id': %d, 'name': 'item-%d', 'tags': ['a', 'b', 'c'], 'value': %d.5},\n"
+    parts = [header, "DATA = [\n"]
+    written, i = len(header), 0
+    while written < size:
+        line = row % (i, i, i)
+        parts.append(line)
+        written += len(line)
+        i += 1
+    parts.append("]\n")
+    return "".join(parts)
+
+
+def generate_project(
+    root,
+    files=1000,
+    depth=3,
+    fanout=6,
+    packages=10,
+    third_party=50,
+    huge_files=1,
+    huge_size=5 * 1024 * 1024,
+    syntax_errors=5,
+    venv_files=200,
+    seed=0,
+):
+    """
+    Build a synthetic project under root and return a description of it.
+
+    files modules are spread over packages top-level packages nested up to
+    depth directories deep, each with fanout imports drawn from the stdlib,
+    the project's own packages and third_party fake distributions. On top of
+    that come huge_files generated modules of about huge_size bytes,
+    syntax_errors unparsable modules and a venv/ tree of venv_files modules
+    that a scan must skip. The returned dict also names a JSON index
+    snapshot (usable as a file:// index URL) listing most fake distributions.
+    """
+    rng = random.Random(seed)
+    os.makedirs(root, exist_ok=True)
+    local_names = [f"pkg{i}" for i in range(packages)]
+
+    dirs = []
+    for name in local_names:
+        path = os.path.join(root, name)
+        for level in range(rng.randint(1, max(1, depth))):
+            os.makedirs(path, exist_ok=True)
+            with open(os.path.join(path, "__init__.py"), "w", encoding="utf-8") as f:
+                f.write("")
+            dirs.append(path)
+            path = os.path.join(path, f"sub{level}")
+
+    for i in range(files):
+        path = os.path.join(rng.choice(dirs), f"module_{i}.py")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(_module_source(rng, fanout, local_names, third_party))
+
+    for i in range(huge_files):
+        with open(os.path.join(root, f"generated_data_{i}.py"), "w", encoding="utf-8") as f:
+            f.write(_huge_source(huge_size, third_party))
+
+    for i in range(syntax_errors):
+        with open(os.path.join(rng.choice(dirs), f"broken_{i}.py"), "w", encoding="utf-8") as f:
+            f.write(f"import {_third_party(i % third_party)}\ndef broken(:\n    return (\n")
+
+    site_packages = os.path.join(root, "venv", "lib", "python3", "site-packages", "vendored")
+    os.makedirs(site_packages, exist_ok=True)
+    for i in range(venv_files):
+        with open(os.path.join(site_packages, f"dep_{i}.py"), "w", encoding="utf-8") as f:
+            f.write(f"import venv_only_{i}\n")
+
+    # Every tenth fake distribution is missing from the index, as unknown
+    # imports are in real projects.
+    snapshot = os.path.join(root, "index-snapshot.json")
+    with open(snapshot, "w", encoding="utf-8") as f:
+        json.dump({_third_party(i): f"1.{i}.0" for i in range(third_party) if i % 10 != 9}, f)
+
+    return {
+        "root": os.path.abspath(root),
+        "index_url": "file://" + os.path.abspath(snapshot),
+        "files": files,
+        "depth": depth,
+        "fanout": fanout,
+        "packages": packages,
+        "third_party": third_party,
+        "huge_files": huge_files,
+        "huge_size": huge_size,
+        "syntax_errors": syntax_errors,
+        "venv_files": venv_files,
+        "seed": seed,
+    }
@@ -0,0 +1,164 @@
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from auto_reqs.classifier import LOCAL, STDLIB, ModuleClassifier
+from auto_reqs.config import DEFAULT_CONFIG
+from auto_reqs.local_index import open_local_index
+from auto_reqs.resolver import ResolverIndex, resolve_many
+from auto_reqs.scanner import scan_project, scan_project_for_imports
+from auto_reqs.updater import write_requirements
+from benchmarks.generate import generate_project
+
+PHASES = ("scan", "classify", "resolve", "write")
+# A phase regresses when it is this many times slower than the baseline.
+DEFAULT_THRESHOLD = 1.25
+
+
+def time_phase(fn, repeat):
+    """Run fn repeat times; return its timings in seconds and the last result."""
+    runs, result = [], None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        runs.append(time.perf_counter() - start)
+    return {"min": min(runs), "median": statistics.median(runs), "runs": runs}, result
+
+
+def run_benchmarks(project, repeat=3, workers=1, max_file_size=DEFAULT_CONFIG["max_file_size"]):
+    """
+    Time each phase of an update on a generated project (see generate_project).
+
+    Every phase starts cold: scans use no import cache, classification uses
+    a fresh classifier, and version lookups reopen the stand-in index. Files
+    above max_file_size bytes take the streaming path, as in a real run.
+    """
+    root, index_url = project["root"], project["index_url"]
+    phases = {}
+
+    phases["scan"], imports = time_phase(
+        lambda: scan_project_for_imports(root, workers=workers, max_file_size=max_file_size), repeat
+    )
+    local_modules = scan_project(root).local_modules
+
+    def classify():
+        return ModuleClassifier().classify_many(imports, root, local_modules)
+
+    phases["classify"], verdicts = time_phase(classify, repeat)
+    names = sorted(n for n, kind in verdicts.items() if kind not in (STDLIB, LOCAL))
+
+    def resolve():
+        open_local_index.cache_clear()
+        return resolve_many(names, {}, index=ResolverIndex({}), index_url=index_url, max_workers=1)
+
+    phases["resolve"], resolved = time_phase(resolve, repeat)
+    requirements = {pkg: version for pkg, version in resolved.values() if version}
+
+    out_dir = tempfile.mkdtemp(prefix="auto-reqs-bench-")
+    try:
+        out_path = os.path.join(out_dir, "requirements.txt")
+        phases["write"], _ = time_phase(lambda: write_requirements(requirements, out_path), repeat)
+    finally:
+        shutil.rmtree(out_dir, ignore_errors=True)
+
+    return {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "repeat": repeat,
+            "workers": workers,
+            "max_file_size": max_file_size,
+            "project": {k: v for k, v in project.items() if k not in ("root", "index_url")},
+            "imports": len(imports),
+            "third_party": len(names),
+            "resolved": len(requirements),
+        },
+        "phases": phases,
+    }
+
+
+def compare(results, baseline, threshold=DEFAULT_THRESHOLD):
+    """
+    Return [(phase, baseline_s, current_s, ratio)] for every phase whose best
+    time is more than threshold times its baseline.
+    """
+    regressions = []
+    for phase, base in baseline.get("phases", {}).items():
+        current = results["phases"].get(phase)
+        if not current or not base.get("min"):
+            continue
+        ratio = current["min"] / base["min"]
+        if ratio > threshold:
+            regressions.append((phase, base["min"], current["min"], ratio))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark auto-reqs on a synthetic project")
+    parser.add_argument("--files", type=int, default=2000, help="Number of generated modules")
+    parser.add_argument("--depth", type=int, default=3, help="Maximum package nesting depth")
+    parser.add_argument("--fanout", type=int, default=6, help="Imports per module")
+    parser.add_argument("--third-party", type=int, default=50, help="Number of fake distributions")
+    parser.add_argument("--huge-files", type=int, default=1, help="Number of huge generated modules")
+    parser.add_argument("--huge-size-mb", type=float, default=5, help="Size of each huge module")
+    parser.add_argument("--syntax-errors", type=int, default=5, help="Number of unparsable modules")
+    parser.add_argument("--venv-files", type=int, default=200, help="Modules in an excluded venv/ tree")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed for the generator")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs per phase")
+    parser.add_argument("--jobs", "-j", type=int, default=1, help="Scan worker processes")
+    parser.add_argument(
+        "--max-file-size-mb", type=float, default=DEFAULT_CONFIG["max_file_size"] / (1024 * 1024),
+        help="Stream files above this size, like the max_file_size setting",
+    )
+    parser.add_argument("--output", "-o", help="Write results as JSON to this file")
+    parser.add_argument("--baseline", help="Compare against a results JSON file")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="Allowed slowdown ratio")
+    parser.add_argument("--keep", metavar="DIR", help="Generate the project into DIR and keep it")
+    args = parser.parse_args(argv)
+
+    root = args.keep or tempfile.mkdtemp(prefix="auto-reqs-project-")
+    try:
+        project = generate_project(
+            root,
+            files=args.files,
+            depth=args.depth,
+            fanout=args.fanout,
+            third_party=args.third_party,
+            huge_files=args.huge_files,
+            huge_size=int(args.huge_size_mb * 1024 * 1024),
+            syntax_errors=args.syntax_errors,
+            venv_files=args.venv_files,
+            seed=args.seed,
+        )
+        results = run_benchmarks(
+            project, repeat=args.repeat, workers=args.jobs, max_file_size=int(args.max_file_size_mb * 1024 * 1024)
+        )
+    finally:
+        if not args.keep:
+            shutil.rmtree(root, ignore_errors=True)
+
+    for phase in PHASES:
+        timing = results["phases"][phase]
+        print(f"  {phase:<10} min {timing['min'] * 1000:9.2f} ms   median {timing['median'] * 1000:9.2f} ms")
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold)
+        for phase, base, current, ratio in regressions:
+            print(f"REGRESSION {phase}: {base * 1000:.2f} ms -> {current * 1000:.2f} ms ({ratio:.2f}x)")
+        if regressions:
+            sys.exit(1)
+        print(f"No phase slower than {args.threshold:.2f}x the baseline.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+import io
+import json
+import tarfile
+import zipfile
+import pytest
+from auto_reqs import archive, cli
+from auto_reqs.archive import is_archive, iter_archive_imports, scan_archive
+
+MEMBERS = {
+    "mylib/__init__.py": "from mylib import core\n",
+    "mylib/core.py": "import requests\nimport json\n",
+    "mylib/vendor/six.py": "import vendored_only\n",
+    "tests/test_core.py": "import pytest\n",
+    ".hidden/x.py": "import hidden_only\n",
+    "mylib-1.0.dist-info/METADATA": "import not_python\n",
+}
+
+
+def make_zip(path, members, prefix=b""):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as zf:
+        for name, text in members.items():
+            zf.writestr(name, text)
+    path.write_bytes(prefix + buffer.getvalue())
+    return path
+
+
+def make_tar(path, members):
+    with tarfile.open(path, "w:gz") as tf:
+        for name, text in members.items():
+            data = text.encode()
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            tf.addfile(info, io.BytesIO(data))
+    return path
+
+
+class TestScanArchive:
+    def test_wheel_honours_excludes(self, tmp_path):
+        wheel = make_zip(tmp_path / "mylib-1.0-py3-none-any.whl", MEMBERS)
+        scan = scan_archive(wheel, exclude=["vendor", "tests"])
+        assert scan.imports == {"mylib", "requests", "json"}
+        assert scan.local_modules == {"mylib"}
+
+    def test_sdist_patterns_are_relative_to_the_wrapping_directory(self, tmp_path):
+        members = {f"mylib-1.0/{name}": text for name, text in MEMBERS.items()}
+        members["mylib-1.0/src/extra/mod.py"] = "import extra_dep\n"
+        sdist = make_tar(tmp_path / "mylib-1.0.tar.gz", members)
+        scan = scan_archive(sdist, exclude=["/tests", "mylib/vendor/"])
+        assert scan.imports == {"mylib", "requests", "json", "extra_dep"}
+        assert {"mylib", "extra"} <= scan.local_modules
+
+    def test_zipapp_with_shebang(self, tmp_path):
+        pyz = make_zip(tmp_path / "app.pyz", {"__main__.py": "import click\n"}, prefix=b"#!/usr/bin/env python3\n")
+        assert scan_archive(pyz).imports == {"click"}
+
+    def test_large_members_are_streamed(self, tmp_path, monkeypatch):
+        wheel = make_zip(tmp_path / "big.whl", {"big.py": "import os\n" + "x = 1\n" * 100})
+
+        def no_source(data, filename="<unknown>"):
+            raise AssertionError("large member should be streamed")
+
+        monkeypatch.setattr(archive, "extract_imports_from_source", no_source)
+        assert scan_archive(wheel, max_file_size=64).imports == {"os"}
+
+    @pytest.mark.parametrize("kind", ["zip", "tar"])
+    def test_parallel_matches_serial(self, tmp_path, monkeypatch, kind):
+        monkeypatch.setattr(archive, "PARALLEL_MIN_FILES", 1)
+        monkeypatch.setattr(archive, "PARALLEL_CHUNK_SIZE", 2)
+        members = {f"pkg/m{i}.py": f"import dep_{i}\n" for i in range(9)}
+        path = make_zip(tmp_path / "a.zip", members) if kind == "zip" else make_tar(tmp_path / "a.tgz", members)
+        serial = list(iter_archive_imports(str(path)))
+        parallel = list(iter_archive_imports(str(path), workers=2))
+        assert sorted(serial) == sorted(parallel)
+        assert len(parallel) == 9
+
+    def test_is_archive(self, tmp_path):
+        wheel = make_zip(tmp_path / "x.whl", {})
+        assert is_archive(str(wheel))
+        assert not is_archive(str(tmp_path))
+        assert not is_archive(str(tmp_path / "missing.zip"))
+
+
+class TestArchiveCli:
+    def test_prints_requirements_and_writes_nothing(self, tmp_path, monkeypatch, capsys):
+        monkeypatch.setenv("AUTO_REQS_CACHE_DIR", str(tmp_path / "cache"))
+        snapshot = tmp_path / "snapshot.json"
+        snapshot.write_text(json.dumps({"zzarc-pkg": "3.1"}))
+        (tmp_path / "dist").mkdir()
+        wheel = make_zip(tmp_path / "dist" / "thing.whl", {"thing/__init__.py": "import thing.sub\nimport zzarc_pkg\n"})
+
+        cli.main(["scan", str(wheel), "--no-daemon", "--index-url", f"file://{snapshot}"])
+        out = capsys.readouterr().out
+        assert "Requires 1 packages" in out and "zzarc-pkg==3.1" in out
+        assert sorted(p.name for p in (tmp_path / "dist").iterdir()) == ["thing.whl"]
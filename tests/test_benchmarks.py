@@ -0,0 +1,62 @@
+import json
+import pytest
+from auto_reqs import scanner
+from auto_reqs.scanner import scan_project_for_imports
+from benchmarks import run
+from benchmarks.generate import generate_project
+
+
+@pytest.fixture
+def project(tmp_path):
+    return generate_project(
+        tmp_path / "proj", files=30, third_party=10, huge_files=1, huge_size=64 * 1024,
+        syntax_errors=2, venv_files=5,
+    )
+
+
+class TestGenerator:
+    def test_shape(self, project):
+        root = project["root"]
+        imports = scan_project_for_imports(root)
+        assert not any(name.startswith("venv_only") for name in imports)
+        assert {"benchpkg_0", "benchpkg_9"} <= imports
+        assert "not_an_import" not in imports
+        snapshot = json.loads(open(project["index_url"][len("file://"):]).read())
+        assert "benchpkg_9" not in snapshot and "benchpkg_0" in snapshot
+
+    def test_is_deterministic(self, tmp_path):
+        a = generate_project(tmp_path / "a", files=10, huge_files=0, venv_files=0)
+        b = generate_project(tmp_path / "b", files=10, huge_files=0, venv_files=0)
+        assert scan_project_for_imports(a["root"]) == scan_project_for_imports(b["root"])
+
+
+class TestRunBenchmarks:
+    def test_times_every_phase(self, project):
+        results = run.run_benchmarks(project, repeat=1)
+        assert set(results["phases"]) == set(run.PHASES)
+        assert all(len(t["runs"]) == 1 for t in results["phases"].values())
+        assert results["meta"]["resolved"] == 9
+
+    def test_huge_files_take_the_streaming_path(self, project, monkeypatch):
+        streamed = []
+        original = scanner.extract_imports_streaming
+        monkeypatch.setattr(scanner, "extract_imports_streaming", lambda *a: streamed.append(1) or original(*a))
+        results = run.run_benchmarks(project, repeat=1, max_file_size=32 * 1024)
+        assert streamed and results["meta"]["max_file_size"] == 32 * 1024
+
+    def test_compare_flags_slow_phases(self):
+        baseline = {"phases": {"scan": {"min": 1.0}, "write": {"min": 0.1}}}
+        results = {"phases": {"scan": {"min": 1.2}, "write": {"min": 0.2}}}
+        assert run.compare(results, baseline, threshold=1.25) == [("write", 0.1, 0.2, 2.0)]
+
+    def test_main_writes_json_and_fails_on_regression(self, tmp_path, capsys):
+        output = tmp_path / "results.json"
+        args = ["--files", "10", "--huge-files", "0", "--venv-files", "0", "--repeat", "1"]
+        run.main(args + ["--output", str(output)])
+        results = json.loads(output.read_text())
+        for timing in results["phases"].values():
+            timing["min"] /= 1000
+        output.write_text(json.dumps(results))
+        with pytest.raises(SystemExit):
+            run.main(args + ["--baseline", str(output)])
+        assert "REGRESSION" in capsys.readouterr().out
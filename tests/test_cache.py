@@ -0,0 +1,125 @@
+import os
+from auto_reqs.cache import ImportCache, MetadataCache, get_cache_dir, CACHE_DIR_NAME
+from auto_reqs.scanner import scan_project_for_imports
+
+
+class TestImportCache:
+    def test_roundtrip_hit_and_stale(self, tmp_path):
+        """Should return cached imports only while mtime and size are unchanged."""
+        src = tmp_path / "a.py"
+        src.write_text("import os\n")
+        cache_path = tmp_path / "imports.json"
+
+        cache = ImportCache(str(cache_path), "v1")
+        cache.put(src, os.stat(src), {"os"})
+        cache.save()
+
+        loaded = ImportCache.load(str(cache_path), "v1")
+        assert loaded.get(src, os.stat(src)) == {"os"}
+
+        src.write_text("import os, sys\n")
+        assert loaded.get(src, os.stat(src)) is None
+
+    def test_version_mismatch_invalidates(self, tmp_path):
+        """Should discard entries written by a different extractor version."""
+        src = tmp_path / "a.py"
+        src.write_text("import os\n")
+        cache_path = tmp_path / "imports.json"
+
+        cache = ImportCache(str(cache_path), "v1")
+        cache.put(src, os.stat(src), {"os"})
+        cache.save()
+
+        assert ImportCache.load(str(cache_path), "v2").entries == {}
+
+    def test_corrupt_file_yields_empty_cache(self, tmp_path):
+        """Should ignore unreadable cache files."""
+        cache_path = tmp_path / "imports.json"
+        cache_path.write_text("{not json")
+        assert ImportCache.load(str(cache_path), "v1").entries == {}
+
+    def test_get_cache_dir_is_self_ignoring(self, tmp_path):
+        """Should create the cache dir with a catch-all .gitignore."""
+        cache_dir = get_cache_dir(str(tmp_path))
+        assert cache_dir == os.path.join(str(tmp_path), CACHE_DIR_NAME)
+        assert (tmp_path / CACHE_DIR_NAME / ".gitignore").read_text() == "*\n"
+
+
+class TestCachedScan:
+    def test_only_changed_files_are_reparsed(self, tmp_path, monkeypatch):
+        """Should reuse cached results and parse only new or modified files."""
+        (tmp_path / "a.py").write_text("import alpha\n")
+        (tmp_path / "b.py").write_text("import beta\n")
+        cache = ImportCache(str(tmp_path / "cache.json"), "v1")
+        assert scan_project_for_imports(tmp_path, cache=cache) == {"alpha", "beta"}
+
+        parsed = []
+        from auto_reqs import scanner
+        real_extract = scanner.extract_imports_from_file
+
+        def tracking_extract(path, max_file_size=None):
+            parsed.append(os.path.basename(path))
+            return real_extract(path, max_file_size)
+
+        monkeypatch.setattr(scanner, "extract_imports_from_file", tracking_extract)
+        (tmp_path / "b.py").write_text("import gamma\n")
+
+        assert scan_project_for_imports(tmp_path, cache=cache) == {"alpha", "gamma"}
+        assert parsed == ["b.py"]
+
+    def test_deleted_files_are_pruned(self, tmp_path):
+        """Should drop cache entries for files removed from the tree."""
+        (tmp_path / "a.py").write_text("import alpha\n")
+        (tmp_path / "b.py").write_text("import beta\n")
+        cache = ImportCache(str(tmp_path / "cache.json"), "v1")
+        scan_project_for_imports(tmp_path, cache=cache)
+
+        os.remove(tmp_path / "b.py")
+        assert scan_project_for_imports(tmp_path, cache=cache) == {"alpha"}
+        assert list(cache.entries) == [os.path.join(str(tmp_path), "a.py")]
+
+
+class TestMetadataCache:
+    def test_fresh_and_stale_lookups(self, tmp_path):
+        """Should serve entries within the TTL and flag older ones as stale."""
+        cache = MetadataCache(str(tmp_path / "meta.json"), ttl=3600)
+        cache.store("url", True, "1.0", etag='"abc"')
+        entry, fresh = cache.lookup("url")
+        assert fresh and entry["version"] == "1.0" and entry["etag"] == '"abc"'
+
+        cache.ttl = 0
+        entry, fresh = cache.lookup("url")
+        assert entry is not None and not fresh
+        assert cache.lookup("other") == (None, False)
+
+    def test_persists_only_used_fields(self, tmp_path):
+        """Should round-trip entries and counters through disk."""
+        path = tmp_path / "meta.json"
+        cache = MetadataCache(str(path))
+        cache.store("url", False)
+        cache.lookup("url")
+        cache.save()
+
+        loaded = MetadataCache.load(str(path))
+        assert set(loaded.entries["url"]) == {"exists", "version", "etag", "last_modified", "fetched", "used"}
+        assert loaded.stats()["hits"] == 1
+
+    def test_evicts_least_recently_used(self, tmp_path):
+        """Should drop the least recently used entries beyond max_entries."""
+        cache = MetadataCache(None, max_entries=2)
+        cache.store("a", True, "1")
+        cache.store("b", True, "1")
+        cache.entries["a"]["used"] += 10  # "a" used more recently than "b"
+        cache.store("c", True, "1")
+
+        assert set(cache.entries) == {"a", "c"}
+        assert cache.stats()["evicted"] == 1
+
+    def test_clear_resets_everything(self, tmp_path):
+        """Should remove all entries and counters."""
+        cache = MetadataCache(str(tmp_path / "meta.json"))
+        cache.store("a", True, "1")
+        cache.lookup("a")
+        cache.clear()
+        stats = cache.stats()
+        assert stats["entries"] == 0 and stats["hits"] == 0
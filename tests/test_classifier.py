@@ -0,0 +1,122 @@
+import pytest
+from auto_reqs.classifier import (
+    LOCAL,
+    STDLIB,
+    THIRD_PARTY,
+    UNKNOWN,
+    ModuleClassifier,
+    classify_many,
+    get_classifier,
+    is_stdlib,
+)
+
+
+class TestModuleClassifier:
+    def test_classify_many_returns_every_category(self, tmp_path):
+        """Should label stdlib, local, third-party and unknown names in one call."""
+        (tmp_path / "my_local.py").write_text("")
+        names = ["os", "json", "my_local", "pytest", "definitely_not_a_real_module_12345", "_private"]
+
+        verdicts = ModuleClassifier().classify_many(names, str(tmp_path))
+        assert verdicts == {
+            "os": STDLIB,
+            "json": STDLIB,
+            "my_local": LOCAL,
+            "pytest": THIRD_PARTY,
+            "definitely_not_a_real_module_12345": UNKNOWN,
+            "_private": STDLIB,
+        }
+
+    def test_whitelist_beats_tables(self):
+        """Should treat allowlisted look-alikes as third-party."""
+        assert ModuleClassifier().classify("setuptools") == THIRD_PARTY
+
+    def test_site_packages_module_is_not_stdlib(self):
+        """Should not mistake site-packages for stdlib even when nested under it."""
+        assert is_stdlib("requests") is False
+
+    def test_find_spec_is_memoized(self, monkeypatch):
+        """Should probe each unknown name only once."""
+        calls = []
+
+        def fake_find_spec(name):
+            calls.append(name)
+            return None
+
+        classifier = ModuleClassifier()
+        classifier.stdlib_names  # build tables before find_spec is patched
+        monkeypatch.setattr("importlib.util.find_spec", fake_find_spec)
+        classifier.classify_many(["fake_a", "fake_b", "fake_a"])
+        classifier.classify("fake_b")
+        assert calls == ["fake_a", "fake_b"]
+
+        classifier.cache_clear()
+        classifier.classify("fake_a")
+        assert calls == ["fake_a", "fake_b", "fake_a"]
+
+    def test_memo_is_bounded(self, monkeypatch):
+        """Should evict old verdicts beyond the configured cache size."""
+        classifier = ModuleClassifier(cache_size=2)
+        classifier.stdlib_names  # build tables before find_spec is patched
+        monkeypatch.setattr("importlib.util.find_spec", lambda name: None)
+        classifier.classify_many(["fake_a", "fake_b", "fake_c"])
+        assert classifier._lookup.cache_info().currsize == 2
+
+    def test_tables_are_built_lazily_once(self):
+        """Should build the stdlib table on first use and then reuse it."""
+        classifier = ModuleClassifier()
+        assert classifier._stdlib_names is None
+        classifier.classify("os")
+        table = classifier._stdlib_names
+        classifier.classify("sys")
+        assert classifier._stdlib_names is table
+
+    def test_shared_classifier_per_version(self):
+        """Should hand out one shared classifier per Python version."""
+        assert get_classifier() is get_classifier()
+        assert get_classifier("3.9") is not get_classifier()
+        assert classify_many(["os"]) == {"os": STDLIB}
+
+
+class TestLocalModuleLookup:
+    def test_local_index_avoids_filesystem_probes(self, monkeypatch, tmp_path):
+        """Should answer local verdicts from the index without syscalls."""
+        def no_probe(*args):
+            raise AssertionError("filesystem probed")
+
+        monkeypatch.setattr("auto_reqs.classifier.is_local_module", no_probe)
+        verdicts = ModuleClassifier().classify_many(
+            ["mypkg", "os"], str(tmp_path), local_modules={"mypkg"}
+        )
+        assert verdicts == {"mypkg": LOCAL, "os": STDLIB}
+
+
+class TestTargetPython:
+    @pytest.mark.parametrize("version, name, expected", [
+        ("3.10", "tomllib", THIRD_PARTY),
+        ("3.11", "tomllib", STDLIB),
+        ("3.11", "distutils", STDLIB),
+        ("3.12", "distutils", THIRD_PARTY),
+        ("3.8", "zoneinfo", THIRD_PARTY),
+        ("3.13", "Queue", STDLIB),
+    ])
+    def test_version_specific_modules(self, version, name, expected):
+        """Should classify modules added or removed between versions per target."""
+        assert ModuleClassifier(version).classify(name) == expected
+
+    def test_never_probes_the_running_interpreter(self, monkeypatch):
+        """Should answer from the tables alone when a target version is given."""
+        def no_find_spec(name):
+            raise AssertionError("find_spec called")
+
+        monkeypatch.setattr("importlib.util.find_spec", no_find_spec)
+        verdicts = ModuleClassifier("3.9").classify_many(["os", "requests", "not_a_module_at_all"])
+        assert verdicts == {"os": STDLIB, "requests": THIRD_PARTY, "not_a_module_at_all": THIRD_PARTY}
+
+    def test_shared_targeted_classifier(self):
+        """Should keep targeted and running-interpreter classifiers apart."""
+        from auto_reqs.classifier import RUNNING_VERSION
+
+        assert get_classifier(RUNNING_VERSION) is not get_classifier()
+        assert get_classifier(RUNNING_VERSION).targeted and not get_classifier().targeted
+        assert classify_many(["tomllib"], python_version="3.10") == {"tomllib": THIRD_PARTY}
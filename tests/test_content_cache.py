@@ -0,0 +1,84 @@
+import shutil
+from concurrent.futures import ProcessPoolExecutor
+from auto_reqs import cli, scanner
+from auto_reqs.content_cache import ContentCache, file_digest
+
+
+def store_entries(db_path, worker, count):
+    with ContentCache(db_path, "v1") as cache:
+        for i in range(count):
+            cache.put(f"{worker}-{i}", {f"mod_{worker}_{i}"})
+            if i % 10 == 0:
+                cache.flush()
+
+
+class TestContentCache:
+    def test_round_trip_is_per_extractor_version(self, tmp_path):
+        db = str(tmp_path / "cache.sqlite3")
+        with ContentCache(db, "v1") as cache:
+            cache.put("abc", {"requests", "os"})
+        with ContentCache(db, "v1") as cache:
+            assert cache.get_many(["abc", "missing"]) == {"abc": {"requests", "os"}}
+        with ContentCache(db, "v2") as cache:
+            assert cache.get_many(["abc"]) == {}
+            stats = cache.stats()
+        assert (stats["entries"], stats["hits"], stats["misses"], stats["stored"]) == (1, 1, 2, 1)
+
+    def test_least_recently_used_entries_are_evicted(self, tmp_path, monkeypatch):
+        clock = iter(range(100))
+        monkeypatch.setattr("auto_reqs.content_cache.time.time", lambda: next(clock))
+        with ContentCache(str(tmp_path / "cache.sqlite3"), "v1", max_bytes=170) as cache:
+            for digest in ("a", "b", "c"):
+                cache.put(digest, {"x"})
+                cache.flush()
+            cache.get_many(["a"])
+            cache.flush()
+            cache.put("d", {"x"})
+            cache.flush()
+            assert set(cache.get_many(["a", "b", "c", "d"])) == {"a", "d"}
+            assert cache.stats()["evicted"] == 2
+
+    def test_concurrent_writers(self, tmp_path):
+        db = str(tmp_path / "cache.sqlite3")
+        ContentCache(db, "v1").close()
+        with ProcessPoolExecutor(max_workers=4) as pool:
+            list(pool.map(store_entries, [db] * 4, range(4), [50] * 4))
+        with ContentCache(db, "v1") as cache:
+            found = cache.get_many(f"{w}-{i}" for w in range(4) for i in range(50))
+            assert len(found) == 200 and found["3-49"] == {"mod_3_49"}
+            assert cache.stats()["stored"] == 200
+
+    def test_file_digest_depends_only_on_bytes(self, tmp_path):
+        (tmp_path / "a.py").write_text("import os\n")
+        (tmp_path / "b.py").write_text("import os\n")
+        assert file_digest(tmp_path / "a.py") == file_digest(tmp_path / "b.py")
+        assert file_digest(tmp_path / "a.py", chunk_size=3) == file_digest(tmp_path / "a.py")
+
+
+class TestFreshCheckouts:
+    def test_cold_checkout_parses_only_changed_files(self, tmp_path, monkeypatch, capsys):
+        monkeypatch.setenv("AUTO_REQS_CACHE_DIR", str(tmp_path / "shared"))
+        first = tmp_path / "checkout-1"
+        first.mkdir()
+        for i in range(5):
+            (first / f"mod{i}.py").write_text(f"import os\nimport mod{(i + 1) % 5}\n")
+        (first / "requirements.txt").write_text("")
+        second = tmp_path / "checkout-2"
+        shutil.copytree(first, second)
+        (second / "mod4.py").write_text("import json\n")
+
+        parsed = []
+        for name in ("extract_imports_from_file", "extract_import_records_from_file"):
+            original = getattr(scanner, name)
+            monkeypatch.setattr(scanner, name, lambda path, *a, original=original: parsed.append(path) or original(path, *a))
+        cli.main(["update", str(first), "--no-daemon", "--content-cache"])
+        assert len(parsed) == 5
+        parsed.clear()
+        cli.main(["update", str(second), "--no-daemon", "--content-cache"])
+        assert parsed == [str(second / "mod4.py")]
+
+        capsys.readouterr()
+        cli.main(["cache", "stats", str(second)])
+        out = capsys.readouterr().out
+        assert "Content cache:" in out
+        assert "hits         4" in out and "stored       6" in out
@@ -0,0 +1,140 @@
+import json
+import os
+import shutil
+import socket
+import stat
+import tempfile
+import threading
+import pytest
+from auto_reqs import cli, daemon
+from auto_reqs.daemon import Daemon
+
+pytestmark = pytest.mark.skipif(not hasattr(socket, "AF_UNIX"), reason="Unix sockets not available")
+
+
+@pytest.fixture
+def cache_dir(monkeypatch):
+    # Unix socket paths are length-limited, so keep this one short.
+    path = tempfile.mkdtemp(prefix="ar", dir="/tmp")
+    monkeypatch.setenv("AUTO_REQS_CACHE_DIR", path)
+    yield path
+    shutil.rmtree(path, ignore_errors=True)
+
+
+@pytest.fixture
+def project(tmp_path):
+    snapshot = tmp_path / "snapshot.json"
+    snapshot.write_text(json.dumps({"zzdaemon-pkg": "3.1"}))
+    repo = tmp_path / "repo"
+    repo.mkdir()
+    (repo / "app.py").write_text("import os\nimport zzdaemon_pkg\n")
+    return repo, "file://" + str(snapshot)
+
+
+@pytest.fixture
+def running(cache_dir):
+    server = Daemon(idle_timeout=30)
+    thread = threading.Thread(target=server.serve, daemon=True)
+    thread.start()
+    for _ in range(100):
+        if daemon.request({"action": "ping"}, timeout=1):
+            break
+        thread.join(0.05)
+    yield server
+    daemon.request({"action": "shutdown"}, timeout=5)
+    thread.join(5)
+
+
+class TestClient:
+    def test_no_daemon_returns_none(self, cache_dir):
+        assert daemon.request({"action": "ping"}) is None
+
+    def test_socket_is_per_environment(self, cache_dir, monkeypatch):
+        path = daemon.default_socket_path()
+        monkeypatch.setattr(daemon.sys, "prefix", "/other/venv")
+        assert daemon.default_socket_path() != path
+
+    def test_cli_falls_back_in_process(self, cache_dir, project, capsys):
+        repo, url = project
+        cli.main(["update", str(repo), "--dry-run", "--index-url", url])
+        assert "zzdaemon-pkg==3.1" in capsys.readouterr().out
+
+
+class TestDaemon:
+    def test_ping_reports_state(self, running):
+        reply = daemon.request({"action": "ping"})
+        assert reply["ok"] and reply["requests"] == 0
+
+    def test_socket_is_owner_only(self, running):
+        assert stat.S_IMODE(os.stat(running.socket_path).st_mode) == 0o600
+
+    def test_cli_output_matches_in_process(self, running, project, capsys):
+        repo, url = project
+        cli.main(["update", str(repo), "--dry-run", "--index-url", url, "--no-daemon"])
+        local = capsys.readouterr().out
+        cli.main(["update", str(repo), "--dry-run", "--index-url", url])
+        assert capsys.readouterr().out == local
+        assert daemon.request({"action": "ping"})["requests"] == 1
+        assert not (repo / "requirements.txt").exists()
+
+    def test_updated_mirror_is_seen_by_later_requests(self, running, project, capsys):
+        repo, url = project
+        args = ["update", str(repo), "--dry-run", "--index-url", url]
+        cli.main(args)
+        assert "zzdaemon-pkg==3.1" in capsys.readouterr().out
+        (repo.parent / "snapshot.json").write_text(json.dumps({"zzdaemon-pkg": "3.10"}))
+        cli.main(args)
+        assert "zzdaemon-pkg==3.10" in capsys.readouterr().out
+        assert daemon.request({"action": "ping"})["requests"] == 2
+
+    def test_relative_paths_are_resolved_by_the_client(self, running, project, monkeypatch, capsys):
+        repo, url = project
+        site = repo.parent / "venv-site"
+        dist_info = site / "zzdaemon_pkg-2.0.dist-info"
+        dist_info.mkdir(parents=True)
+        (dist_info / "METADATA").write_text("Metadata-Version: 2.1\nName: zzdaemon-pkg\nVersion: 2.0\n")
+        sent = []
+        forward = daemon.request
+        monkeypatch.setattr(daemon, "request", lambda message, *a, **kw: sent.append(message) or forward(message, *a, **kw))
+        monkeypatch.chdir(repo.parent)
+        cli.main(["update", "repo", "--dry-run", "--index-url", url, "--site-packages", "venv-site"])
+        assert "zzdaemon-pkg==2.0" in capsys.readouterr().out
+        assert sent[-1]["args"]["site_packages"] == [str(site)]
+
+        with pytest.raises(SystemExit):
+            cli.main(["update", "repo", "--dry-run", "--index-url", url, "--python", "./missing-python"])
+        assert sent[-1]["args"]["python"] == str(repo.parent / "missing-python")
+
+        with pytest.raises(SystemExit):
+            cli.main(["update", "repo", "--dry-run", "--index-url", url, "--site-packages", "missing"])
+        assert "site-packages directory does not exist" in capsys.readouterr().out
+        assert daemon.request({"action": "ping"})["requests"] == 3
+
+    def test_state_is_reused_until_environment_changes(self, running, project, monkeypatch):
+        repo, url = project
+        message = {"action": "update", "args": {
+            "path": str(repo), "dry_run": True, "index_url": url, "no_cache": False,
+            "rebuild_cache": False, "jobs": 1,
+        }}
+        assert daemon.request(message)["exit_code"] == 0
+        contexts = dict(running.contexts)
+        assert len(contexts) == 1 and str(repo) in running.import_caches
+
+        daemon.request(message)
+        assert running.contexts == contexts
+
+        monkeypatch.setattr("auto_reqs.resolver.site_packages_fingerprint", lambda: "changed")
+        daemon.request(message)
+        assert running.contexts.keys() == contexts.keys()
+        assert list(running.contexts.values()) != list(contexts.values())
+
+    def test_errors_are_reported(self, running, tmp_path):
+        reply = daemon.request({"action": "update", "args": {"path": str(tmp_path / "missing")}})
+        assert reply["ok"] and reply["exit_code"] == 1
+        assert "does not exist" in reply["output"]
+        assert daemon.request({"action": "bogus"}) == {"ok": False, "error": "Unknown action: bogus"}
+
+    def test_exits_when_idle(self, cache_dir):
+        server = Daemon(idle_timeout=0.2)
+        server.serve()
+        assert daemon.request({"action": "ping"}) is None
@@ -0,0 +1,133 @@
+import json
+import pytest
+from auto_reqs import cli
+from auto_reqs.depgraph import DependencyGraph, _closures, evaluate_marker, parse_requirement
+from auto_reqs.environment import EnvironmentSnapshot
+from auto_reqs.updater import determine_changes
+
+LINUX_311 = {
+    "os_name": "posix",
+    "sys_platform": "linux",
+    "platform_system": "Linux",
+    "python_version": "3.11",
+    "python_full_version": "3.11.7",
+    "implementation_name": "cpython",
+}
+
+
+def install(site, name, module, requires=()):
+    dist_info = site / f"{name.replace('-', '_')}-1.0.dist-info"
+    dist_info.mkdir(parents=True)
+    headers = "".join(f"Requires-Dist: {r}\n" for r in requires)
+    (dist_info / "METADATA").write_text(f"Metadata-Version: 2.1\nName: {name}\nVersion: 1.0\n{headers}")
+    (dist_info / "top_level.txt").write_text(module + "\n")
+
+
+def snapshot(requires):
+    return EnvironmentSnapshot([], dict.fromkeys(requires, "1.0"), {}, "fingerprint", requires)
+
+
+class TestMarkers:
+    @pytest.mark.parametrize("marker, extra, expected", [
+        ("", "", True),
+        ('python_version >= "3.8"', "", True),
+        ("python_version < '3.10'", "", False),
+        ('python_full_version ~= "3.11.0"', "", True),
+        ('sys_platform == "win32" or (os_name == "posix" and platform_system != "Darwin")', "", True),
+        ('"linux" in sys_platform and platform_system not in "Windows Darwin"', "", True),
+        ('extra == "socks"', "", False),
+        ('extra == "Dev_Tools"', "dev-tools", True),
+        ("this is not a marker ===", "", True),
+    ])
+    def test_evaluate(self, marker, extra, expected):
+        assert evaluate_marker(marker, LINUX_311, extra) is expected
+
+    def test_parse_requirement(self):
+        assert parse_requirement("Foo_Bar[Socks, tests] (>=1.0) ; python_version < '3.12'") == (
+            "foo-bar", ("socks", "tests"), "python_version < '3.12'"
+        )
+        assert parse_requirement("  ") is None
+
+
+class TestDependencyGraph:
+    def test_closures_share_a_cycle(self):
+        # 0 -> 1 -> 2 -> 1, 2 -> 3
+        assert _closures([[1], [2], [1, 3], []]) == [0b1111, 0b1110, 0b1110, 0b1000]
+
+    def test_markers_and_extras_decide_the_edges(self):
+        graph = DependencyGraph.from_snapshot(snapshot({
+            "app": ["requests[socks]", "tomli ; python_version < '3.11'"],
+            "requests": ["urllib3>=1.21", "pysocks ; extra == 'socks'", "chardet ; extra == 'charset'", "notinstalled"],
+            "urllib3": ["requests"],
+            "pysocks": [],
+            "chardet": [],
+            "tomli": [],
+            "orphan": [],
+        }), LINUX_311)
+        assert graph.dependencies("app") == {"requests", "urllib3", "pysocks"}
+        needed = graph.closure(["app"])
+        assert graph.contains(needed, "urllib3") and not graph.contains(needed, "tomli")
+        assert not graph.contains(needed, "orphan") and not graph.contains(needed, "unknown")
+        assert graph.required_by("pysocks", {"app", "requests"}) == "app"
+        assert graph.required_by("orphan", {"app"}) is None
+
+
+class TestTransitivePruning:
+    @pytest.fixture
+    def graph(self):
+        return DependencyGraph.from_snapshot(snapshot({
+            "flask": ["werkzeug", "jinja2"],
+            "jinja2": ["markupsafe"],
+            "werkzeug": ["markupsafe"],
+            "markupsafe": [],
+            "gunicorn": [],
+            "pyyaml": [],
+        }), LINUX_311)
+
+    def changes(self, graph, **kwargs):
+        requirements = {"flask": "3.0", "werkzeug": "3.0", "markupsafe": "2.1", "gunicorn": "21.0", "pyyaml": "6.0"}
+        index = type("Index", (), {"resolve": staticmethod(lambda name: {"yaml": "pyyaml"}.get(name))})()
+        transitive = {}
+        _, unused = determine_changes(
+            {"flask", "yaml"}, {}, requirements, lambda pkg: None, "/nonexistent",
+            index=index, local_modules=set(), graph=graph, transitive=transitive, **kwargs,
+        )
+        return unused, transitive, requirements
+
+    def test_only_orphans_are_removed(self, graph):
+        unused, transitive, requirements = self.changes(graph)
+        assert unused == ["gunicorn"]
+        assert transitive == {"werkzeug": "flask", "markupsafe": "flask"}
+        assert set(requirements) == {"flask", "werkzeug", "markupsafe", "pyyaml"}
+
+    def test_prune_transitive_keeps_direct_imports_only(self, graph):
+        unused, transitive, requirements = self.changes(graph, prune_transitive=True)
+        assert sorted(unused) == ["gunicorn", "markupsafe", "werkzeug"]
+        assert set(requirements) == {"flask", "pyyaml"}
+
+
+class TestCli:
+    def test_update_reports_and_prunes(self, tmp_path, monkeypatch, capsys):
+        monkeypatch.setenv("AUTO_REQS_CACHE_DIR", str(tmp_path / "cache"))
+        site = tmp_path / "site"
+        install(site, "zzgraph-app", "zzgraph_app", requires=["zzgraph-lib>=1"])
+        install(site, "zzgraph-lib", "zzgraph_lib")
+        install(site, "zzgraph-orphan", "zzgraph_orphan")
+        index = tmp_path / "snapshot.json"
+        index.write_text(json.dumps({}))
+        repo = tmp_path / "repo"
+        repo.mkdir()
+        (repo / "app.py").write_text("import zzgraph_app\n")
+        requirements = repo / "requirements.txt"
+        requirements.write_text("zzgraph-app==1.0\nzzgraph-lib==1.0\nzzgraph-orphan==1.0\n")
+        args = ["update", str(repo), "--no-daemon", "--index-url", f"file://{index}", "--site-packages", str(site)]
+
+        cli.main(args)
+        out = capsys.readouterr().out
+        assert "Removed 1 unused packages:\n  zzgraph-orphan" in out
+        assert "Kept 1 packages needed by imported ones" in out
+        assert requirements.read_text() == "zzgraph-app==1.0\nzzgraph-lib==1.0\n"
+
+        cli.main(args + ["--prune-transitive"])
+        assert "zzgraph-lib (required by zzgraph-app)" in capsys.readouterr().out
+        assert requirements.read_text() == "zzgraph-app==1.0\n"
@@ -0,0 +1,123 @@
+import json
+import os
+import sys
+import pytest
+from auto_reqs import cli, environment
+from auto_reqs.environment import environment_paths, load_environment, python_site_packages, read_distribution
+
+
+def install(site, name, version, top_level=None, record=None, requires=()):
+    dist_info = site / f"{name.replace('-', '_')}-{version}.dist-info"
+    dist_info.mkdir(parents=True)
+    headers = "".join(f"Requires-Dist: {r}\n" for r in requires)
+    (dist_info / "METADATA").write_text(
+        f"Metadata-Version: 2.1\nName: {name}\nVersion: {version}\n{headers}\nName: body\n"
+    )
+    if top_level is not None:
+        (dist_info / "top_level.txt").write_text("\n".join(top_level) + "\n")
+    if record is not None:
+        (dist_info / "RECORD").write_text("".join(f"{path},,\n" for path in record))
+    return dist_info
+
+
+class TestReadDistribution:
+    def test_declared_top_level(self, tmp_path):
+        dist_info = install(tmp_path, "PyYAML", "6.0", top_level=["_yaml", "yaml"])
+        assert read_distribution(str(dist_info)) == ["pyyaml", "6.0", ["_yaml", "yaml"], []]
+
+    def test_top_level_inferred_from_record(self, tmp_path):
+        dist_info = install(tmp_path, "typing_extensions", "4.9", record=[
+            "typing_extensions.py",
+            "__pycache__/typing_extensions.cpython-311.pyc",
+            "typing_extensions-4.9.dist-info/METADATA",
+            "pkg/sub/mod.py",
+            "../../bin/tool",
+        ])
+        assert read_distribution(str(dist_info)) == ["typing-extensions", "4.9", ["typing_extensions", "pkg"], []]
+
+    def test_requires_dist(self, tmp_path):
+        dist_info = install(tmp_path, "requests", "2.31", requires=["idna<4,>=2.5", "PySocks!=1.5.7; extra == 'socks'"])
+        assert read_distribution(str(dist_info))[3] == ["idna<4,>=2.5", "PySocks!=1.5.7; extra == 'socks'"]
+
+    def test_egg_info_requires_txt(self, tmp_path):
+        egg_info = tmp_path / "legacy.egg-info"
+        egg_info.mkdir()
+        (egg_info / "PKG-INFO").write_text("Metadata-Version: 1.1\nName: legacy\nVersion: 0.1\n")
+        (egg_info / "requires.txt").write_text("six\n\n[:python_version < '3']\nfutures\n\n[docs]\nsphinx\n")
+        assert read_distribution(str(egg_info))[3] == [
+            "six", "futures ; (python_version < '3')", 'sphinx ; extra == "docs"',
+        ]
+
+    def test_missing_metadata(self, tmp_path):
+        (tmp_path / "broken-1.0.dist-info").mkdir()
+        assert read_distribution(str(tmp_path / "broken-1.0.dist-info")) is None
+
+
+class TestLoadEnvironment:
+    def test_first_directory_wins(self, tmp_path):
+        install(tmp_path / "a", "demo", "2.0", top_level=["demo"])
+        install(tmp_path / "b", "demo", "1.0", top_level=["demo_old"])
+        install(tmp_path / "b", "other", "3.0", top_level=["demo"])
+        snapshot = load_environment([str(tmp_path / "a"), str(tmp_path / "b")])
+        assert snapshot.distributions == {"demo": "2.0", "other": "3.0"}
+        assert snapshot.top_level == {"demo": ["demo", "other"]}
+
+    def test_cache_reads_only_changed_entries(self, tmp_path, monkeypatch):
+        site = tmp_path / "site"
+        install(site, "alpha", "1.0", top_level=["alpha"])
+        install(site, "beta", "1.0", top_level=["beta"])
+        cache_dir = str(tmp_path / "cache")
+        first = load_environment([str(site)], cache_dir)
+
+        read = []
+        original = environment.read_distribution
+        monkeypatch.setattr(environment, "read_distribution", lambda path: read.append(path) or original(path))
+        again = load_environment([str(site)], cache_dir)
+        assert read == [] and again.distributions == first.distributions
+        assert again.fingerprint == first.fingerprint and again.is_current()
+
+        gamma = install(site, "gamma", "2.0", top_level=["gamma"])
+        assert not again.is_current()
+        updated = load_environment([str(site)], cache_dir)
+        assert read == [str(gamma)]
+        assert updated.distributions == {"alpha": "1.0", "beta": "1.0", "gamma": "2.0"}
+
+    def test_parallel_read_matches_serial(self, tmp_path, monkeypatch):
+        for i in range(5):
+            install(tmp_path, f"dist{i}", "1.0", top_level=[f"mod{i}"])
+        serial = load_environment([str(tmp_path)], max_workers=1)
+        monkeypatch.setattr(environment, "PARALLEL_MIN_DISTS", 1)
+        parallel = load_environment([str(tmp_path)], max_workers=4)
+        assert parallel.distributions == serial.distributions
+        assert parallel.top_level == serial.top_level
+
+
+class TestTargetEnvironment:
+    def test_python_site_packages(self):
+        paths = python_site_packages(sys.executable)
+        assert os.path.dirname(os.path.dirname(pytest.__file__)) in paths
+        assert all(os.path.isdir(p) for p in paths)
+
+    def test_bad_interpreter(self, tmp_path):
+        with pytest.raises(OSError):
+            environment_paths(python=str(tmp_path / "missing-python"))
+
+    def test_missing_site_packages(self, tmp_path):
+        with pytest.raises(OSError, match="does not exist"):
+            environment_paths(site_packages=[str(tmp_path / "missing")])
+
+    def test_cli_resolves_against_site_packages(self, tmp_path, monkeypatch, capsys):
+        monkeypatch.setenv("AUTO_REQS_CACHE_DIR", str(tmp_path / "cache"))
+        site = tmp_path / "venv-site"
+        install(site, "zzenv-dist", "4.2", top_level=["zzenv_mod"])
+        snapshot = tmp_path / "snapshot.json"
+        snapshot.write_text(json.dumps({}))
+        repo = tmp_path / "repo"
+        repo.mkdir()
+        (repo / "app.py").write_text("import zzenv_mod\n")
+
+        cli.main([
+            "update", str(repo), "--dry-run", "--no-daemon", "--index-url", f"file://{snapshot}",
+            "--site-packages", str(site),
+        ])
+        assert "zzenv-dist==4.2" in capsys.readouterr().out
@@ -0,0 +1,132 @@
+import ast
+import io
+import pytest
+from auto_reqs.extractor import (
+    UnsupportedSource,
+    extract_import_records,
+    extract_imports_ast,
+    extract_imports_fast,
+    extract_imports_streaming,
+)
+from auto_reqs.scanner import extract_imports_from_file
+
+TRICKY_SOURCE = b'''"""Module docstring.
+import not_a_module
+"""
+import os, sys as system
+import xml.etree.ElementTree as ET
+from collections import (
+    OrderedDict,  # comment with (unbalanced paren
+    defaultdict,
+)
+from . import sibling
+from .relative import thing
+from __future__ import annotations
+x = "import fake_string"; import json
+y = \'\'\'
+from fake_triple import nope
+\'\'\'
+if x: import inline_if
+def func():
+    import nested_mod
+    raise ValueError() \\
+        from None
+    yield from gen()
+def gen():
+    return (yield
+        from other)
+import continued, \\
+    second_line
+# import commented_out
+'''
+
+
+class TestFastExtractor:
+    def test_matches_ast_on_tricky_source(self):
+        """Should find exactly the imports a full AST walk finds."""
+        expected = extract_imports_ast(TRICKY_SOURCE.decode())
+        assert extract_imports_fast(TRICKY_SOURCE) == expected
+        assert "fake_string" not in expected and "not_a_module" not in expected
+        assert {"inline_if", "nested_mod", "second_line", "relative"} <= expected
+
+    def test_leading_bom(self):
+        """Should see an import on the first line of a file saved with a BOM."""
+        source = b"\xef\xbb\xbfimport requests\nimport os\n"
+        assert extract_imports_fast(source) == extract_imports_ast(source.decode("utf-8-sig")) == {"requests", "os"}
+        assert extract_imports_streaming(io.BytesIO(source).readline) == {"requests", "os"}
+        assert extract_import_records(source) == [(1, "requests"), (2, "os")]
+
+    def test_source_without_import_keyword(self):
+        """Should return an empty set without scanning further."""
+        assert extract_imports_fast(b"x = 1\n" * 1000) == set()
+
+    def test_unterminated_string_raises(self):
+        """Should signal that the caller must fall back to the AST path."""
+        with pytest.raises(UnsupportedSource):
+            extract_imports_fast(b"import os\ns = '''never closed\nimport sys\n")
+
+    def test_syntax_error_keeps_valid_imports(self):
+        """Should report the valid import statements of a file that does not parse."""
+        source = b"import os\ndef broken(:\n    pass\nfrom json import loads\nimport (bad\n"
+        assert extract_imports_ast(source.decode()) == set()
+        assert extract_imports_fast(source) == {"os", "json"}
+
+
+class TestStreamingExtractor:
+    def test_matches_ast_on_tricky_source(self):
+        """Should agree with the AST path when reading line by line."""
+        expected = extract_imports_ast(TRICKY_SOURCE.decode())
+        assert extract_imports_streaming(io.BytesIO(TRICKY_SOURCE).readline) == expected
+
+    def test_tokenizer_error_keeps_earlier_imports(self):
+        """Should return what was found before the tokenizer gave up."""
+        source = b"import os\nx = (\n"
+        assert extract_imports_streaming(io.BytesIO(source).readline) == {"os"}
+
+
+def ast_records(source):
+    records = set()
+    for node in ast.walk(ast.parse(source)):
+        if isinstance(node, ast.Import):
+            records.update((node.lineno, alias.name) for alias in node.names)
+        elif isinstance(node, ast.ImportFrom) and node.module:
+            records.add((node.lineno, node.module))
+    return records
+
+
+class TestImportRecords:
+    def test_lines_and_modules_match_ast(self):
+        """Should report each import's dotted module and starting line."""
+        records = extract_import_records(TRICKY_SOURCE)
+        assert set(records) == ast_records(TRICKY_SOURCE.decode())
+        assert (5, "xml.etree.ElementTree") in records
+
+    def test_streaming_records_match(self):
+        """Should collect the same records while streaming."""
+        records = []
+        extract_imports_streaming(io.BytesIO(TRICKY_SOURCE).readline, records)
+        assert set(records) == ast_records(TRICKY_SOURCE.decode())
+
+    def test_unparseable_source(self):
+        """Should report nothing for files neither path can read."""
+        assert extract_import_records(b"import os\nx = 1\nimport a.b\n") == [(1, "os"), (3, "a.b")]
+        assert extract_import_records(b"s = '''never closed\nimport os\n") == []
+
+
+class TestExtractImportsFromFile:
+    def test_large_files_use_streaming_path(self, tmp_path, monkeypatch):
+        """Should not read files above max_file_size into memory whole."""
+        big = tmp_path / "big.py"
+        big.write_text("import os\n" + "x = 1\n" * 100)
+
+        def no_fast(data):
+            raise AssertionError("fast path should not be used")
+
+        monkeypatch.setattr("auto_reqs.scanner.extract_imports_fast", no_fast)
+        assert extract_imports_from_file(big, max_file_size=64) == {"os"}
+
+    def test_unsupported_source_falls_back_to_ast(self, tmp_path):
+        """Should fall back to the AST parser when the fast scan gives up."""
+        broken = tmp_path / "broken.py"
+        broken.write_text("s = '''never closed\nimport os\n")
+        assert extract_imports_from_file(broken) == set()
@@ -0,0 +1,136 @@
+import json
+import shutil
+import subprocess
+import pytest
+from auto_reqs import cli
+from auto_reqs.gitdiff import GitError, changed_python_files
+
+pytestmark = pytest.mark.skipif(shutil.which("git") is None, reason="git is not installed")
+
+
+def git(repo, *args):
+    subprocess.run(
+        ["git", "-c", "user.name=t", "-c", "user.email=t@example.com", *args],
+        cwd=repo, check=True, capture_output=True,
+    )
+
+
+def pins(project):
+    lines = (project / "requirements.txt").read_text().splitlines()
+    return [line for line in lines if line and not line.startswith("#")]
+
+
+@pytest.fixture
+def repo(tmp_path):
+    """A committed work tree whose project lives in a subdirectory."""
+    root = tmp_path / "work"
+    project = root / "svc"
+    (project / "pkg").mkdir(parents=True)
+    (project / "app.py").write_text("import os\n")
+    (project / "pkg" / "util.py").write_text("import json\n")
+    (project / "old.py").write_text("import csv\n")
+    (root / "outside.py").write_text("import sys\n")
+    git(root, "init", "-q")
+    git(root, "add", ".")
+    git(root, "commit", "-q", "-m", "init")
+    return project
+
+
+class TestChangedPythonFiles:
+    def test_since_includes_untracked_and_deleted(self, repo):
+        (repo / "app.py").write_text("import os\nimport re\n")
+        (repo / "new.py").write_text("import re\n")
+        (repo / "notes.txt").write_text("not python")
+        (repo / "old.py").unlink()
+        (repo.parent / "outside.py").write_text("import re\n")
+
+        changes = changed_python_files(repo, since="HEAD")
+        assert sorted(changes.changed) == [str(repo / "app.py"), str(repo / "new.py")]
+        assert changes.deleted == [str(repo / "old.py")]
+        assert changes.contents == {}
+
+    def test_staged_reads_the_index(self, repo):
+        (repo / "app.py").write_text("import staged_version\n")
+        git(repo, "add", "app.py")
+        (repo / "app.py").write_text("import working_tree_version\n")
+        (repo / "pkg" / "util.py").write_text("import unstaged\n")
+
+        changes = changed_python_files(repo, staged=True)
+        assert changes.changed == [str(repo / "app.py")]
+        assert changes.contents == {str(repo / "app.py"): b"import staged_version\n"}
+
+    def test_unknown_ref(self, repo):
+        with pytest.raises(GitError):
+            changed_python_files(repo, since="no-such-ref")
+
+
+class TestIncrementalCli:
+    @pytest.fixture
+    def snapshot(self, tmp_path, monkeypatch):
+        monkeypatch.setenv("AUTO_REQS_CACHE_DIR", str(tmp_path / "cache"))
+        path = tmp_path / "snapshot.json"
+        path.write_text(json.dumps({"zzgit-pkg": "1.0"}))
+        return f"file://{path}"
+
+    def run(self, repo, snapshot, *extra):
+        cli.main(["update", str(repo), "--no-daemon", "--index-url", snapshot, *extra])
+
+    def test_no_dependency_change_exits_early(self, repo, snapshot, capsys, monkeypatch):
+        self.run(repo, snapshot)
+        (repo / "app.py").write_text("import os\nimport re\nimport pkg\n")
+        capsys.readouterr()
+
+        def no_full_scan(*args, **kwargs):
+            raise AssertionError("the whole tree should not be rescanned")
+
+        monkeypatch.setattr("auto_reqs.pipeline.scan_project", no_full_scan)
+        self.run(repo, snapshot, "--since", "HEAD")
+        assert "no dependency change possible" in capsys.readouterr().out
+
+    def test_unparseable_changed_file_is_skipped(self, repo, snapshot, capsys, monkeypatch):
+        self.run(repo, snapshot)
+        (repo / "app.py").write_text("import os\n")
+        capsys.readouterr()
+
+        def null_bytes(path, max_file_size=None):
+            raise ValueError("source code string cannot contain null bytes")
+
+        monkeypatch.setattr("auto_reqs.pipeline.extract_imports_from_file", null_bytes)
+        self.run(repo, snapshot, "--since", "HEAD")
+        assert "no dependency change possible" in capsys.readouterr().out
+
+    def test_nested_project_stays_local(self, repo, snapshot, capsys):
+        (repo / "libs" / "mylib" / "mylib").mkdir(parents=True)
+        (repo / "libs" / "mylib" / "setup.py").write_text("")
+        (repo / "libs" / "mylib" / "mylib" / "__init__.py").write_text("")
+        git(repo, "add", ".")
+        git(repo, "commit", "-q", "-m", "add mylib")
+        self.run(repo, snapshot)
+        (repo / "app.py").write_text("import os\nimport mylib\n")
+        capsys.readouterr()
+
+        self.run(repo, snapshot, "--since", "HEAD")
+        assert "no dependency change possible" in capsys.readouterr().out
+        assert pins(repo) == []
+
+    def test_staged_third_party_import_is_added(self, repo, snapshot, capsys):
+        self.run(repo, snapshot)
+        assert pins(repo) == []
+        (repo / "pkg" / "util.py").write_text("import json\nimport zzgit_pkg\n")
+        git(repo, "add", ".")
+        capsys.readouterr()
+
+        self.run(repo, snapshot, "--staged")
+        assert "third-party imports affected: zzgit_pkg" in capsys.readouterr().out
+        assert pins(repo) == ["zzgit-pkg==1.0"]
+
+    def test_without_baseline_scans_everything(self, repo, snapshot, capsys):
+        (repo / "app.py").write_text("import zzgit_pkg\n")
+        self.run(repo, snapshot, "--since", "HEAD")
+        assert "scanning every file" in capsys.readouterr().out
+        assert pins(repo) == ["zzgit-pkg==1.0"]
+
+    def test_rejects_monorepo(self, repo, capsys):
+        with pytest.raises(SystemExit):
+            cli.main(["update", str(repo), "--staged", "--monorepo"])
+        assert "cannot be combined" in capsys.readouterr().err
@@ -0,0 +1,115 @@
+import json
+import socket
+import pytest
+from auto_reqs.local_index import (
+    LocalIndex,
+    canonical_name,
+    latest_version,
+    open_local_index,
+    version_from_filename,
+)
+from auto_reqs.resolver import ResolverIndex, get_latest_version_from_pypi, resolve_many
+
+
+@pytest.fixture
+def pep503_tree(tmp_path):
+    """Build a small PEP 503/691 directory tree of fixtures."""
+    root = tmp_path / "simple"
+    files = root / "requests"
+    files.mkdir(parents=True)
+    for name in [
+        "requests-2.30.0-py3-none-any.whl",
+        "requests-2.31.0.tar.gz",
+        "requests-2.32.0rc1-py3-none-any.whl",
+    ]:
+        (files / name).write_text("")
+
+    html = root / "typing-extensions"
+    html.mkdir()
+    (html / "index.html").write_text(
+        '<html><body>'
+        '<a href="../../files/typing_extensions-4.9.0-py3-none-any.whl#sha256=00">x</a>'
+        '<a href="../../files/typing_extensions-4.10.0.tar.gz">x</a>'
+        '<a href="../../files/typing_extensions-4.11.0.tar.gz" data-yanked="">x</a>'
+        '</body></html>'
+    )
+
+    pep691 = root / "numpy"
+    pep691.mkdir()
+    (pep691 / "index.json").write_text(json.dumps({
+        "meta": {"api-version": "1.0"},
+        "name": "numpy",
+        "files": [
+            {"filename": "numpy-1.26.4-cp311-cp311-manylinux_2_17_x86_64.whl"},
+            {"filename": "numpy-2.0.0.tar.gz", "yanked": True},
+            {"filename": "numpy-1.9.0.tar.gz"},
+        ],
+    }))
+    return root
+
+
+class TestVersionHelpers:
+    def test_canonical_name(self):
+        assert canonical_name("Typing_Extensions") == "typing-extensions"
+        assert canonical_name("zope.interface") == "zope-interface"
+
+    def test_latest_version_prefers_final_releases(self):
+        assert latest_version(["1.9.0", "1.10.0", "1.10.1rc1"]) == "1.10.0"
+        assert latest_version(["2.0.0b1", "2.0.0a3"]) == "2.0.0b1"
+        assert latest_version(["1.0", "1.0.post1", "1.0.1.dev0"]) == "1.0.post1"
+        assert latest_version([]) is None
+
+    def test_version_from_filename(self):
+        assert version_from_filename("foo_bar-1.2-py3-none-any.whl", "foo-bar") == "1.2"
+        assert version_from_filename("foo-bar-1.2.tar.gz", "foo-bar") == "1.2"
+        assert version_from_filename("other-1.2.tar.gz", "foo-bar") is None
+        assert version_from_filename("README.txt", "foo-bar") is None
+
+
+class TestLocalIndex:
+    def test_directory_of_distribution_files(self, pep503_tree):
+        """Should list versions from the files in a project directory."""
+        info = LocalIndex(str(pep503_tree)).project_info("Requests")
+        assert info == {"exists": True, "version": "2.31.0"}
+
+    def test_pep503_html_page(self, pep503_tree):
+        """Should read links from index.html and skip yanked files."""
+        info = LocalIndex(str(pep503_tree)).project_info("typing_extensions")
+        assert info == {"exists": True, "version": "4.10.0"}
+
+    def test_pep691_json_page(self, pep503_tree):
+        """Should read filenames from index.json and skip yanked files."""
+        info = LocalIndex(str(pep503_tree)).project_info("numpy")
+        assert info == {"exists": True, "version": "1.26.4"}
+
+    def test_unknown_project(self, pep503_tree):
+        assert LocalIndex(str(pep503_tree)).project_info("nope") == {"exists": False, "version": None}
+
+    def test_json_snapshot(self, tmp_path):
+        """Should answer from a static JSON snapshot file."""
+        snapshot = tmp_path / "snapshot.json"
+        snapshot.write_text(json.dumps({"packages": {
+            "Flask": "3.0.0",
+            "requests": ["2.30.0", "2.31.0"],
+            "numpy": {"version": "1.26.4"},
+        }}))
+        index = LocalIndex(str(snapshot))
+        assert index.project_info("flask")["version"] == "3.0.0"
+        assert index.project_info("requests")["version"] == "2.31.0"
+        assert index.project_info("numpy")["version"] == "1.26.4"
+        assert index.project_info("django")["exists"] is False
+
+
+class TestOfflineResolution:
+    def test_file_url_never_opens_a_socket(self, pep503_tree, monkeypatch):
+        """Should resolve versions from disk with networking disabled."""
+        def no_network(*args, **kwargs):
+            raise AssertionError("socket opened in offline mode")
+
+        monkeypatch.setattr(socket, "socket", no_network)
+        open_local_index.cache_clear()
+        url = pep503_tree.as_uri()
+
+        assert get_latest_version_from_pypi("requests", index_url=url) == "2.31.0"
+        results = resolve_many(["numpy", "missing"], index=ResolverIndex({}), index_url=url)
+        assert results == {"numpy": ("numpy", "1.26.4"), "missing": ("missing", None)}
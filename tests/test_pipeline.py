@@ -0,0 +1,193 @@
+import argparse
+import json
+import pytest
+from auto_reqs import cli, pipeline
+from auto_reqs.config import DEFAULT_CONFIG
+from auto_reqs.environment import EnvironmentSnapshot
+from auto_reqs.pipeline import RunContext, discover_projects, run_monorepo
+
+
+def make_tree(root, files):
+    for rel, text in files.items():
+        path = root / rel
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(text)
+
+
+def pins(project):
+    lines = (project / "requirements.txt").read_text().splitlines()
+    return [line for line in lines if line and not line.startswith("#")]
+
+
+def make_args(**overrides):
+    values = {"dry_run": False, "prune_transitive": False, "target_python": None, "content_cache": None, "jobs": 1, "index_url": None, "no_cache": False, "rebuild_cache": False}
+    values.update(overrides)
+    return argparse.Namespace(**values)
+
+
+@pytest.fixture
+def monorepo(tmp_path, monkeypatch):
+    """Three services (one nested) resolved against a file:// snapshot."""
+    monkeypatch.setenv("AUTO_REQS_CACHE_DIR", str(tmp_path / "user-cache"))
+    snapshot = tmp_path / "snapshot.json"
+    snapshot.write_text(json.dumps({"zzmono-alpha": "1.0", "zzmono-beta": "2.0"}))
+    root = tmp_path / "repo"
+    make_tree(root, {
+        "tools/lint.py": "import zzmono_beta\n",
+        "services/api/requirements.txt": "",
+        "services/api/app.py": "import os\nimport zzmono_alpha\n",
+        "services/api/plugins/pyproject.toml": "",
+        "services/api/plugins/hook.py": "import zzmono_beta\n",
+        "services/worker/.auto-reqs.json": "{}",
+        "services/worker/job.py": "import zzmono_alpha\nimport zzmono_beta\n",
+    })
+    return root, "file://" + str(snapshot)
+
+
+class TestDiscoverProjects:
+    def test_finds_every_marker_and_skips_bare_root(self, monorepo):
+        root, _ = monorepo
+        projects = discover_projects(str(root), DEFAULT_CONFIG)
+        assert [p[len(str(root)) + 1:].replace("\\", "/") for p in projects] == [
+            "services/api",
+            "services/api/plugins",
+            "services/worker",
+        ]
+
+    def test_root_with_requirements_is_a_project(self, monorepo):
+        root, _ = monorepo
+        (root / "requirements.txt").write_text("")
+        assert str(root) in discover_projects(str(root), DEFAULT_CONFIG)
+
+
+class TestRunMonorepo:
+    def test_writes_each_project_and_a_summary(self, monorepo):
+        root, url = monorepo
+        results = run_monorepo(str(root), make_args(index_url=url), DEFAULT_CONFIG)
+
+        assert len(results) == 3
+        # Nested projects are not scanned as part of their parent.
+        assert pins(root / "services/api") == ["zzmono-alpha==1.0"]
+        assert pins(root / "services/api/plugins") == ["zzmono-beta==2.0"]
+        assert pins(root / "services/worker") == ["zzmono-alpha==1.0", "zzmono-beta==2.0"]
+
+        summary = json.loads((root / pipeline.SUMMARY_FILE).read_text())
+        paths = {p["path"].replace("\\", "/"): p for p in summary["projects"]}
+        assert paths["services/worker"]["added"] == ["zzmono-alpha==1.0", "zzmono-beta==2.0"]
+
+    def test_projects_without_python_files_are_skipped(self, monorepo, capsys):
+        root, url = monorepo
+        make_tree(root, {"docs/requirements.txt": "sphinx==7.0.0\nfuro==2024.1.1\n"})
+        results = run_monorepo(str(root), make_args(index_url=url), DEFAULT_CONFIG)
+
+        assert len(results) == 3
+        assert pins(root / "docs") == ["sphinx==7.0.0", "furo==2024.1.1"]
+        assert json.loads((root / pipeline.SUMMARY_FILE).read_text())["skipped"] == ["docs"]
+        assert "skipped (no Python files)" in capsys.readouterr().out
+
+    def test_project_config_picks_its_index(self, monorepo, tmp_path):
+        root, _ = monorepo
+        (tmp_path / "other.json").write_text(json.dumps({"zzmono-alpha": "7.0", "zzmono-beta": "8.0"}))
+        other = "file://" + str(tmp_path / "other.json")
+        (root / "services/worker/.auto-reqs.json").write_text(json.dumps({"index_url": other}))
+        run_monorepo(str(root), make_args(), {**DEFAULT_CONFIG, "index_url": "file://" + str(tmp_path / "snapshot.json")})
+
+        assert pins(root / "services/api") == ["zzmono-alpha==1.0"]
+        assert pins(root / "services/worker") == ["zzmono-alpha==7.0", "zzmono-beta==8.0"]
+
+    def test_dry_run_writes_nothing(self, monorepo):
+        root, url = monorepo
+        run_monorepo(str(root), make_args(index_url=url, dry_run=True), DEFAULT_CONFIG)
+        assert pins(root / "services/api") == []
+        assert not (root / pipeline.SUMMARY_FILE).exists()
+
+    def test_shared_state_is_built_once(self, monorepo, monkeypatch):
+        root, url = monorepo
+        calls = {"installed": 0, "fetch": []}
+
+        def fake_environment(paths=None, cache_dir=None, max_workers=8):
+            calls["installed"] += 1
+            return EnvironmentSnapshot([], {}, {}, "fingerprint")
+
+        def fake_latest(name, **kwargs):
+            calls["fetch"].append(name)
+            return "9.9"
+
+        monkeypatch.setattr("auto_reqs.environment.load_environment", fake_environment)
+        monkeypatch.setattr(pipeline, "get_latest_version_from_pypi", fake_latest)
+        run_monorepo(str(root), make_args(index_url=url), DEFAULT_CONFIG)
+
+        assert calls["installed"] == 1
+        assert sorted(calls["fetch"]) == ["zzmono-alpha", "zzmono-beta"]
+
+    def test_watch_is_rejected(self, monorepo, capsys):
+        root, _ = monorepo
+        with pytest.raises(SystemExit):
+            cli.main(["watch", str(root), "--monorepo"])
+        assert "watch cannot be combined with --monorepo" in capsys.readouterr().err
+
+
+class TestRunContext:
+    def test_fetch_version_is_memoized(self, tmp_path, monkeypatch):
+        monkeypatch.setenv("AUTO_REQS_CACHE_DIR", str(tmp_path))
+        seen = []
+        monkeypatch.setattr(
+            pipeline, "get_latest_version_from_pypi", lambda name, **kw: seen.append(name) or "1.0"
+        )
+        ctx = RunContext(DEFAULT_CONFIG, use_cache=False)
+        assert ctx.fetch_version("pkg") == ctx.fetch_version("pkg") == "1.0"
+        assert seen == ["pkg"]
+
+    def test_failed_lookups_are_retried(self, tmp_path, monkeypatch):
+        monkeypatch.setenv("AUTO_REQS_CACHE_DIR", str(tmp_path))
+        replies = iter([None, "1.0"])
+        monkeypatch.setattr(pipeline, "get_latest_version_from_pypi", lambda name, **kw: next(replies))
+        ctx = RunContext(DEFAULT_CONFIG, use_cache=False)
+        assert ctx.fetch_version("pkg") is None
+        assert ctx.fetch_version("pkg") == "1.0"
+
+
+class TestApplyChanges:
+    def test_edits_only_the_top_level_file(self, tmp_path, monkeypatch):
+        monkeypatch.setenv("AUTO_REQS_CACHE_DIR", str(tmp_path / "cache"))
+        monkeypatch.setattr(pipeline, "get_installed_distributions", lambda: {})
+        monkeypatch.setattr(pipeline, "get_latest_version_from_pypi", lambda name, **kw: "1.0")
+        repo = tmp_path / "repo"
+        make_tree(repo, {
+            "requirements.txt": "-r base.txt\n# kept\nzzapply-old==0.1  # stale\nzzapply-used>=2\n",
+            "base.txt": "zzapply-base==3.0\n",
+        })
+        scan = pipeline.ScanResult({"zzapply_used", "zzapply_new"}, set())
+        ctx = RunContext(DEFAULT_CONFIG, use_cache=False)
+        result = pipeline.apply_changes(str(repo), scan, ctx)
+        assert result.missing == [("zzapply-new", "1.0")]
+        assert result.unused == ["zzapply-old"]
+        assert (repo / "requirements.txt").read_text() == "-r base.txt\n# kept\nzzapply-new==1.0\nzzapply-used>=2\n"
+        assert (repo / "base.txt").read_text() == "zzapply-base==3.0\n"
+
+
+class TestPrefetcher:
+    def test_resolves_unpinned_third_party_names_during_scan(self, tmp_path, monkeypatch):
+        monkeypatch.setenv("AUTO_REQS_CACHE_DIR", str(tmp_path / "cache"))
+        make_tree(tmp_path / "repo", {
+            "app.py": "import os\nimport helpers\nimport zzpre_new\nimport zzpre_pinned\n",
+            "helpers.py": "",
+        })
+        seen = []
+        monkeypatch.setattr(pipeline, "get_installed_distributions", lambda: {})
+        monkeypatch.setattr(
+            pipeline, "get_latest_version_from_pypi", lambda name, **kw: seen.append(name) or "1.0"
+        )
+        ctx = RunContext(DEFAULT_CONFIG, use_cache=False)
+        prefetcher = pipeline.Prefetcher(ctx, str(tmp_path / "repo"), {"zzpre-pinned": "2.0"})
+        pipeline.scan_for_update(str(tmp_path / "repo"), DEFAULT_CONFIG, use_cache=False, on_new_imports=prefetcher)
+        prefetcher.wait()
+        assert seen == ["zzpre-new"]
+
+    def test_nothing_starts_when_everything_is_pinned(self, tmp_path, monkeypatch):
+        make_tree(tmp_path, {"app.py": "import os\nimport zzpre_pinned\n"})
+        ctx = RunContext(DEFAULT_CONFIG, use_cache=False)
+        prefetcher = pipeline.Prefetcher(ctx, str(tmp_path), {"zzpre_pinned": "2.0"})
+        pipeline.scan_for_update(str(tmp_path), DEFAULT_CONFIG, use_cache=False, on_new_imports=prefetcher)
+        prefetcher.wait()
+        assert prefetcher.futures == [] and ctx._installed is None
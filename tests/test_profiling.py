@@ -0,0 +1,76 @@
+import json
+import pytest
+from auto_reqs import cli, profiling
+from auto_reqs.resolver import fetch_project_info
+
+
+@pytest.fixture
+def profiler():
+    active = profiling.enable(trace=True)
+    yield active
+    profiling.disable()
+
+
+class TestHooks:
+    def test_disabled_hooks_are_shared_no_ops(self):
+        assert not profiling.enabled()
+        assert profiling.phase("a") is profiling.phase("b")
+        with profiling.phase("a"):
+            profiling.count("files")
+            profiling.observe("http", 0.1)
+
+    def test_phases_counters_and_latencies(self, profiler):
+        with profiling.phase("walk"):
+            profiling.count("files visited", 3)
+        with profiling.phase("walk"):
+            profiling.count("files visited")
+        profiling.observe("http", 0.25)
+
+        assert profiler.phases["walk"][0] == 2
+        assert profiler.counters["files visited"] == 4
+        text = "\n".join(profiler.summary())
+        assert "walk" in text and "files visited" in text and "http latency" in text
+
+    def test_trace_is_chrome_trace_format(self, profiler, tmp_path):
+        with profiling.phase("parse", files=2):
+            profiling.count("files parsed", 2)
+        path = tmp_path / "trace.json"
+        profiler.write_trace(path)
+
+        events = json.loads(path.read_text())["traceEvents"]
+        complete = [e for e in events if e["ph"] == "X"]
+        assert complete[0]["name"] == "parse" and complete[0]["args"] == {"files": 2}
+        assert complete[0]["dur"] >= 0 and "tid" in complete[0]
+        assert events[-1]["ph"] == "C" and events[-1]["args"] == {"files parsed": 2}
+
+    def test_http_failures_are_counted(self, profiler):
+        class TimingOut:
+            def get(self, url, **kwargs):
+                raise type("ReadTimeout", (Exception,), {})()
+
+        assert fetch_project_info("pkg", session=TimingOut(), index_url="http://index.invalid") is None
+        assert profiler.counters["http requests"] == 1
+        assert profiler.counters["http timeouts"] == 1
+        assert len(profiler.latencies["http"]) == 1
+
+
+class TestCli:
+    def test_profile_and_trace_options(self, tmp_path, monkeypatch, capsys):
+        monkeypatch.setenv("AUTO_REQS_CACHE_DIR", str(tmp_path / "cache"))
+        snapshot = tmp_path / "snapshot.json"
+        snapshot.write_text(json.dumps({"zzprof-pkg": "1.0"}))
+        repo = tmp_path / "repo"
+        repo.mkdir()
+        (repo / "app.py").write_text("import os\nimport zzprof_pkg\n")
+        trace = tmp_path / "trace.json"
+
+        cli.main([
+            "update", str(repo), "--dry-run", "--index-url", f"file://{snapshot}",
+            "--profile", "--trace", str(trace),
+        ])
+        out = capsys.readouterr().out
+        assert "zzprof-pkg==1.0" in out
+        assert "files parsed" in out and "local index lookups" in out
+        names = {e["name"] for e in json.loads(trace.read_text())["traceEvents"]}
+        assert {"walk", "parse", "classify", "determine changes"} <= names
+        assert not profiling.enabled()
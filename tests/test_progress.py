@@ -0,0 +1,30 @@
+import io
+from auto_reqs.progress import ScanProgress
+
+
+class FakeTty(io.StringIO):
+    def isatty(self):
+        return True
+
+
+class TestScanProgress:
+    def test_format_includes_rate_and_eta(self):
+        assert ScanProgress.format(50, 200, 2.0) == "Scanned 50/200 files (25 files/s, ETA 6s)"
+        assert ScanProgress.format(200, 200, 4.0) == "Scanned 200/200 files (50 files/s)"
+
+    def test_redraws_in_place_on_tty_and_clears(self):
+        stream = FakeTty()
+        progress = ScanProgress(stream, interval=0)
+        progress(1, 2)
+        progress(2, 2)
+        progress.finish()
+        out = stream.getvalue()
+        assert out.count("\r") >= 3 and "Scanned 2/2 files" in out
+        assert out.endswith("\r")
+
+    def test_silent_when_not_a_tty(self):
+        stream = io.StringIO()
+        progress = ScanProgress(stream)
+        progress(1, 1)
+        progress.finish()
+        assert stream.getvalue() == ""
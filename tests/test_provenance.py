@@ -0,0 +1,103 @@
+import os
+import pytest
+from auto_reqs import cli
+from auto_reqs.provenance import ProvenanceIndex
+from auto_reqs.resolver import ResolverIndex
+
+
+def make_tree(root, files):
+    for rel, text in files.items():
+        path = root / rel
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(text)
+
+
+def py_files(root):
+    return sorted(str(p) for p in root.rglob("*.py") if ".auto-reqs-cache" not in p.parts)
+
+
+@pytest.fixture
+def repo(tmp_path):
+    root = tmp_path / "repo"
+    make_tree(root, {
+        "app.py": "import os\nimport yaml\n",
+        "pkg/loader.py": "x = 1\nfrom yaml.constructor import Constructor\n",
+        "pkg/http.py": "import requests.adapters\n",
+    })
+    return root
+
+
+class TestProvenanceIndex:
+    def test_why_by_import_and_distribution_name(self, repo):
+        with ProvenanceIndex.open(repo) as index:
+            assert index.refresh(py_files(repo)) == (3, 0)
+            index.resolve_distributions(ResolverIndex({"yaml": ["pyyaml"]}, fingerprint="fp"))
+            expected = [
+                ("app.py", 2, "yaml"),
+                (os.path.join("pkg", "loader.py"), 2, "yaml.constructor"),
+            ]
+            assert index.why("PyYAML") == expected
+            assert index.why("yaml") == expected
+            assert index.why("requests") == [(os.path.join("pkg", "http.py"), 1, "requests.adapters")]
+            assert list(index.names()) == ["os", "requests", "yaml"]
+
+    def test_refresh_is_incremental(self, repo):
+        with ProvenanceIndex.open(repo) as index:
+            index.refresh(py_files(repo))
+            assert index.refresh(py_files(repo)) == (0, 0)
+
+            (repo / "app.py").write_text("import os\n\n\nimport yaml  # moved\n")
+            (repo / "pkg" / "http.py").unlink()
+            assert index.refresh(py_files(repo)) == (1, 1)
+            assert ("app.py", 4, "yaml") in index.why("yaml")
+            assert index.why("requests") == []
+            assert len(index) == 2
+
+    def test_persists_and_remaps_on_new_fingerprint(self, repo):
+        with ProvenanceIndex.open(repo) as index:
+            index.refresh(py_files(repo))
+            index.resolve_distributions(ResolverIndex({}, fingerprint="a"))
+        with ProvenanceIndex.open(repo) as index:
+            assert len(index) == 3
+            assert index.why("pyyaml") == []
+            index.resolve_distributions(ResolverIndex({"yaml": ["pyyaml"]}, fingerprint="b"))
+            assert len(index.why("pyyaml")) == 2
+
+
+class TestWhyCommand:
+    def test_builds_index_and_reports_locations(self, repo, capsys):
+        with pytest.raises(SystemExit):
+            cli.main(["why", "zz-not-imported", str(repo)])
+        assert "No file imports zz-not-imported." in capsys.readouterr().out
+
+        cli.main(["why", "requests", str(repo)])
+        out = capsys.readouterr().out
+        assert "requests is imported 1 times in 1 files:" in out
+        assert f"{os.path.join('pkg', 'http.py')}:1  requests.adapters" in out
+
+    @pytest.fixture
+    def update(self, repo, tmp_path, monkeypatch):
+        monkeypatch.setenv("AUTO_REQS_CACHE_DIR", str(tmp_path / "cache"))
+        snapshot = tmp_path / "snapshot.json"
+        snapshot.write_text('{"zzwhy-pkg": "1.0"}')
+        return lambda *extra: cli.main(["update", str(repo), "--no-daemon", "--index-url", f"file://{snapshot}", *extra])
+
+    def test_update_indexes_the_scanned_records(self, repo, update, monkeypatch, capsys):
+        def no_reread(path, max_file_size=None):
+            raise AssertionError(f"{path} should not be read again")
+
+        monkeypatch.setattr("auto_reqs.provenance.extract_import_records_from_file", no_reread)
+        (repo / "new.py").write_text("import zzwhy_pkg\n")
+        update()
+        update()
+        (repo / "new.py").write_text("\nimport zzwhy_pkg\n")
+        update()
+        capsys.readouterr()
+
+        cli.main(["why", "zzwhy-pkg", str(repo)])
+        assert "new.py:2  zzwhy_pkg" in capsys.readouterr().out
+
+    def test_dry_run_leaves_the_index_alone(self, repo, update):
+        update("--dry-run")
+        with ProvenanceIndex.open(repo) as index:
+            assert len(index) == 0
@@ -0,0 +1,98 @@
+import os
+import stat
+from auto_reqs import requirements
+from auto_reqs.requirements import RequirementsFile, write_text_if_changed
+
+ORIGINAL = (
+    "# Runtime dependencies\n"
+    "--index-url https://example.org/simple\n"
+    "\n"
+    "Flask[async]>=2.0,<3 ; python_version >= '3.8'  # web\n"
+    "numpy==1.26.0 \\\n"
+    "    --hash=sha256:abc\n"
+    "requests==2.31.0\n"
+    "-e ./local/pkg\n"
+    "mylib @ https://example.org/mylib-1.0.zip\n"
+)
+
+
+class TestParse:
+    def test_names_and_pins(self, tmp_path):
+        path = tmp_path / "requirements.txt"
+        path.write_text(ORIGINAL)
+        assert RequirementsFile.load(str(path)).requirements() == {
+            "flask": None,
+            "numpy": "1.26.0",
+            "requests": "2.31.0",
+            "mylib": None,
+        }
+
+    def test_round_trip_is_byte_identical(self, tmp_path):
+        path = tmp_path / "requirements.txt"
+        path.write_bytes(ORIGINAL.replace("\n", "\r\n").encode())
+        doc = RequirementsFile.load(str(path))
+        assert doc.render().encode() == path.read_bytes()
+        assert not doc.save()
+
+    def test_includes_are_parsed_once(self, tmp_path, monkeypatch):
+        (tmp_path / "base.txt").write_text("-r requirements.txt\nrequests==2.0\n")
+        (tmp_path / "dev.txt").write_text("-r base.txt\npytest\n")
+        (tmp_path / "requirements.txt").write_text("-r base.txt\n--requirement=dev.txt\nrequests==1.0\n")
+        parsed = []
+        original = requirements._split_entries
+        monkeypatch.setattr(requirements, "_split_entries", lambda text: parsed.append(text) or original(text))
+        doc = RequirementsFile.load(str(tmp_path / "requirements.txt"))
+        assert len(parsed) == 3
+        # The top-level file wins, includes count as present but are not "defined" here.
+        assert doc.requirements() == {"requests": "1.0", "pytest": None}
+        assert doc.defines("requests") and not doc.defines("pytest")
+
+
+class TestEdit:
+    def test_minimal_edit_keeps_everything_else(self, tmp_path):
+        path = tmp_path / "requirements.txt"
+        path.write_text(ORIGINAL)
+        doc = RequirementsFile.load(str(path))
+        doc.apply([("pyyaml", "6.0")], ["requests"])
+        assert doc.save()
+        # Unsorted files get new lines after their last requirement.
+        assert path.read_text() == ORIGINAL.replace("requests==2.31.0\n", "") + "pyyaml==6.0\n"
+
+    def test_sorted_files_stay_sorted(self, tmp_path):
+        path = tmp_path / "requirements.txt"
+        path.write_text("# pins\nalpha==1\ngamma==3\n")
+        doc = RequirementsFile.load(str(path))
+        doc.apply([("beta", "2"), ("aaa", None), ("zeta", "9")], [])
+        doc.save()
+        assert path.read_text() == "# pins\naaa\nalpha==1\nbeta==2\ngamma==3\nzeta==9\n"
+
+    def test_new_file_gets_header_and_missing_newline_is_added(self, tmp_path):
+        path = tmp_path / "requirements.txt"
+        doc = RequirementsFile.load(str(path))
+        doc.apply([("requests", "2.0")], [])
+        doc.save()
+        assert path.read_text() == "# Automatically maintained by auto-reqs\nrequests==2.0\n"
+
+        path.write_text("zlib==1")
+        doc = RequirementsFile.load(str(path))
+        doc.apply([("abc", "1")], [])
+        doc.save()
+        assert path.read_text() == "abc==1\nzlib==1\n"
+
+
+class TestWriteTextIfChanged:
+    def test_unchanged_content_is_not_rewritten(self, tmp_path):
+        path = tmp_path / "requirements.txt"
+        path.write_text("requests==2.0\n")
+        os.utime(path, ns=(1_000_000_000, 1_000_000_000))
+        assert not write_text_if_changed(str(path), "requests==2.0\n")
+        assert path.stat().st_mtime_ns == 1_000_000_000
+
+    def test_replacement_keeps_mode_and_leaves_no_temp_file(self, tmp_path):
+        path = tmp_path / "requirements.txt"
+        path.write_text("old\n")
+        path.chmod(0o640)
+        assert write_text_if_changed(str(path), "new\n")
+        assert path.read_text() == "new\n"
+        assert stat.S_IMODE(path.stat().st_mode) == 0o640
+        assert os.listdir(tmp_path) == ["requirements.txt"]
@@ -2,10 +2,15 @@ import pytest
 import importlib.metadata
 import requests
 from auto_reqs.resolver import (
+    ResolverIndex,
+    fetch_project_info,
+    resolve_many,
+    site_packages_fingerprint,
     get_installed_distributions,
     resolve_import_to_pkg,
     get_latest_version_from_pypi,
 )
+from auto_reqs.cache import MetadataCache
 from auto_reqs.utils import normalize_pkg_name
 
 
@@ -95,3 +100,157 @@ class TestGetLatestVersionFromPypi:
 
         version = get_latest_version_from_pypi("doesnotexist")
         assert version is None
+
+
+class TestResolverIndex:
+    def test_ambiguous_mappings_are_explicit(self, monkeypatch):
+        """Should expose every provider and resolve ambiguity deterministically."""
+        fake_mapping = {
+            "google": ["protobuf", "googleapis-common-protos", "protobuf"],
+            "yaml": ["PyYAML"],
+            "attr": ["attrs", "attr"],
+        }
+        monkeypatch.setattr(importlib.metadata, "packages_distributions", lambda: fake_mapping)
+
+        index = ResolverIndex.from_metadata()
+        assert index.candidates("google") == ["protobuf", "googleapis-common-protos"]
+        assert index.resolve("google") == "googleapis-common-protos"
+        assert index.resolve("attr") == "attr"
+        assert index.resolve("yaml") == "pyyaml"
+        assert index.resolve("missing") is None
+        assert set(index.ambiguous()) == {"google", "attr"}
+
+    def test_normalized_import_names_resolve(self):
+        """Should find my_mod when asked for its normalized form my-mod."""
+        index = ResolverIndex({"my_mod": ["my-dist"]})
+        assert index.resolve("my-mod") == "my-dist"
+        assert index.candidates("my-mod") == ["my-dist"]
+
+    def test_site_packages_fingerprint_tracks_dist_info(self, tmp_path):
+        """Should change when a distribution is installed into a site dir."""
+        before = site_packages_fingerprint([str(tmp_path)])
+        (tmp_path / "demo-1.0.dist-info").mkdir()
+        assert site_packages_fingerprint([str(tmp_path)]) != before
+
+
+@pytest.fixture
+def stand_in_index():
+    """Serve a tiny PyPI-style JSON API on localhost."""
+    import json
+    import threading
+    import time
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    versions = {f"pkg{i}": f"1.{i}.0" for i in range(8)}
+    versions["pyyaml"] = "6.0.1"
+    hits = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            name = self.path.strip("/").split("/")[1]
+            hits.append(name)
+            time.sleep(0.2)
+            if name not in versions:
+                self.send_response(404)
+                self.end_headers()
+                return
+            etag = f'"{name}-{versions[name]}"'
+            if self.headers.get("If-None-Match") == etag:
+                self.send_response(304)
+                self.end_headers()
+                return
+            body = json.dumps({"info": {"version": versions[name]}}).encode()
+            self.send_response(200)
+            self.send_header("ETag", etag)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    Handler.versions = versions
+    yield f"http://127.0.0.1:{server.server_address[1]}/pypi", hits
+    server.shutdown()
+    server.server_close()
+
+
+class TestResolveMany:
+    def test_batch_lookup_runs_concurrently(self, stand_in_index):
+        """Should resolve all names against the index in parallel."""
+        import time
+
+        index_url, hits = stand_in_index
+        names = [f"pkg{i}" for i in range(8)]
+        start = time.perf_counter()
+        results = resolve_many(
+            names, index=ResolverIndex({}), max_workers=8, index_url=index_url
+        )
+        elapsed = time.perf_counter() - start
+
+        assert results == {f"pkg{i}": (f"pkg{i}", f"1.{i}.0") for i in range(8)}
+        assert sorted(hits) == sorted(names)
+        assert elapsed < 0.2 * len(names) / 2
+
+    def test_local_resolution_skips_network(self, stand_in_index):
+        """Should answer installed packages from the index without HTTP."""
+        index_url, hits = stand_in_index
+        index = ResolverIndex({"yaml": ["pyyaml"]})
+        results = resolve_many(["yaml"], {"pyyaml": "6.0"}, index=index, index_url=index_url)
+        assert results == {"yaml": ("pyyaml", "6.0")}
+        assert hits == []
+
+    def test_falls_back_to_raw_name_and_reports_unknown(self, stand_in_index):
+        """Should try the raw import name and return None when nothing matches."""
+        index_url, hits = stand_in_index
+        index = ResolverIndex({"yaml": ["pyyaml"]})
+        results = resolve_many(["yaml", "nothing"], index=index, index_url=index_url)
+        assert results == {"yaml": ("pyyaml", "6.0.1"), "nothing": ("nothing", None)}
+
+    def test_custom_fetch_version(self):
+        """Should use the supplied per-package lookup."""
+        results = resolve_many(
+            ["a", "b"], index=ResolverIndex({}), fetch_version=lambda pkg: {"b": "2.0"}.get(pkg)
+        )
+        assert results == {"a": ("a", None), "b": ("b", "2.0")}
+
+
+class TestFetchProjectInfo:
+    def test_fresh_entries_skip_the_network(self, stand_in_index, tmp_path):
+        """Should answer repeat lookups from the cache within the TTL."""
+        index_url, hits = stand_in_index
+        cache = MetadataCache(str(tmp_path / "meta.json"), ttl=3600)
+
+        assert get_latest_version_from_pypi("pkg1", index_url=index_url, cache=cache) == "1.1.0"
+        assert get_latest_version_from_pypi("pkg1", index_url=index_url, cache=cache) == "1.1.0"
+        assert hits == ["pkg1"]
+
+    def test_stale_entries_are_revalidated(self, stand_in_index, tmp_path):
+        """Should send If-None-Match once stale and keep the entry on 304."""
+        index_url, hits = stand_in_index
+        cache = MetadataCache(str(tmp_path / "meta.json"), ttl=0)
+
+        assert get_latest_version_from_pypi("pkg2", index_url=index_url, cache=cache) == "1.2.0"
+        assert get_latest_version_from_pypi("pkg2", index_url=index_url, cache=cache) == "1.2.0"
+        assert hits == ["pkg2", "pkg2"]
+        assert cache.stats()["revalidated"] == 1
+
+    def test_missing_projects_are_cached(self, stand_in_index, tmp_path):
+        """Should remember 404s so unknown names are not refetched."""
+        index_url, hits = stand_in_index
+        cache = MetadataCache(str(tmp_path / "meta.json"), ttl=3600)
+
+        info = fetch_project_info("ghost", index_url=index_url, cache=cache)
+        assert info == {"exists": False, "version": None}
+        assert fetch_project_info("ghost", index_url=index_url, cache=cache)["exists"] is False
+        assert hits == ["ghost"]
+
+    def test_unreachable_index_serves_stale_entry(self, tmp_path):
+        """Should fall back to a stale entry when the index cannot be reached."""
+        cache = MetadataCache(str(tmp_path / "meta.json"), ttl=0)
+        cache.store("http://127.0.0.1:9/pypi/pkg/json", True, "3.0")
+        assert get_latest_version_from_pypi("pkg", index_url="http://127.0.0.1:9/pypi", cache=cache) == "3.0"
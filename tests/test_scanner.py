@@ -1,6 +1,14 @@
 import os
 import pytest
-from auto_reqs.scanner import extract_imports_from_file, scan_project_for_imports, EXCLUDE_DIRS_DEFAULT
+from auto_reqs.cache import ImportCache
+from auto_reqs.scanner import (
+    EXCLUDE_DIRS_DEFAULT,
+    collect_local_modules,
+    extract_imports_from_file,
+    iter_project_imports,
+    scan_project,
+    scan_project_for_imports,
+)
 
 
 class TestExtractImportsFromFile:
@@ -82,3 +90,135 @@ class TestScanProjectForImports:
         """Sanity-check that EXCLUDE_DIRS_DEFAULT includes key standard dirs."""
         expected = {"__pycache__", ".git", "venv"}
         assert expected.issubset(EXCLUDE_DIRS_DEFAULT)
+
+
+class TestParallelScan:
+    def _make_project(self, root, count):
+        for i in range(count):
+            pkg = root / f"pkg{i % 5}"
+            pkg.mkdir(parents=True, exist_ok=True)
+            (pkg / f"mod{i}.py").write_text(f"import lib{i % 7}\nfrom shared{i % 3} import x\n")
+
+    def test_parallel_scan_matches_serial(self, tmp_path, monkeypatch):
+        """Should return exactly the same imports as a serial scan."""
+        self._make_project(tmp_path, 40)
+        monkeypatch.setattr("auto_reqs.scanner.PARALLEL_MIN_FILES", 1)
+
+        serial = scan_project_for_imports(tmp_path)
+        parallel = scan_project_for_imports(tmp_path, workers=2)
+        assert parallel == serial
+        assert "lib6" in parallel and "shared2" in parallel
+
+    def test_small_tree_falls_back_to_serial(self, tmp_path, monkeypatch):
+        """Should not start a process pool for trees below the threshold."""
+        self._make_project(tmp_path, 3)
+
+        def no_pool(*args, **kwargs):
+            raise AssertionError("process pool should not be used")
+
+        monkeypatch.setattr("concurrent.futures.ProcessPoolExecutor", no_pool)
+        imports = scan_project_for_imports(tmp_path, workers=4)
+        assert imports == {"lib0", "lib1", "lib2", "shared0", "shared1", "shared2"}
+
+
+class TestLocalModuleIndex:
+    def test_collects_names_from_every_layout(self, tmp_path):
+        """Should index root, src/, namespace, configured and nested-project modules."""
+        files = {
+            "tool.py": "import helpers\n",
+            "helpers/__init__.py": "",
+            "src/mypkg/core.py": "import mypkg.util\n",
+            "nsroot/sub/mod.py": "",
+            "lib/python/extra.py": "",
+            "services/api/setup.py": "",
+            "services/api/apiapp/__init__.py": "",
+            "my-scripts/run.py": "",
+        }
+        for rel, text in files.items():
+            path = tmp_path / rel
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text(text)
+
+        result = scan_project(tmp_path, source_roots=["lib/python"])
+        assert result.imports == {"helpers", "mypkg"}
+        assert {"tool", "helpers", "mypkg", "nsroot", "extra", "apiapp", "services"} <= result.local_modules
+        assert "my-scripts" not in result.local_modules
+        assert "src" in result.local_modules  # harmless: src/ is a namespace dir of the root
+
+    def test_excluded_dirs_are_not_indexed(self, tmp_path):
+        """Should not index modules inside excluded directories."""
+        (tmp_path / "venv" / "lib").mkdir(parents=True)
+        (tmp_path / "venv" / "lib" / "requests.py").write_text("")
+        assert "venv" not in scan_project(tmp_path).local_modules
+
+    def test_collect_local_modules_from_paths(self, tmp_path):
+        """Should derive names from a plain list of paths without touching disk."""
+        root = str(tmp_path)
+        paths = [os.path.join(root, "a.py"), os.path.join(root, "src", "b", "c.py"), os.path.join(root, "__init__.py")]
+        expected = {"a", "b", "src"}
+        if tmp_path.name.isidentifier():
+            expected.add(tmp_path.name)
+        assert collect_local_modules(paths, root) == expected
+
+
+class TestIterProjectImports:
+    def test_yields_per_file_records_and_progress(self, tmp_path):
+        """Should yield one record per file and report progress after each."""
+        (tmp_path / "a.py").write_text("import os\nimport requests\n")
+        (tmp_path / "b.py").write_text("import numpy\n")
+        calls = []
+        records = list(iter_project_imports(tmp_path, progress=lambda done, total: calls.append((done, total))))
+
+        by_name = {os.path.basename(r.path): r for r in records}
+        assert by_name["a.py"].imports == {"os", "requests"}
+        assert by_name["b.py"].imports == {"numpy"}
+        assert all(r.error is None for r in records)
+        assert calls == [(1, 2), (2, 2)]
+
+    def test_unreadable_file_is_reported_not_raised(self, tmp_path):
+        """Should report a read failure in the record and keep scanning."""
+        (tmp_path / "good.py").write_text("import json\n")
+        os.symlink(tmp_path / "missing.py", tmp_path / "dangling.py")
+        records = {os.path.basename(r.path): r for r in iter_project_imports(tmp_path)}
+        assert records["dangling.py"].imports == set()
+        assert records["dangling.py"].error.startswith("FileNotFoundError")
+        assert scan_project_for_imports(tmp_path) == {"json"}
+
+    def test_cached_files_come_first_and_cache_is_updated(self, tmp_path):
+        """Should yield cache hits before parsing and store newly parsed files."""
+        (tmp_path / "old.py").write_text("import os\n")
+        cache = ImportCache(str(tmp_path / "cache.json"), "test")
+        list(iter_project_imports(tmp_path, cache=cache))
+        (tmp_path / "new.py").write_text("import sys\n")
+
+        records = list(iter_project_imports(tmp_path, cache=cache))
+        assert [os.path.basename(r.path) for r in records] == ["old.py", "new.py"]
+        assert len(cache.entries) == 2
+
+    def test_on_new_imports_sees_each_name_once(self, tmp_path):
+        """Should report newly seen names, with the local modules, during the scan."""
+        (tmp_path / "a.py").write_text("import os\nimport b\n")
+        (tmp_path / "b.py").write_text("import os\nimport yaml\n")
+        batches = []
+        result = scan_project(tmp_path, on_new_imports=lambda names, local: batches.append((set(names), local)))
+        seen = [name for names, _ in batches for name in names]
+        assert sorted(seen) == ["b", "os", "yaml"]
+        assert all(local == {"a", "b"} for _, local in batches)
+        assert result.imports == {"b", "os", "yaml"}
+
+    def test_import_records_of_parsed_files(self, tmp_path, monkeypatch):
+        """Should hand out line/module records for parsed files, serially or in parallel."""
+        (tmp_path / "old.py").write_text("import os\n")
+        cache = ImportCache(str(tmp_path / "cache.json"), "test")
+        scan_project(tmp_path, cache=cache)
+        (tmp_path / "new.py").write_text("x = 1\nimport xml.etree\n")
+        monkeypatch.setattr("auto_reqs.scanner.PARALLEL_MIN_FILES", 1)
+
+        for workers in (1, 2):
+            import_records = {}
+            result = scan_project(tmp_path, workers=workers, import_records=import_records)
+            assert import_records == {str(tmp_path / "new.py"): [(2, "xml.etree")], str(tmp_path / "old.py"): [(1, "os")]}
+            assert result.imports == {"os", "xml"}
+        import_records = {}
+        scan_project(tmp_path, cache=cache, import_records=import_records)
+        assert list(import_records) == [str(tmp_path / "new.py")]
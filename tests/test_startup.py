@@ -0,0 +1,59 @@
+import os
+import subprocess
+import sys
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Budgets for the cumulative import time of auto_reqs' own top-level
+# imports, in milliseconds. Generous enough for slow CI machines, yet far
+# below what importing requests or crawling importlib.metadata costs.
+HELP_IMPORT_BUDGET_MS = 100
+NOOP_IMPORT_BUDGET_MS = 150
+
+# Modules that must never be loaded unless a code path needs them.
+HEAVY_MODULES = ("requests", "urllib3", "stdlib_list", "importlib.metadata", "multiprocessing")
+
+
+def run_with_importtime(args, cache_dir):
+    env = {**os.environ, "PYTHONPATH": ROOT, "AUTO_REQS_CACHE_DIR": str(cache_dir)}
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-m", "auto_reqs.cli", *args],
+        capture_output=True, text=True, env=env, check=False,
+    )
+    assert proc.returncode == 0, proc.stderr
+    own_ms, imported = 0.0, set()
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        if not cumulative.strip().isdigit():
+            continue
+        imported.add(name.strip())
+        if name.startswith(" auto_reqs"):
+            own_ms += int(cumulative) / 1000
+    return own_ms, imported
+
+
+@pytest.fixture
+def noop_project(tmp_path):
+    repo = tmp_path / "repo"
+    repo.mkdir()
+    (repo / "app.py").write_text("import os\nimport json\nfrom app_helpers import x\n")
+    (repo / "app_helpers.py").write_text("x = 1\n")
+    (repo / "requirements.txt").write_text("")
+    return repo
+
+
+class TestStartup:
+    def test_help_stays_within_budget(self, tmp_path):
+        own_ms, imported = run_with_importtime(["--help"], tmp_path)
+        assert not imported & set(HEAVY_MODULES)
+        assert own_ms < HELP_IMPORT_BUDGET_MS
+
+    def test_cached_noop_run_stays_within_budget(self, tmp_path, noop_project):
+        args = ["update", str(noop_project), "--no-daemon"]
+        run_with_importtime(args, tmp_path)
+        own_ms, imported = run_with_importtime(args, tmp_path)
+        assert not imported & set(HEAVY_MODULES)
+        assert own_ms < NOOP_IMPORT_BUDGET_MS
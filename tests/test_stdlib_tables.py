@@ -0,0 +1,51 @@
+import json
+import sys
+import pytest
+from auto_reqs import cli
+from auto_reqs.stdlib_tables import TABLES_FILE, stdlib_module_names, table_versions
+
+RUNNING = f"{sys.version_info.major}.{sys.version_info.minor}"
+
+
+class TestStdlibTables:
+    def test_every_supported_version_ships(self):
+        for version in ("3.9", "3.10", "3.11", "3.12", "3.13"):
+            assert version in table_versions()
+            assert {"os", "json", "asyncio"} <= stdlib_module_names(version)
+        assert stdlib_module_names("2.7") is None
+
+    def test_tables_are_cached(self):
+        assert stdlib_module_names("3.12") is stdlib_module_names("3.12")
+
+    def test_names_are_public_top_level_modules(self):
+        with open(TABLES_FILE, encoding="utf-8") as f:
+            data = json.load(f)
+        names = [name for group in data["tables"].values() for name in group]
+        assert len(names) == len(set(names))
+        assert not [name for name in names if name.startswith("_") or "." in name]
+
+    @pytest.mark.skipif(RUNNING not in table_versions(), reason="no table for the running interpreter")
+    def test_running_version_matches_the_interpreter(self):
+        public = {name for name in sys.stdlib_module_names if not name.startswith("_")}
+        assert stdlib_module_names(RUNNING) == public
+
+
+class TestTargetPythonCli:
+    def test_target_version_decides_stdlib(self, tmp_path, monkeypatch, capsys):
+        monkeypatch.setenv("AUTO_REQS_CACHE_DIR", str(tmp_path / "cache"))
+        snapshot = tmp_path / "snapshot.json"
+        snapshot.write_text(json.dumps({}))
+        repo = tmp_path / "repo"
+        repo.mkdir()
+        (repo / "settings.py").write_text("import tomllib\n")
+        args = ["update", str(repo), "--dry-run", "--no-daemon", "--index-url", f"file://{snapshot}"]
+
+        cli.main(args + ["--target-python", "3.12"])
+        assert "tomllib" not in capsys.readouterr().out
+        cli.main(args + ["--target-python", "3.10"])
+        assert "Could not find version for 'tomllib'" in capsys.readouterr().out
+
+    def test_unknown_version_is_rejected(self, tmp_path, capsys):
+        with pytest.raises(SystemExit):
+            cli.main(["update", str(tmp_path), "--target-python", "2.5"])
+        assert "no stdlib table for Python '2.5'" in capsys.readouterr().err
@@ -41,16 +41,31 @@ class TestWriteRequirements:
         assert content[1:] == ["flask==2.3.0", "numpy", "requests==2.31.0"]
 
 
+def fake_resolve_many(to_pkg):
+    """A resolve_many stand-in mapping import names to packages with to_pkg."""
+    def resolve_many(names, installed=None, fetch_version=None, **kwargs):
+        results = {}
+        for name in names:
+            pkg = to_pkg(name)
+            results[name] = (pkg, (installed or {}).get(pkg) or fetch_version(pkg))
+        return results
+    return resolve_many
+
+
 class TestDetermineChanges:
     def test_detects_missing_and_unused_packages(self, monkeypatch, tmp_path):
         """Should detect new imports and remove unused ones accurately."""
         # Treat os/sys as stdlib and my_local as local module
-        monkeypatch.setattr("auto_reqs.classifier.is_stdlib", lambda n: n in {"os", "sys"})
-        monkeypatch.setattr("auto_reqs.classifier.is_local_module", lambda n, p: n == "my_local")
+        def fake_classify_many(names, repo_path=None, local_modules=None, python_version=None):
+            return {
+                n: "stdlib" if n in {"os", "sys"} else "local" if n == "my_local" else "third-party"
+                for n in names
+            }
+        monkeypatch.setattr("auto_reqs.classifier.classify_many", fake_classify_many)
 
         # Patch normalization & resolver as used inside updater
         monkeypatch.setattr("auto_reqs.updater.normalize_pkg_name", lambda n: n.lower().replace("_", "-"))
-        monkeypatch.setattr("auto_reqs.updater.resolve_import_to_pkg", lambda n: n.lower().replace("_", "-"))
+        monkeypatch.setattr("auto_reqs.resolver.resolve_many", fake_resolve_many(lambda n: n.lower().replace("_", "-")))
 
         installed = {"requests": "2.31.0", "flask": "3.0.0"}
         resolver = lambda pkg: {"numpy": "1.26.0"}.get(pkg)
@@ -68,9 +83,10 @@ class TestDetermineChanges:
 
     def test_warns_when_version_missing(self, monkeypatch, capsys, tmp_path):
         """Should warn and skip if resolver and installed cannot find version."""
-        monkeypatch.setattr("auto_reqs.classifier.is_stdlib", lambda n: False)
-        monkeypatch.setattr("auto_reqs.classifier.is_local_module", lambda n, p: False)
-        monkeypatch.setattr("auto_reqs.resolver.resolve_import_to_pkg", lambda n: n)
+        monkeypatch.setattr(
+            "auto_reqs.classifier.classify_many", lambda names, repo_path=None, local_modules=None, python_version=None: dict.fromkeys(names, "third-party")
+        )
+        monkeypatch.setattr("auto_reqs.resolver.resolve_many", fake_resolve_many(lambda n: n))
         monkeypatch.setattr("auto_reqs.utils.normalize_pkg_name", lambda n: n.lower())
 
         imports = {"unknownlib"}
@@ -87,9 +103,10 @@ class TestDetermineChanges:
 
     def test_normalizes_import_names(self, monkeypatch, tmp_path):
         """Should normalize all names before comparison."""
-        monkeypatch.setattr("auto_reqs.classifier.is_stdlib", lambda n: False)
-        monkeypatch.setattr("auto_reqs.classifier.is_local_module", lambda n, p: False)
-        monkeypatch.setattr("auto_reqs.resolver.resolve_import_to_pkg", lambda n: n.lower())
+        monkeypatch.setattr(
+            "auto_reqs.classifier.classify_many", lambda names, repo_path=None, local_modules=None, python_version=None: dict.fromkeys(names, "third-party")
+        )
+        monkeypatch.setattr("auto_reqs.resolver.resolve_many", fake_resolve_many(lambda n: n.lower()))
         monkeypatch.setattr("auto_reqs.utils.normalize_pkg_name", lambda n: n.lower())
 
         installed = {"requests": "2.31.0"}
@@ -0,0 +1,108 @@
+import os
+import pytest
+from auto_reqs.walker import PathMatcher, ProjectFiles
+
+
+def make_tree(root, files):
+    for rel, text in files.items():
+        path = root / rel
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(text)
+
+
+def rel_paths(files, root):
+    return sorted(os.path.relpath(p, root).replace(os.sep, "/") for p in files)
+
+
+class TestPathMatcher:
+    def test_unanchored_name_matches_at_any_depth(self):
+        matcher = PathMatcher(["node_modules", "*.pyc"])
+        assert matcher.match("node_modules", True) is True
+        assert matcher.match("web/node_modules", True) is True
+        assert matcher.match("a/b/c.pyc", False) is True
+        assert matcher.match("src/app.py", False) is None
+
+    def test_anchored_and_dir_only_patterns(self):
+        matcher = PathMatcher(["/build", "data/raw/", "docs/**/gen_*.py"])
+        assert matcher.match("build", True) is True
+        assert matcher.match("pkg/build", True) is None
+        assert matcher.match("data/raw", True) is True
+        assert matcher.match("data/raw", False) is None
+        assert matcher.match("docs/a/b/gen_x.py", False) is True
+        assert matcher.match("docs/gen_x.py", False) is True
+
+    def test_negation_last_match_wins(self):
+        matcher = PathMatcher(["*.py", "!keep.py", "# comment", ""])
+        assert matcher.match("drop.py", False) is True
+        assert matcher.match("sub/keep.py", False) is False
+
+    def test_base_restricts_scope(self):
+        matcher = PathMatcher(["generated"], base="pkg")
+        assert matcher.match("pkg/generated", True) is True
+        assert matcher.match("other/generated", True) is None
+
+
+class TestProjectFiles:
+    def test_honours_gitignore_and_exclude_patterns(self, tmp_path):
+        make_tree(tmp_path, {
+            ".gitignore": "build/\n*_pb2.py\n",
+            "app.py": "",
+            "gen_pb2.py": "",
+            "build/out.py": "",
+            "node_modules/pkg/x.py": "",
+            "pkg/.gitignore": "local_only.py\n!keep_pb2.py\n",
+            "pkg/local_only.py": "",
+            "pkg/keep_pb2.py": "",
+            "pkg/mod.py": "",
+            "data/big/a.py": "",
+            ".hidden/x.py": "",
+        })
+        files = ProjectFiles(tmp_path, ["node_modules", "data/big"])
+        assert rel_paths(files, tmp_path) == ["app.py", "pkg/keep_pb2.py", "pkg/mod.py"]
+
+    def test_gitignore_can_be_disabled(self, tmp_path):
+        make_tree(tmp_path, {".gitignore": "*.py\n", "app.py": ""})
+        assert rel_paths(ProjectFiles(tmp_path, use_gitignore=False), tmp_path) == ["app.py"]
+        assert list(ProjectFiles(tmp_path)) == []
+
+    def test_validation_short_circuits_and_walk_is_reused(self, tmp_path, monkeypatch):
+        """Should stop at the first .py file and resume the same walk later."""
+        make_tree(tmp_path, {f"d{i}/m.py": "" for i in range(5)})
+        make_tree(tmp_path, {"top.py": ""})
+        calls = []
+        real_scandir = os.scandir
+
+        def counting_scandir(path):
+            calls.append(path)
+            return real_scandir(path)
+
+        monkeypatch.setattr(os, "scandir", counting_scandir)
+        files = ProjectFiles(tmp_path)
+        assert files.has_python_files()
+        assert len(calls) == 1
+
+        assert len(list(files)) == 6
+        assert len(list(files)) == 6
+        assert len(calls) == 6
+
+    def test_collects_project_markers(self, tmp_path):
+        make_tree(tmp_path, {"svc/pyproject.toml": "", "svc/app/main.py": ""})
+        files = ProjectFiles(tmp_path)
+        list(files)
+        assert files.project_dirs == {str(tmp_path / "svc")}
+
+    def test_ignores_matches_the_walk(self, tmp_path):
+        make_tree(tmp_path, {
+            ".gitignore": "gen/\n",
+            "pkg/.gitignore": "*_pb2.py\n",
+            "pkg/api.py": "",
+            "pkg/api_pb2.py": "",
+            "gen/out.py": "",
+            "build/x.py": "",
+            ".hidden/h.py": "",
+        })
+        files = ProjectFiles(tmp_path, ["build"])
+        walked = set(files)
+        for rel in ("pkg/api.py", "pkg/api_pb2.py", "gen/out.py", "build/x.py", ".hidden/h.py", "new.py"):
+            path = str(tmp_path / rel)
+            assert files.ignores(path) == (path not in walked and rel != "new.py")
@@ -0,0 +1,165 @@
+import json
+import os
+import threading
+import pytest
+from auto_reqs import watch
+from auto_reqs.config import DEFAULT_CONFIG
+from auto_reqs.pipeline import RunContext
+from auto_reqs.walker import ProjectFiles
+from auto_reqs.watch import RESCAN, ImportTally, InotifyWatcher, PollingWatcher, ProjectWatch
+
+
+def pins(repo):
+    lines = (repo / "requirements.txt").read_text().splitlines()
+    return [line for line in lines if line and not line.startswith("#")]
+
+
+@pytest.fixture
+def project(tmp_path, monkeypatch):
+    """A project resolved against a file:// snapshot, with sync calls counted."""
+    monkeypatch.setenv("AUTO_REQS_CACHE_DIR", str(tmp_path / "user-cache"))
+    snapshot = tmp_path / "snapshot.json"
+    snapshot.write_text(json.dumps({"zzwatch-alpha": "1.0", "zzwatch-beta": "2.0"}))
+    repo = tmp_path / "repo"
+    repo.mkdir()
+    (repo / "a.py").write_text("import zzwatch_alpha\n")
+    (repo / "b.py").write_text("import os\nimport zzwatch_alpha\n")
+
+    ctx = RunContext(DEFAULT_CONFIG, use_cache=False, index_url="file://" + str(snapshot))
+    syncs = []
+    apply_changes = watch.apply_changes
+    monkeypatch.setattr(watch, "apply_changes", lambda *a, **kw: syncs.append(1) or apply_changes(*a, **kw))
+    project = ProjectWatch(str(repo), DEFAULT_CONFIG, ctx, use_cache=False)
+    project.scan()
+    return project, repo, syncs
+
+
+class TestImportTally:
+    def test_name_kept_until_last_file_drops_it(self):
+        tally = ImportTally()
+        tally.set_file("a.py", {"requests", "os"})
+        tally.set_file("b.py", {"requests"})
+        tally.set_file("a.py", {"os"})
+        assert tally.names() == {"os", "requests"}
+        tally.remove_file("b.py")
+        assert tally.names() == {"os"}
+        assert set(tally.files) == {"a.py"}
+
+
+class TestProjectWatch:
+    def test_initial_scan_writes_requirements(self, project):
+        _, repo, syncs = project
+        assert pins(repo) == ["zzwatch-alpha==1.0"]
+        assert syncs == [1]
+
+    def test_package_dropped_only_when_no_file_uses_it(self, project):
+        watcher, repo, _ = project
+        (repo / "a.py").write_text("import json\n")
+        watcher.update({str(repo / "a.py")})
+        assert pins(repo) == ["zzwatch-alpha==1.0"]
+
+        os.remove(repo / "b.py")
+        watcher.update({str(repo / "b.py")})
+        assert pins(repo) == []
+
+    def test_sync_skipped_when_third_party_set_unchanged(self, project):
+        watcher, repo, syncs = project
+        (repo / "c.py").write_text("import sys\nimport zzwatch_alpha\n")
+        assert watcher.update({str(repo / "c.py")}) is None
+        (repo / "c.py").write_text("import zzwatch_beta\n")
+        assert watcher.update({str(repo / "c.py")}) is not None
+        assert pins(repo) == ["zzwatch-alpha==1.0", "zzwatch-beta==2.0"]
+        assert len(syncs) == 2
+
+    def test_unparseable_file_does_not_stop_the_watch(self, project, monkeypatch):
+        watcher, repo, _ = project
+
+        def null_bytes(path, max_file_size=None):
+            raise ValueError("source code string cannot contain null bytes")
+
+        monkeypatch.setattr(watch, "extract_imports_from_file", null_bytes)
+        watcher.update({str(repo / "a.py"), str(repo / "b.py")})
+        assert pins(repo) == []
+
+    def test_deleted_directory_drops_its_files(self, project):
+        watcher, repo, _ = project
+        pkg = repo / "pkg"
+        pkg.mkdir()
+        (pkg / "mod.py").write_text("import zzwatch_beta\n")
+        watcher.update({str(pkg / "mod.py")})
+        assert "zzwatch-beta==2.0" in pins(repo)
+        (pkg / "mod.py").unlink()
+        pkg.rmdir()
+        watcher.update({str(pkg)})
+        assert pins(repo) == ["zzwatch-alpha==1.0"]
+
+    def test_run_debounces_events_into_one_batch(self, project):
+        watcher, repo, _ = project
+        stop = threading.Event()
+        batches = []
+        events = [{str(repo / "a.py")}, {str(repo / "b.py")}, set()]
+
+        class FakeWatcher:
+            def changes(self, timeout):
+                if not events:
+                    stop.set()
+                    return set()
+                return events.pop(0)
+
+        watcher.update = lambda paths: batches.append(set(paths))
+        watcher.run(FakeWatcher(), stop=stop, report=None)
+        assert batches == [{str(repo / "a.py"), str(repo / "b.py")}]
+
+
+class TestWatchers:
+    def test_polling_watcher_reports_changes(self, tmp_path):
+        (tmp_path / "a.py").write_text("import os\n")
+        (tmp_path / "b.py").write_text("import os\n")
+        watcher = PollingWatcher(lambda: ProjectFiles(str(tmp_path)))
+        (tmp_path / "a.py").write_text("import sys, json\n")
+        (tmp_path / "b.py").unlink()
+        (tmp_path / "c.py").write_text("")
+        assert watcher.changes(0) == {str(tmp_path / n) for n in ("a.py", "b.py", "c.py")}
+        assert watcher.changes(0) == set()
+
+    @pytest.mark.skipif(watch._load_libc() is None, reason="inotify not available")
+    def test_inotify_watcher_reports_changes(self, tmp_path):
+        (tmp_path / "a.py").write_text("")
+        (tmp_path / "ignored").mkdir()
+        (tmp_path / ".gitignore").write_text("ignored/\n")
+        files = ProjectFiles(str(tmp_path))
+        list(files)
+        watcher = InotifyWatcher(files)
+        try:
+            (tmp_path / "a.py").write_text("import os\n")
+            (tmp_path / "notes.txt").write_text("")
+            (tmp_path / "pkg").mkdir()
+            (tmp_path / "pkg" / "m.py").write_text("")
+            changed = set()
+            for _ in range(5):
+                got = watcher.changes(0.2)
+                assert got is not RESCAN
+                changed |= got
+            assert changed == {str(tmp_path / "a.py"), str(tmp_path / "pkg" / "m.py")}
+
+            (tmp_path / "pkg" / "n.py").write_text("")
+            assert str(tmp_path / "pkg" / "n.py") in watcher.changes(1)
+        finally:
+            watcher.close()
+
+    @pytest.mark.skipif(watch._load_libc() is None, reason="inotify not available")
+    def test_inotify_watcher_rescans_after_directory_move(self, tmp_path):
+        repo = tmp_path / "repo"
+        (repo / "pkg" / "sub").mkdir(parents=True)
+        (repo / "pkg" / "sub" / "m.py").write_text("")
+        files = ProjectFiles(str(repo))
+        list(files)
+        watcher = InotifyWatcher(files)
+        try:
+            (repo / "pkg").rename(tmp_path / "outside")
+            assert watcher.changes(1) is RESCAN
+            assert not any(p.startswith(str(repo / "pkg")) for p in watcher.watches.values())
+            (tmp_path / "outside" / "sub" / "m.py").write_text("import os\n")
+            assert watcher.changes(0.2) == set()
+        finally:
+            watcher.close()